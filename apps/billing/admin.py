@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import PaymentCategory, Transaction
+from .models import PaymentCategory, Transaction, PropertyBalance
 
 @admin.register(PaymentCategory)
 class PaymentCategoryAdmin(admin.ModelAdmin):
@@ -13,3 +13,10 @@ class TransactionAdmin(admin.ModelAdmin):
     list_filter = ('transaction_type', 'status', 'category')
     search_fields = ('concept', 'description', 'property__house_number')
     date_hierarchy = 'issue_date'
+
+
+@admin.register(PropertyBalance)
+class PropertyBalanceAdmin(admin.ModelAdmin):
+    list_display = ('property', 'pending_amount', 'pending_count', 'paid_amount', 'updated_at')
+    search_fields = ('property__house_number',)
+    readonly_fields = ('property', 'pending_amount', 'pending_count', 'paid_amount', 'updated_at')
@@ -0,0 +1,144 @@
+"""Saldos por propiedad (``PropertyBalance``).
+
+Cada alta, cambio de estado, anulación o borrado de un ``Transaction`` aplica
+al saldo la diferencia entre su aporte anterior (leído con la fila bloqueada)
+y el nuevo con una sola sentencia incremental en la misma transacción, así que
+cambios concurrentes sobre una misma propiedad no se pisan. La generación
+masiva de cobros actualiza los saldos por conjuntos. ``reconcile_balances``
+recalcula desde los movimientos y reporta (y corrige) las diferencias, p. ej.
+tras un ``queryset.update()``; un saldo que quedaría negativo se acota a 0 y
+se registra en el log para reconciliarlo.
+"""
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Count, F, Q, Sum, Value, DecimalField, IntegerField, DateTimeField
+from django.utils import timezone
+
+from apps.properties.models import Property
+from .models import Transaction, PropertyBalance
+from .sql import insert_select, upsert_increment
+
+BALANCE_FIELDS = ('pending_amount', 'pending_count', 'paid_amount')
+
+logger = logging.getLogger(__name__)
+
+
+def _apply_delta(property_id, pending_amount, pending_count, paid_amount):
+    increments = {
+        'pending_amount': pending_amount,
+        'pending_count': pending_count,
+        'paid_amount': paid_amount,
+    }
+    now = timezone.now()
+    if min(increments.values()) < 0:
+        # Restar supone que el aporte anterior ya está en el saldo; si no alcanza, está desfasado
+        balance = PropertyBalance.objects.filter(property_id=property_id, **{
+            f'{field}__gte': -delta for field, delta in increments.items() if delta < 0
+        })
+        updated = balance.update(
+            updated_at=now, **{field: F(field) + delta for field, delta in increments.items()}
+        )
+        if updated:
+            return
+        logger.warning(
+            'Saldo desfasado en la propiedad %s (%s); se acota a 0, ejecute reconcile_balances',
+            property_id, increments
+        )
+    upsert_increment(
+        PropertyBalance,
+        conflict_fields=['property'],
+        values={'property': property_id, 'updated_at': now},
+        increments=increments,
+    )
+
+
+def apply_transaction_change(old, new):
+    """Aplicar el paso de aporte ``old`` a ``new`` (ver ``Transaction.ledger_contribution``)"""
+    deltas = defaultdict(lambda: [0, 0, 0])
+    for contribution, sign in ((old, -1), (new, 1)):
+        if contribution is None:
+            continue
+        property_id, *values = contribution
+        for index, value in enumerate(values):
+            deltas[property_id][index] += sign * value
+
+    for property_id, values in deltas.items():
+        if any(values):
+            _apply_delta(property_id, *values)
+
+
+def apply_uniform_charge(property_ids, amount):
+    """Sumar un cobro pendiente de ``amount`` a cada propiedad de ``property_ids`` (subconsulta)"""
+    now = timezone.now()
+    # Filas faltantes con un INSERT ... SELECT; luego un solo UPDATE para todas
+    missing = Property.objects.filter(id__in=property_ids, balance__isnull=True).order_by().values_list(
+        'id',
+        Value(Decimal('0'), output_field=DecimalField(max_digits=12, decimal_places=2)),
+        Value(0, output_field=IntegerField()),
+        Value(Decimal('0'), output_field=DecimalField(max_digits=12, decimal_places=2)),
+        Value(now, output_field=DateTimeField()),
+    )
+    insert_select(
+        PropertyBalance, ['property', 'pending_amount', 'pending_count', 'paid_amount', 'updated_at'],
+        missing, ignore_conflicts=True
+    )
+    PropertyBalance.objects.filter(property_id__in=property_ids).update(
+        pending_amount=F('pending_amount') + amount,
+        pending_count=F('pending_count') + 1,
+        updated_at=now,
+    )
+
+
+def compute_balances(property_ids):
+    """Saldos calculados desde los movimientos, agrupados por propiedad"""
+    rows = Transaction.objects.filter(
+        transaction_type='income', property_id__in=property_ids
+    ).exclude(status='cancelled').order_by().values('property_id').annotate(
+        pending_amount=Sum('amount', filter=Q(status='pending'), default=Decimal('0')),
+        pending_count=Count('id', filter=Q(status='pending')),
+        paid_amount=Sum('amount', filter=Q(status='paid'), default=Decimal('0')),
+    )
+    return {row.pop('property_id'): row for row in rows}
+
+
+def reconcile_balances(batch_size=1000, fix=True):
+    """Recalcular los saldos por lotes de propiedades
+
+    Retorna (propiedades revisadas, lista de diferencias). Cada diferencia es
+    ``(property_id, campo, esperado, registrado)``. Con ``fix`` se corrigen.
+    """
+    zero = {'pending_amount': Decimal('0'), 'pending_count': 0, 'paid_amount': Decimal('0')}
+    checked = 0
+    drift = []
+    last_id = 0
+    while True:
+        property_ids = list(Property.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not property_ids:
+            break
+        last_id = property_ids[-1]
+        checked += len(property_ids)
+
+        expected = compute_balances(property_ids)
+        recorded = PropertyBalance.objects.in_bulk(property_ids)
+
+        to_save = []
+        for property_id in property_ids:
+            values = expected.get(property_id, zero)
+            balance = recorded.get(property_id)
+            current = {field: getattr(balance, field) for field in BALANCE_FIELDS} if balance else zero
+            differences = [
+                (property_id, field, values[field], current[field])
+                for field in BALANCE_FIELDS if values[field] != current[field]
+            ]
+            if differences:
+                drift.extend(differences)
+                to_save.append(PropertyBalance(property_id=property_id, **values))
+
+        if fix and to_save:
+            PropertyBalance.objects.bulk_create(
+                to_save, batch_size=batch_size, update_conflicts=True,
+                unique_fields=['property'], update_fields=[*BALANCE_FIELDS, 'updated_at'],
+            )
+    return checked, drift
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from apps.billing.ledger import reconcile_balances
+
+
+class Command(BaseCommand):
+    help = 'Recalcula por lotes los saldos por propiedad desde los cobros y reporta las diferencias'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Propiedades por lote')
+        parser.add_argument('--dry-run', action='store_true', help='Solo reportar, sin corregir')
+
+    def handle(self, *args, **options):
+        checked, drift = reconcile_balances(batch_size=options['batch_size'], fix=not options['dry_run'])
+
+        for property_id, field, expected, actual in drift:
+            self.stdout.write(f'Propiedad {property_id}: {field} esperado {expected}, registrado {actual}')
+
+        properties = len({property_id for property_id, *_ in drift})
+        action = 'con diferencias' if options['dry_run'] else 'corregidas'
+        self.stdout.write(self.style.SUCCESS(
+            f'Propiedades revisadas: {checked}; {action}: {properties}'
+        ))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:35
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0001_initial'),
+        ('properties', '0003_residency_history_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='period',
+            field=models.CharField(blank=True, default='', help_text='Mes facturado (AAAA-MM) en cobros periódicos; un cobro por propiedad, categoría y periodo', max_length=7, verbose_name='Periodo'),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='issue_date',
+            field=models.DateField(default=django.utils.timezone.localdate, verbose_name='Fecha de Emisión/Registro'),
+        ),
+        migrations.AddConstraint(
+            model_name='transaction',
+            constraint=models.UniqueConstraint(condition=models.Q(('period', ''), _negated=True), fields=('property', 'category', 'period'), name='unique_property_category_period'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_property_balances(apps, schema_editor):
+    """Saldos iniciales desde los cobros existentes, en una consulta agrupada"""
+    Transaction = apps.get_model('billing', 'Transaction')
+    PropertyBalance = apps.get_model('billing', 'PropertyBalance')
+    
+    rows = Transaction.objects.filter(
+        transaction_type='income', property__isnull=False
+    ).exclude(status='cancelled').order_by().values('property_id').annotate(
+        pending_amount=Sum('amount', filter=Q(status='pending'), default=0),
+        pending_count=Count('id', filter=Q(status='pending')),
+        paid_amount=Sum('amount', filter=Q(status='paid'), default=0),
+    )
+    PropertyBalance.objects.bulk_create(
+        [PropertyBalance(**row) for row in rows.iterator()], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0002_transaction_period'),
+        ('properties', '0003_residency_history_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyBalance',
+            fields=[
+                ('property', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='balance', serialize=False, to='properties.property', verbose_name='Propiedad/Unidad')),
+                ('pending_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Monto Pendiente')),
+                ('pending_count', models.PositiveIntegerField(default=0, verbose_name='Cobros Pendientes')),
+                ('paid_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Monto Pagado')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Actualizado')),
+            ],
+            options={
+                'verbose_name': 'Saldo de Propiedad',
+                'verbose_name_plural': 'Saldos de Propiedades',
+                'db_table': 'property_balances',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['property', 'status', 'due_date'], name='transaction_property_due_idx'),
+        ),
+        migrations.RunPython(backfill_property_balances, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
 from apps.properties.models import Property
@@ -71,6 +71,10 @@ class Transaction(models.Model):
     issue_date = models.DateField('Fecha de Emisión/Registro', default=timezone.localdate)
     due_date = models.DateField('Fecha de Vencimiento', null=True, blank=True, help_text='Solo para cobros')
     payment_date = models.DateField('Fecha de Pago Real', null=True, blank=True)
+    period = models.CharField(
+        'Periodo', max_length=7, blank=True, default='',
+        help_text='Mes facturado (AAAA-MM) en cobros periódicos; un cobro por propiedad, categoría y periodo'
+    )
     
     # Auditoría
     created_by = models.ForeignKey(
@@ -93,11 +97,37 @@ class Transaction(models.Model):
         indexes = [
             models.Index(fields=['transaction_type', 'status']),
             models.Index(fields=['issue_date']),
+            # Cobros pendientes y vencidos por propiedad (saldos y morosidad)
+            models.Index(fields=['property', 'status', 'due_date'], name='transaction_property_due_idx'),
+        ]
+        constraints = [
+            # Reintentar la generación masiva de un periodo no duplica cobros
+            models.UniqueConstraint(
+                fields=['property', 'category', 'period'],
+                condition=~models.Q(period=''),
+                name='unique_property_category_period'
+            ),
         ]
     
     def __str__(self):
         return f"{self.get_transaction_type_display()} - {self.concept} ({self.amount})"
     
+    # Campos que determinan el aporte al saldo de la propiedad
+    LEDGER_FIELDS = ('transaction_type', 'property_id', 'status', 'amount')
+    
+    def stored_ledger_contribution(self):
+        """Aporte de la fila guardada, bloqueándola hasta el fin de la transacción en curso"""
+        stored = Transaction.objects.select_for_update().filter(pk=self.pk).only(*self.LEDGER_FIELDS).first()
+        return stored.ledger_contribution() if stored else None
+    
+    def ledger_contribution(self):
+        """(propiedad, pendiente, cantidad pendiente, pagado) que este movimiento suma al saldo"""
+        if self.transaction_type != 'income' or not self.property_id or self.status == 'cancelled':
+            return None
+        if self.status == 'paid':
+            return (self.property_id, 0, 0, self.amount)
+        return (self.property_id, self.amount, 1, 0)
+    
     def clean(self):
         # Validaciones de Integridad
         
@@ -121,4 +151,31 @@ class Transaction(models.Model):
 
     def save(self, *args, **kwargs):
         self.clean()
-        super().save(*args, **kwargs)
+        # El movimiento y el ajuste del saldo (señal post_save) se confirman juntos
+        with transaction.atomic():
+            self._ledger_state = None if self._state.adding else self.stored_ledger_contribution()
+            super().save(*args, **kwargs)
+
+
+class PropertyBalance(models.Model):
+    """Saldo acumulado de cobros por propiedad, mantenido en cada cambio de ``Transaction``"""
+    
+    property = models.OneToOneField(
+        Property,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='balance',
+        verbose_name='Propiedad/Unidad'
+    )
+    pending_amount = models.DecimalField('Monto Pendiente', max_digits=12, decimal_places=2, default=0)
+    pending_count = models.PositiveIntegerField('Cobros Pendientes', default=0)
+    paid_amount = models.DecimalField('Monto Pagado', max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField('Actualizado', auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Saldo de Propiedad'
+        verbose_name_plural = 'Saldos de Propiedades'
+        db_table = 'property_balances'
+    
+    def __str__(self):
+        return f"{self.property} - Pendiente {self.pending_amount}"
@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from django.core.validators import RegexValidator
+from django.utils import timezone
 from .models import PaymentCategory, Transaction
 from apps.properties.models import Property
 
@@ -19,7 +21,7 @@ class TransactionSerializer(serializers.ModelSerializer):
             'id', 'transaction_type', 'category', 'category_name',
             'property', 'property_identifier', 'amount', 'concept',
             'description', 'status', 'issue_date', 'due_date',
-            'payment_date', 'created_by', 'created_by_name',
+            'payment_date', 'period', 'created_by', 'created_by_name',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['created_by', 'created_at', 'updated_at']
@@ -49,6 +51,38 @@ class BatchTransactionSerializer(serializers.Serializer):
     concept = serializers.CharField(max_length=150)
     description = serializers.CharField(required=False, allow_blank=True)
     due_date = serializers.DateField(required=False, allow_null=True)
+    period = serializers.CharField(
+        required=False,
+        validators=[RegexValidator(r'^\d{4}-(0[1-9]|1[0-2])$', 'El periodo debe tener el formato AAAA-MM.')],
+        help_text='Mes facturado (AAAA-MM); por defecto el mes actual'
+    )
+    # Filtros de propiedades, aplicados en SQL
+    property_status = serializers.MultipleChoiceField(choices=Property.STATUS_CHOICES, required=False)
+    block = serializers.CharField(max_length=10, required=False)
+    
+    def validate(self, data):
+        data.setdefault('period', timezone.localdate().strftime('%Y-%m'))
+        return data
+
+
+class PropertyBalanceSerializer(serializers.ModelSerializer):
+    """
+    Saldo de una propiedad (campos anotados por ``PropertyBalanceViewSet``)
+    """
+    property_identifier = serializers.CharField(source='full_identifier', read_only=True)
+    pending_amount = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    pending_count = serializers.IntegerField(read_only=True)
+    paid_amount = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    overdue_amount = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    overdue_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Property
+        fields = [
+            'id', 'house_number', 'block', 'property_identifier', 'status',
+            'pending_amount', 'pending_count', 'paid_amount',
+            'overdue_amount', 'overdue_count'
+        ]
 
 
 class DashboardStatsSerializer(serializers.Serializer):
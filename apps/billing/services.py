@@ -0,0 +1,67 @@
+"""Generación masiva de cobros.
+
+Los cobros de un periodo se insertan con un único ``INSERT … SELECT`` desde
+``properties``: el filtro de propiedades se aplica en SQL y ninguna fila pasa
+por Python. ``NOT EXISTS`` y el índice único parcial de
+(propiedad, categoría, periodo) hacen que reintentar la misma generación no
+duplique cobros.
+"""
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Value, F, CharField, DateField, DateTimeField, DecimalField, IntegerField
+from django.utils import timezone
+
+from apps.properties.models import Property
+from .models import Transaction
+from .ledger import apply_uniform_charge
+from .sql import insert_select
+
+
+def _charge_source(category, period, amount, concept, description, issue_date, due_date, created_by,
+                   property_filters, created_at):
+    """Columnas destino y SELECT con una fila por propiedad a cobrar, en el mismo orden"""
+    already_billed = Transaction.objects.filter(property=OuterRef('pk'), category=category, period=period)
+
+    # Las columnas se toman del modelo para no repetir nombres de la tabla
+    columns = {
+        'transaction_type': Value('income', output_field=CharField()),
+        'category': Value(category.pk, output_field=IntegerField()),
+        'property': F('pk'),
+        'amount': Value(amount, output_field=DecimalField(max_digits=10, decimal_places=2)),
+        'concept': Value(concept, output_field=CharField()),
+        'description': Value(description, output_field=CharField()),
+        'status': Value('pending', output_field=CharField()),
+        'issue_date': Value(issue_date, output_field=DateField()),
+        'due_date': Value(due_date, output_field=DateField()),
+        'period': Value(period, output_field=CharField()),
+        'created_by': Value(created_by.pk if created_by else None, output_field=IntegerField()),
+        'created_at': Value(created_at, output_field=DateTimeField()),
+        'updated_at': Value(created_at, output_field=DateTimeField()),
+    }
+    aliases = {f'_{name}': expression for name, expression in columns.items()}
+
+    source = Property.objects.filter(**property_filters).filter(~Exists(already_billed)).order_by()
+    return list(columns), source.annotate(**aliases).values_list(*aliases)
+
+
+def generate_period_charges(category, period, amount, concept, description='', due_date=None,
+                            created_by=None, property_filters=None):
+    """Crear en el servidor un cobro pendiente por propiedad; retorna cuántos se crearon
+
+    Las propiedades que ya tienen un cobro de ``category`` en ``period`` se omiten.
+    Los saldos de las propiedades cobradas se actualizan en la misma transacción.
+    """
+    created_at = timezone.now()
+    field_names, source = _charge_source(
+        category, period, amount, concept, description,
+        timezone.localdate(), due_date, created_by, property_filters or {}, created_at
+    )
+
+    with transaction.atomic():
+        # Una generación concurrente del mismo periodo choca con el índice único parcial
+        created = insert_select(Transaction, field_names, source, ignore_conflicts=True)
+        if created:
+            charged = Transaction.objects.filter(
+                category=category, period=period, created_at=created_at
+            ).values('property_id')
+            apply_uniform_charge(charged, amount)
+    return created
@@ -0,0 +1,24 @@
+from django.db.models.signals import post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from .ledger import apply_transaction_change
+from .models import Transaction
+
+
+@receiver(post_save, sender=Transaction)
+def update_balance_on_save(sender, instance, **kwargs):
+    # Alta, cambio de estado/monto/propiedad o anulación: se aplica solo la diferencia
+    # con el aporte leído (y bloqueado) en ``Transaction.save``
+    old = getattr(instance, '_ledger_state', None)
+    apply_transaction_change(old, instance.ledger_contribution())
+
+
+@receiver(pre_delete, sender=Transaction)
+def lock_balance_on_delete(sender, instance, **kwargs):
+    # Dentro de la transacción del borrado: bloquear la fila y leer su aporte guardado
+    instance._ledger_state = instance.stored_ledger_contribution()
+
+
+@receiver(post_delete, sender=Transaction)
+def update_balance_on_delete(sender, instance, **kwargs):
+    apply_transaction_change(getattr(instance, '_ledger_state', None), None)
@@ -0,0 +1,60 @@
+from django.db import connection
+
+
+def insert_select(model, field_names, source, ignore_conflicts=False):
+    """Ejecutar ``INSERT INTO <tabla de model> (field_names) <SELECT de source>``
+
+    ``source`` es un queryset ``values_list`` con las columnas en el orden de
+    ``field_names``. Retorna la cantidad de filas insertadas.
+    """
+    select_sql, params = source.query.sql_with_params()
+
+    meta = model._meta
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(meta.get_field(name).column) for name in field_names)
+    sql = f'INSERT INTO {quote(meta.db_table)} ({columns}) {select_sql}'
+    if ignore_conflicts and connection.vendor in ('postgresql', 'sqlite'):
+        sql += ' ON CONFLICT DO NOTHING'
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def upsert_increment(model, conflict_fields, values, increments):
+    """Sumar ``increments`` a la fila identificada por ``conflict_fields``, creándola si falta
+
+    Un solo ``INSERT ... ON CONFLICT DO UPDATE``. ``values`` son las columnas
+    de la fila nueva (claves incluidas). Los contadores nunca quedan por debajo
+    de 0, para no violar las restricciones de campos positivos: los incrementos
+    negativos se insertan como 0 y, si la fila existe, el resultado se acota a 0.
+    """
+    meta = model._meta
+    quote = connection.ops.quote_name
+    table = quote(meta.db_table)
+
+    row = {**values, **{name: max(delta, 0) for name, delta in increments.items()}}
+    fields = [meta.get_field(name) for name in row]
+    columns = ', '.join(quote(field.column) for field in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    params = [field.get_db_prep_save(row[field.name], connection) for field in fields]
+
+    updates = []
+    for name, delta in increments.items():
+        field = meta.get_field(name)
+        column = quote(field.column)
+        current = f'{table}.{column}'
+        updates.append(f'{column} = CASE WHEN {current} + %s < 0 THEN 0 ELSE {current} + %s END')
+        params.extend([field.get_db_prep_save(delta, connection)] * 2)
+    for name, value in values.items():
+        field = meta.get_field(name)
+        if name not in conflict_fields:
+            updates.append(f'{quote(field.column)} = EXCLUDED.{quote(field.column)}')
+
+    conflict = ', '.join(quote(meta.get_field(name).column) for name in conflict_fields)
+    sql = (
+        f'INSERT INTO {table} ({columns}) VALUES ({placeholders}) '
+        f'ON CONFLICT ({conflict}) DO UPDATE SET {", ".join(updates)}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
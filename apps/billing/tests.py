@@ -1,13 +1,17 @@
+from unittest import mock
+
+from django.db import DatabaseError
 from django.test import TestCase
 from django.contrib.auth.models import User
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
-from datetime import date
+from datetime import date, timedelta
 from decimal import Decimal
 
 from apps.properties.models import Property
-from .models import PaymentCategory, Transaction
+from .models import PaymentCategory, Transaction, PropertyBalance
+from .ledger import reconcile_balances
 
 class BillingTests(TestCase):
     def setUp(self):
@@ -67,6 +71,82 @@ class BillingTests(TestCase):
         self.assertTrue(Transaction.objects.filter(property=self.prop1).exists())
         self.assertTrue(Transaction.objects.filter(property=self.prop2).exists())
 
+    def test_batch_create_is_idempotent_per_period(self):
+        """Reintentar la generación del mismo periodo no duplica cobros"""
+        url = reverse('transaction-batch-create')
+        data = {
+            'category': self.income_cat.id,
+            'amount': '1000.00',
+            'concept': 'Expensa Marzo',
+            'period': '2025-03'
+        }
+        
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['count'], 2)
+        
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['count'], 0)
+        self.assertEqual(Transaction.objects.filter(period='2025-03').count(), 2)
+        
+        charge = Transaction.objects.get(property=self.prop1)
+        self.assertEqual(charge.amount, Decimal('1000.00'))
+        self.assertEqual(charge.status, 'pending')
+        self.assertEqual(charge.created_by, self.user)
+        
+        # Otro periodo sí genera cobros nuevos
+        response = self.client.post(url, {**data, 'period': '2025-04'})
+        self.assertEqual(response.data['count'], 2)
+
+    def test_batch_create_filters_properties(self):
+        """Los filtros de estado y bloque se aplican al seleccionar propiedades"""
+        Property.objects.filter(id=self.prop1.id).update(status='occupied')
+        Property.objects.create(house_number='201', block='B', area_m2=100, status='occupied')
+        url = reverse('transaction-batch-create')
+        data = {
+            'category': self.income_cat.id,
+            'amount': '800.00',
+            'concept': 'Expensa Bloque A',
+            'period': '2025-05',
+            'property_status': ['occupied'],
+            'block': 'A'
+        }
+        
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(
+            list(Transaction.objects.values_list('property_id', flat=True)), [self.prop1.id]
+        )
+
+    def test_idempotency_key_replays_stored_response(self):
+        """Un reintento con la misma Idempotency-Key no crea otro cobro"""
+        data = {
+            'transaction_type': 'income',
+            'category': self.income_cat.id,
+            'property': self.prop1.id,
+            'amount': '500.00',
+            'concept': 'Cobro Enero'
+        }
+        url = reverse('transaction-list')
+        
+        first = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='cobro-1')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        
+        retry = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='cobro-1')
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data['id'], first.data['id'])
+        self.assertEqual(Transaction.objects.count(), 1)
+        
+        # La misma clave con otro cuerpo se rechaza
+        conflict = self.client.post(
+            url, {**data, 'amount': '600.00'}, format='json', HTTP_IDEMPOTENCY_KEY='cobro-1'
+        )
+        self.assertEqual(conflict.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Transaction.objects.count(), 1)
+
     def test_stats_and_balance(self):
         """Probar endpoint de estadísticas"""
         # 1. Crear Ingreso (Cobro) de 1000
@@ -103,3 +183,98 @@ class BillingTests(TestCase):
         self.assertEqual(float(response.data['total_expense']), expected_data['total_expense'])
         self.assertEqual(float(response.data['balance']), expected_data['balance'])
         self.assertEqual(response.data['pending_incomes_count'], expected_data['pending_incomes_count'])
+
+    def _balance(self, prop):
+        balance = PropertyBalance.objects.get(property=prop)
+        return balance.pending_amount, balance.pending_count, balance.paid_amount
+
+    def test_balance_follows_transaction_changes(self):
+        """El saldo se actualiza al crear, pagar y anular cobros, también en la generación masiva"""
+        charge = Transaction.objects.create(
+            transaction_type='income', category=self.income_cat, property=self.prop1,
+            amount=500, concept='Cobro Enero'
+        )
+        self.assertEqual(self._balance(self.prop1), (Decimal('500'), 1, Decimal('0')))
+        
+        response = self.client.post(reverse('transaction-batch-create'), {
+            'category': self.income_cat.id, 'amount': '200.00', 'concept': 'Expensa', 'period': '2025-06'
+        })
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(self._balance(self.prop1), (Decimal('700'), 2, Decimal('0')))
+        self.assertEqual(self._balance(self.prop2), (Decimal('200'), 1, Decimal('0')))
+        
+        charge = Transaction.objects.get(id=charge.id)
+        charge.status = 'paid'
+        charge.save()
+        self.assertEqual(self._balance(self.prop1), (Decimal('200'), 1, Decimal('500')))
+        
+        batch_charge = Transaction.objects.get(property=self.prop2)
+        batch_charge.status = 'cancelled'
+        batch_charge.save()
+        self.assertEqual(self._balance(self.prop2), (Decimal('0'), 0, Decimal('0')))
+
+    def test_balances_endpoint_and_reconcile(self):
+        """El listado muestra lo vencido y la reconciliación corrige cambios hechos con update()"""
+        Transaction.objects.create(
+            transaction_type='income', category=self.income_cat, property=self.prop1,
+            amount=300, concept='Vencido', due_date=date.today() - timedelta(days=5)
+        )
+        Transaction.objects.create(
+            transaction_type='income', category=self.income_cat, property=self.prop1,
+            amount=100, concept='Por vencer', due_date=date.today() + timedelta(days=5)
+        )
+        
+        response = self.client.get(reverse('property-balance-list'), {'debtors': 'true'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        row = response.data['results'][0]
+        self.assertEqual(row['id'], self.prop1.id)
+        self.assertEqual(Decimal(row['pending_amount']), Decimal('400'))
+        self.assertEqual(Decimal(row['overdue_amount']), Decimal('300'))
+        self.assertEqual(row['overdue_count'], 1)
+        
+        # update() no dispara señales: el saldo queda desfasado hasta reconciliar
+        Transaction.objects.filter(concept='Vencido').update(status='paid')
+        checked, drift = reconcile_balances(batch_size=1)
+        self.assertEqual(checked, 2)
+        self.assertEqual({field for _, field, _, _ in drift}, {'pending_amount', 'pending_count', 'paid_amount'})
+        self.assertEqual(self._balance(self.prop1), (Decimal('100'), 1, Decimal('300')))
+        self.assertEqual(reconcile_balances()[1], [])
+
+    def test_stale_instances_apply_the_change_once(self):
+        """Dos ediciones con la misma versión cargada pagan el cobro una sola vez"""
+        charge = Transaction.objects.create(
+            transaction_type='income', category=self.income_cat, property=self.prop1,
+            amount=500, concept='Cobro Enero'
+        )
+        first, second = Transaction.objects.get(id=charge.id), Transaction.objects.get(id=charge.id)
+        first.status = second.status = 'paid'
+        first.save()
+        second.save()
+        self.assertEqual(self._balance(self.prop1), (Decimal('0'), 0, Decimal('500')))
+
+    def test_failed_balance_update_rolls_back_the_transaction(self):
+        """Si falla el ajuste del saldo, el movimiento tampoco se guarda"""
+        with mock.patch('apps.billing.ledger.upsert_increment', side_effect=DatabaseError('fallo')):
+            with self.assertRaises(DatabaseError):
+                Transaction.objects.create(
+                    transaction_type='income', category=self.income_cat, property=self.prop1,
+                    amount=500, concept='Cobro Enero'
+                )
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_drifted_balance_is_clamped_and_logged(self):
+        """Un saldo desfasado no queda negativo al anular: se acota a 0 y se registra"""
+        charge = Transaction.objects.create(
+            transaction_type='income', category=self.income_cat, property=self.prop1,
+            amount=500, concept='Cobro Enero'
+        )
+        PropertyBalance.objects.filter(property=self.prop1).update(pending_amount=0, pending_count=0)
+        
+        with self.assertLogs('apps.billing.ledger', level='WARNING'):
+            charge.status = 'cancelled'
+            charge.save()
+        self.assertEqual(self._balance(self.prop1), (Decimal('0'), 0, Decimal('0')))
+        
+        charge.delete()
+        self.assertEqual(self._balance(self.prop1), (Decimal('0'), 0, Decimal('0')))
@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PaymentCategoryViewSet, TransactionViewSet
+from .views import PaymentCategoryViewSet, TransactionViewSet, PropertyBalanceViewSet
 
 router = DefaultRouter()
 router.register(r'categories', PaymentCategoryViewSet, basename='payment-category')
 router.register(r'transactions', TransactionViewSet, basename='transaction')
+router.register(r'balances', PropertyBalanceViewSet, basename='property-balance')
 
 urlpatterns = [
     path('', include(router.urls)),
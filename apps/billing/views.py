@@ -1,18 +1,21 @@
-from rest_framework import viewsets, permissions, status, filters
+from rest_framework import viewsets, mixins, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db import transaction
-from django.db.models import Sum, Count, Q
+from django.db.models import Sum, Count, Q, Value, DecimalField, FilteredRelation
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
+from apps.properties.models import Property
 from .models import PaymentCategory, Transaction
 from .serializers import (
     PaymentCategorySerializer, 
     TransactionSerializer, 
     BatchTransactionSerializer,
+    PropertyBalanceSerializer,
     DashboardStatsSerializer
 )
-from apps.properties.models import Property
-from django.utils import timezone
+from .services import generate_period_charges
+from apps.idempotency.decorators import idempotent
 
 class PaymentCategoryViewSet(viewsets.ModelViewSet):
     queryset = PaymentCategory.objects.all()
@@ -31,50 +34,48 @@ class TransactionViewSet(viewsets.ModelViewSet):
     filterset_fields = ['transaction_type', 'category', 'property', 'status', 'issue_date']
     ordering_fields = ['issue_date', 'created_at', 'amount']
 
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
     @action(detail=False, methods=['post'], url_path='batch-create')
+    @idempotent
     def batch_create(self, request):
         """
-        Registro masivo de cobros para todas las propiedades activas.
+        Registro masivo de cobros de un periodo para todas las propiedades,
+        o solo las de ciertos estados (``property_status``) o de un bloque.
+        Reintentar el mismo periodo y categoría no duplica cobros.
         """
         serializer = BatchTransactionSerializer(data=request.data)
         if serializer.is_valid():
-            category = serializer.validated_data['category']
-            amount = serializer.validated_data['amount']
-            concept = serializer.validated_data['concept']
-            description = serializer.validated_data.get('description', '')
-            due_date = serializer.validated_data.get('due_date')
+            data = serializer.validated_data
             
-            # Obtener todas las propiedades (podríamos filtrar por status='occupied' si fuera requerido, 
-            # pero el requerimiento dice "todas las casas activas")
-            # Asumiremos status__in=['occupied', 'available', 'reserved'] o simplemente todas las que existen.
-            # "casas activas" podría interpretarse como no eliminadas o en un estado válido. 
-            # Usaremos todas las del modelo Property por defecto.
-            properties = Property.objects.all()
+            property_filters = {}
+            if data.get('property_status'):
+                property_filters['status__in'] = sorted(data['property_status'])
+            if data.get('block'):
+                property_filters['block'] = data['block']
             
-            transactions_to_create = []
+            created = generate_period_charges(
+                category=data['category'],
+                period=data['period'],
+                amount=data['amount'],
+                concept=data['concept'],
+                description=data.get('description', ''),
+                due_date=data.get('due_date'),
+                created_by=request.user,
+                property_filters=property_filters
+            )
             
-            with transaction.atomic():
-                for prop in properties:
-                    transactions_to_create.append(Transaction(
-                        transaction_type='income', # Batch es típicamente para cobros (expensas)
-                        category=category,
-                        property=prop,
-                        amount=amount,
-                        concept=concept,
-                        description=description,
-                        status='pending',
-                        issue_date=timezone.now().date(),
-                        due_date=due_date,
-                        created_by=request.user
-                    ))
-                
-                created_transactions = Transaction.objects.bulk_create(transactions_to_create)
-                
             return Response(
-                {"message": f"Se generaron {len(created_transactions)} cobros correctamente."},
+                {
+                    "message": f"Se generaron {created} cobros correctamente.",
+                    "count": created,
+                    "period": data['period']
+                },
                 status=status.HTTP_201_CREATED
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -117,3 +118,39 @@ class TransactionViewSet(viewsets.ModelViewSet):
         }
         
         return Response(data)
+
+
+class PropertyBalanceViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Saldos de todas las propiedades para la pantalla de cobranza.
+    Pendiente y pagado salen de la tabla precalculada ``property_balances``;
+    lo vencido, del índice (propiedad, estado, vencimiento) de los cobros.
+    Filtros: ``block`` y ``debtors=true`` (solo con saldo pendiente).
+    """
+    serializer_class = PropertyBalanceSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [filters.SearchFilter, DjangoFilterBackend, filters.OrderingFilter]
+    search_fields = ['house_number']
+    filterset_fields = ['block', 'status']
+    ordering_fields = ['house_number', 'pending_amount', 'overdue_amount', 'paid_amount']
+    ordering = ['block', 'house_number']
+
+    def get_queryset(self):
+        money = DecimalField(max_digits=12, decimal_places=2)
+        # Un solo LEFT JOIN agrupado a los cobros vencidos, por el índice (propiedad, estado, vencimiento)
+        overdue = FilteredRelation('transactions', condition=Q(
+            transactions__status='pending',
+            transactions__due_date__lt=timezone.localdate(),
+            transactions__transaction_type='income',
+        ))
+
+        queryset = Property.objects.annotate(overdue=overdue).annotate(
+            pending_amount=Coalesce('balance__pending_amount', Value(0), output_field=money),
+            pending_count=Coalesce('balance__pending_count', Value(0)),
+            paid_amount=Coalesce('balance__paid_amount', Value(0), output_field=money),
+            overdue_amount=Coalesce(Sum('overdue__amount'), Value(0), output_field=money),
+            overdue_count=Count('overdue__id'),
+        )
+        if self.request.query_params.get('debtors') in ('true', '1'):
+            queryset = queryset.filter(balance__pending_amount__gt=0)
+        return queryset
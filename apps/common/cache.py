@@ -0,0 +1,17 @@
+"""Snapshots cacheados (cache-aside) compartidos por las apps.
+
+Quien llama arma la clave y decide la invalidación, normalmente desde
+señales con ``transaction.on_commit``.
+"""
+from django.core.cache import cache
+
+SNAPSHOT_CACHE_TIMEOUT = 60 * 15  # 15 minutos
+
+
+def cached_snapshot(key, compute, timeout=SNAPSHOT_CACHE_TIMEOUT):
+    """Leer ``key`` de la caché o calcularlo con ``compute()`` y guardarlo"""
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout)
+    return value
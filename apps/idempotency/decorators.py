@@ -0,0 +1,94 @@
+"""Soporte para la cabecera ``Idempotency-Key`` en vistas que crean datos.
+
+La primera petición con una clave registra la huella de la petición y la
+respuesta serializada en la misma transacción que sus escrituras. Un
+reintento con la misma clave recibe esa respuesta sin volver a validar ni a
+insertar; si llega mientras la original sigue en curso, espera en el índice
+único hasta que termine. La misma clave con otra petición se rechaza.
+"""
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpRequest
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAY_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = IdempotencyKey._meta.get_field('key').max_length
+
+
+def request_fingerprint(request):
+    digest = hashlib.sha256()
+    for part in (request.method.encode(), request.get_full_path().encode(), request.body):
+        digest.update(part)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _replay(record):
+    response = Response(record.response_body, status=record.status_code)
+    response[REPLAY_HEADER] = 'true'
+    return response
+
+
+def idempotent(view_func):
+    """Hacer idempotente una vista de función o un método de vista/viewset
+
+    Sin la cabecera la vista se ejecuta normalmente. Las respuestas 5xx y las
+    excepciones no se guardan, así que el cliente puede reintentarlas.
+    """
+    @functools.wraps(view_func)
+    def wrapper(*args, **kwargs):
+        request = next(arg for arg in args if isinstance(arg, (Request, HttpRequest)))
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_func(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response({
+                'error': f'La cabecera {IDEMPOTENCY_HEADER} admite hasta {MAX_KEY_LENGTH} caracteres'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        fingerprint = request_fingerprint(request)
+        now = timezone.now()
+
+        with transaction.atomic():
+            IdempotencyKey.objects.filter(user=request.user, key=key, expires_at__lte=now).delete()
+            # Un reintento concurrente se bloquea aquí hasta que la original confirme o revierta
+            record, created = IdempotencyKey.objects.get_or_create(
+                user=request.user, key=key,
+                defaults={
+                    'fingerprint': fingerprint,
+                    'expires_at': now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+                }
+            )
+            if not created:
+                if record.fingerprint != fingerprint:
+                    return Response({
+                        'error': f'La clave {IDEMPOTENCY_HEADER} ya se usó con una petición distinta'
+                    }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+                return _replay(record)
+
+            response = view_func(*args, **kwargs)
+
+            if response.status_code >= 500:
+                record.delete()
+                return response
+
+            # Guardar exactamente lo que recibe el cliente
+            body = json.loads(JSONRenderer().render(response.data)) if response.data is not None else None
+            IdempotencyKey.objects.filter(pk=record.pk).update(
+                status_code=response.status_code, response_body=body
+            )
+        return response
+
+    return wrapper
@@ -0,0 +1,32 @@
+# apps/idempotency/models.py
+from django.db import models
+from django.contrib.auth.models import User
+
+class IdempotencyKey(models.Model):
+    """Respuesta guardada para una clave ``Idempotency-Key`` de un usuario"""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField('Clave', max_length=255)
+    # sha256 de método, ruta y cuerpo: la misma clave con otra petición se rechaza
+    fingerprint = models.CharField('Huella de la petición', max_length=64)
+
+    # Vacíos mientras la petición original sigue en curso
+    status_code = models.PositiveSmallIntegerField('Código de respuesta', null=True, blank=True)
+    response_body = models.JSONField('Respuesta', null=True, blank=True)
+
+    created_at = models.DateTimeField('Creado', auto_now_add=True)
+    expires_at = models.DateTimeField('Expira')
+
+    class Meta:
+        verbose_name = 'Clave de Idempotencia'
+        verbose_name_plural = 'Claves de Idempotencia'
+        db_table = 'idempotency_keys'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_user_idempotency_key'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at'], name='idempotency_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key}"
@@ -0,0 +1,139 @@
+from datetime import date, time, timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from apps.billing.services import generate_period_charges
+from apps.billing.models import PaymentCategory
+from apps.common_areas.models import CommonArea
+from apps.properties.models import Property
+from apps.properties import services as property_services
+from apps.reservations.models import Reservation
+from apps.users.models import UserProfile
+from .decorators import idempotent, REPLAY_HEADER
+from .models import IdempotencyKey
+
+
+class IdempotentViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testadmin')
+        self.client.force_authenticate(user=self.user)
+
+    def _call(self, view, key='clave-1', user=None):
+        request = APIRequestFactory().post('/recurso/', {'name': 'x'}, format='json', HTTP_IDEMPOTENCY_KEY=key)
+        force_authenticate(request, user=user or self.user)
+        return view(request)
+
+    def test_reservation_create_replays_stored_response(self):
+        resident = User.objects.create_user(username='resident')
+        UserProfile.objects.create(user=resident, user_type='resident')
+        property_obj = Property.objects.create(house_number='101', block='A', area_m2=80)
+        property_services.assign_owner(property_obj, resident)
+        area = CommonArea.objects.create(
+            name='Salón Social', area_type='salon_social', location='Torre A', capacity=50,
+            start_time=time(8, 0), end_time=time(22, 0), usage_rules='Sin ruido después de las 22:00'
+        )
+        data = {
+            'common_area_id': area.id, 'property_id': property_obj.id, 'resident_id': resident.id,
+            'date': (date.today() + timedelta(days=7)).isoformat(), 'start_time': '10:00', 'end_time': '12:00',
+        }
+        url = reverse('reservations:reservation-list-create')
+
+        first = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='reserva-1')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        retry = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='reserva-1')
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry[REPLAY_HEADER], 'true')
+        self.assertEqual(retry.data['reservation']['id'], first.data['reservation']['id'])
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_batch_create_runs_once_per_key(self):
+        category = PaymentCategory.objects.create(name='Expensas', type='income')
+        Property.objects.create(house_number='101', block='A', area_m2=80)
+        data = {'category': category.id, 'amount': '100.00', 'concept': 'Expensas Enero', 'period': '2025-01'}
+        url = reverse('transaction-batch-create')
+
+        with mock.patch('apps.billing.views.generate_period_charges', wraps=generate_period_charges) as generate:
+            first = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='lote-1')
+            retry = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='lote-1')
+        self.assertEqual(generate.call_count, 1)
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry[REPLAY_HEADER], 'true')
+        self.assertEqual(retry.data, first.data)
+
+    def test_keys_are_scoped_per_user(self):
+        @api_view(['POST'])
+        @idempotent
+        def view(request):
+            return Response({'user': request.user.username}, status=status.HTTP_201_CREATED)
+
+        other = User.objects.create_user(username='other')
+        responses = [self._call(view, user=user) for user in (self.user, other)]
+        self.assertEqual([response.data['user'] for response in responses], ['testadmin', 'other'])
+        self.assertFalse(any(response.has_header(REPLAY_HEADER) for response in responses))
+
+    def test_server_errors_and_exceptions_are_not_stored(self):
+        """Las respuestas 5xx y las excepciones no se guardan: el reintento vuelve a ejecutar la vista"""
+        outcomes = [
+            Response({'error': 'Servicio no disponible'}, status=status.HTTP_503_SERVICE_UNAVAILABLE),
+            RuntimeError('caída'),
+            Response({'ok': True}, status=status.HTTP_201_CREATED),
+        ]
+        calls = []
+
+        @api_view(['POST'])
+        @idempotent
+        def view(request):
+            outcome = outcomes[len(calls)]
+            calls.append(outcome)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        self.assertEqual(self._call(view).status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        with self.assertRaises(RuntimeError):
+            self._call(view)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        response = self._call(view)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(response.has_header(REPLAY_HEADER))
+        self.assertEqual(IdempotencyKey.objects.get().status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(calls), 3)
+
+    def test_expired_key_runs_the_view_again(self):
+        calls = []
+
+        @api_view(['POST'])
+        @idempotent
+        def view(request):
+            calls.append(request)
+            return Response({'call': len(calls)}, status=status.HTTP_201_CREATED)
+
+        self._call(view)
+        self.assertEqual(self._call(view)[REPLAY_HEADER], 'true')
+
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        response = self._call(view)
+        self.assertFalse(response.has_header(REPLAY_HEADER))
+        self.assertEqual(response.data, {'call': 2})
+        self.assertEqual(IdempotencyKey.objects.get().response_body, {'call': 2})
+
+    def test_purge_deletes_only_expired_keys(self):
+        now = timezone.now()
+        IdempotencyKey.objects.create(user=self.user, key='vencida', fingerprint='a', expires_at=now)
+        IdempotencyKey.objects.create(user=self.user, key='vigente', fingerprint='b', expires_at=now + timedelta(hours=1))
+
+        call_command('purge_idempotency_keys', batch_size=1, stdout=mock.Mock())
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ['vigente'])
@@ -0,0 +1,47 @@
+from datetime import date, timedelta
+
+from django.db.models import Count, Q
+
+from .models import Property
+
+MAX_HISTORY_MONTHS = 36
+
+
+def month_periods(date_from, date_to):
+    """Primer y último día de cada mes entre ambas fechas (inclusive)"""
+    periods = []
+    current = date(date_from.year, date_from.month, 1)
+    while current <= date_to:
+        next_month = date(current.year + current.month // 12, current.month % 12 + 1, 1)
+        periods.append((current, next_month - timedelta(days=1)))
+        current = next_month
+    return periods
+
+
+def compute_monthly_occupancy(date_from, date_to, block=None):
+    """Ocupación mensual por bloque con una sola agregación condicional en SQL"""
+    periods = month_periods(date_from, date_to)
+
+    counters = {'total_units': Count('id', distinct=True)}
+    for index, (month_start, month_end) in enumerate(periods):
+        lived_in_month = Q(residents__move_in_date__lte=month_end) & (
+            Q(residents__move_out_date__isnull=True) | Q(residents__move_out_date__gte=month_start)
+        )
+        counters[f'units_{index}'] = Count('id', filter=lived_in_month, distinct=True)
+        counters[f'residents_{index}'] = Count('residents__resident', filter=lived_in_month, distinct=True)
+
+    properties = Property.objects.order_by()
+    if block:
+        properties = properties.filter(block=block)
+    rows = properties.values('block').annotate(**counters).order_by('block')
+
+    return [{
+        'block': row['block'],
+        'total_units': row['total_units'],
+        'months': [{
+            'month': month_start.strftime('%Y-%m'),
+            'occupied_units': row[f'units_{index}'],
+            'residents': row[f'residents_{index}'],
+            'occupancy_rate': round(row[f'units_{index}'] * 100 / row['total_units'], 2) if row['total_units'] else 0
+        } for index, (month_start, _) in enumerate(periods)]
+    } for row in rows]
@@ -0,0 +1,155 @@
+"""Importación masiva de propiedades desde CSV.
+
+El archivo se lee en streaming y se procesa por lotes: cada lote se valida
+fila por fila, verifica house_number y residentes con una consulta por lote y
+se inserta con ``bulk_create``. Todo el archivo va en una sola transacción: si
+no se puede leer hasta el final no queda nada importado; las filas inválidas
+se reportan y el resto se importa.
+"""
+import csv
+import io
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .models import Property, PropertyResident
+from .serializers import PropertyImportRowSerializer
+from .services import sync_house_identifiers, sync_property_occupancy
+from .stats import invalidate_property_stats
+
+IMPORT_CHUNK_SIZE = 500
+RESIDENT_FIELDS = ('resident_id', 'relationship', 'is_primary_resident')
+DEFAULT_RELATIONSHIP = 'Residente'
+
+
+def _clean_row(row):
+    """Quitar espacios y columnas vacías para que apliquen los valores por defecto"""
+    return {
+        key.strip(): value.strip()
+        for key, value in row.items()
+        if key and value is not None and value.strip() != ''
+    }
+
+
+def _new_property(data):
+    property_obj = Property(**{key: value for key, value in data.items() if key not in RESIDENT_FIELDS})
+    # Una casa importada con residente se crea ocupada
+    if data.get('resident_id') and property_obj.status == 'available':
+        property_obj.status = 'occupied'
+    return property_obj
+
+
+def _import_chunk(rows, seen_house_numbers, seen_resident_ids, batch_size):
+    """Validar e insertar un lote de filas ``(numero_fila, datos)``"""
+    errors = []
+    valid_rows = []
+    
+    for row_number, row in rows:
+        serializer = PropertyImportRowSerializer(data=_clean_row(row))
+        if not serializer.is_valid():
+            errors.append({'row': row_number, 'errors': serializer.errors})
+            continue
+        
+        house_number = serializer.validated_data['house_number']
+        if house_number in seen_house_numbers:
+            errors.append({
+                'row': row_number,
+                'errors': {'house_number': ['Número de casa duplicado en el archivo']}
+            })
+            continue
+        
+        seen_house_numbers.add(house_number)
+        valid_rows.append((row_number, serializer.validated_data))
+    
+    # Una sola consulta por lote para unicidad y para validar residentes
+    existing_numbers = set(Property.objects.filter(
+        house_number__in=[data['house_number'] for _, data in valid_rows]
+    ).values_list('house_number', flat=True))
+    resident_ids = {data['resident_id'] for _, data in valid_rows if data.get('resident_id')}
+    valid_resident_ids = set(User.objects.filter(
+        id__in=resident_ids, profile__user_type='resident'
+    ).values_list('id', flat=True)) if resident_ids else set()
+    # Residentes que ya viven en otra propiedad
+    housed_resident_ids = set(PropertyResident.objects.filter(
+        resident_id__in=resident_ids, is_active=True
+    ).values_list('resident_id', flat=True)) if resident_ids else set()
+    
+    to_create = []
+    for row_number, data in valid_rows:
+        if data['house_number'] in existing_numbers:
+            errors.append({
+                'row': row_number,
+                'errors': {'house_number': ['Ya existe una propiedad con este número de casa']}
+            })
+            continue
+        resident_id = data.get('resident_id')
+        if resident_id:
+            resident_error = None
+            if resident_id not in valid_resident_ids:
+                resident_error = 'El usuario no existe o no es de tipo residente'
+            elif resident_id in housed_resident_ids:
+                resident_error = 'El residente ya está asignado a otra propiedad'
+            elif resident_id in seen_resident_ids:
+                resident_error = 'El residente aparece más de una vez en el archivo'
+            if resident_error:
+                errors.append({'row': row_number, 'errors': {'resident_id': [resident_error]}})
+                continue
+            seen_resident_ids.add(resident_id)
+        to_create.append(data)
+    
+    properties = Property.objects.bulk_create([
+        _new_property(data) for data in to_create
+    ], batch_size=batch_size)
+    
+    residents = [
+        PropertyResident(
+            property=property_obj,
+            resident_id=data['resident_id'],
+            relationship=data.get('relationship') or DEFAULT_RELATIONSHIP,
+            is_primary_resident=data.get('is_primary_resident', False)
+        )
+        for property_obj, data in zip(properties, to_create)
+        if data.get('resident_id')
+    ]
+    PropertyResident.objects.bulk_create(residents, batch_size=batch_size)
+    sync_property_occupancy([resident.property_id for resident in residents], batch_size=batch_size)
+    sync_house_identifiers([resident.resident_id for resident in residents], batch_size=batch_size)
+    
+    return len(properties), len(residents), errors
+
+
+def import_properties_csv(uploaded_file, chunk_size=IMPORT_CHUNK_SIZE):
+    """Importar propiedades (y opcionalmente residentes) desde un CSV subido"""
+    text_stream = io.TextIOWrapper(uploaded_file.file, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(text_stream)
+    # La fila 1 es el encabezado
+    numbered_rows = enumerate(reader, start=2)
+    
+    seen_house_numbers = set()
+    seen_resident_ids = set()
+    result = {'processed_rows': 0, 'created': 0, 'residents_assigned': 0, 'errors': []}
+    
+    try:
+        # Un error de lectura a mitad del archivo deshace los lotes anteriores
+        with transaction.atomic():
+            while True:
+                chunk = list(islice(numbered_rows, chunk_size))
+                if not chunk:
+                    break
+                
+                created, residents_assigned, errors = _import_chunk(
+                    chunk, seen_house_numbers, seen_resident_ids, chunk_size
+                )
+                result['processed_rows'] += len(chunk)
+                result['created'] += created
+                result['residents_assigned'] += residents_assigned
+                result['errors'].extend(errors)
+    finally:
+        # Evitar que cerrar el wrapper cierre el archivo subido
+        text_stream.detach()
+    
+    if result['created']:
+        transaction.on_commit(invalidate_property_stats)
+    
+    return result
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from apps.properties.services import sync_house_identifiers
+from apps.users.models import ResidentProfile
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el house_identifier de todos los residentes a partir de propietarios y residencias activas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        processed = 0
+        updated = 0
+
+        while True:
+            batch = list(
+                ResidentProfile.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', 'user_profile__user_id')[:batch_size]
+            )
+            if not batch:
+                break
+
+            last_id = batch[-1][0]
+            processed += len(batch)
+            updated += sync_house_identifiers([user_id for _, user_id in batch], batch_size=batch_size)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{processed} perfiles revisados, {updated} identificadores actualizados.'
+        ))
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_occupancy(apps, schema_editor):
+    Property = apps.get_model('properties', 'Property')
+    PropertyResident = apps.get_model('properties', 'PropertyResident')
+    PropertyOccupancy = apps.get_model('properties', 'PropertyOccupancy')
+    
+    rows = {
+        (property_id, owner_id, 'owner')
+        for property_id, owner_id in Property.objects.filter(
+            owner__isnull=False
+        ).values_list('id', 'owner_id').iterator()
+    }
+    rows.update(
+        (property_id, resident_id, 'resident')
+        for property_id, resident_id in PropertyResident.objects.filter(
+            is_active=True
+        ).values_list('property_id', 'resident_id').iterator()
+    )
+    PropertyOccupancy.objects.bulk_create(
+        [PropertyOccupancy(property_id=p, user_id=u, role=r) for p, u, r in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('owner', 'Propietario'), ('resident', 'Residente')], max_length=20, verbose_name='Rol')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Activo')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Creado')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Actualizado')),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancies', to='properties.property')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancies', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Ocupación de Propiedad',
+                'verbose_name_plural': 'Ocupaciones de Propiedades',
+                'db_table': 'property_occupancy',
+                'indexes': [models.Index(fields=['user', 'is_active', 'property'], name='occupancy_user_idx'), models.Index(fields=['property', 'is_active', 'user'], name='occupancy_property_idx')],
+                'constraints': [models.UniqueConstraint(fields=('property', 'user', 'role'), name='unique_property_occupancy')],
+            },
+        ),
+        migrations.RunPython(backfill_occupancy, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+PERIOD_INDEX = 'property_residents_period_gist'
+
+
+def create_period_index(apps, schema_editor):
+    # El índice GiST sobre daterange solo existe en PostgreSQL
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {PERIOD_INDEX} ON property_residents "
+        "USING gist (daterange(LEAST(move_in_date, move_out_date), move_out_date, '[]'))"
+    )
+
+
+def drop_period_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {PERIOD_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0002_property_occupancy'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='propertyresident',
+            index=models.Index(fields=['property', 'move_in_date'], name='resident_property_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='propertyresident',
+            index=models.Index(fields=['resident', 'move_in_date'], name='resident_user_period_idx'),
+        ),
+        migrations.RunPython(create_period_index, drop_period_index),
+    ]
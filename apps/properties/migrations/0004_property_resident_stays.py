@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0003_residency_history_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='propertyresident',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='propertyresident',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('property', 'resident'), name='unique_active_property_resident'),
+        ),
+    ]
@@ -1,7 +1,60 @@
-from django.db import models
+from django.db import models, connections
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+class PropertyQuerySet(models.QuerySet):
+    """Consultas reutilizables para propiedades"""
+    
+    def with_active_residents(self):
+        """Precargar residentes activos en ``active_residents`` y anotar su conteo"""
+        active_residents = PropertyResident.objects.filter(is_active=True).select_related('resident')
+        return self.select_related('owner').prefetch_related(
+            models.Prefetch('residents', queryset=active_residents, to_attr='active_residents')
+        ).annotate(
+            active_residents_count=models.Count('residents', filter=models.Q(residents__is_active=True))
+        )
+
+
+class PropertyResidentQuerySet(models.QuerySet):
+    """Consultas de historial de residencia por rango de fechas
+    
+    En PostgreSQL se filtra sobre el ``daterange`` de ingreso/salida para
+    aprovechar el índice GiST de la migración; en otros motores se usan
+    comparaciones equivalentes sobre el índice btree (property, move_in_date).
+    """
+    
+    def _uses_range_index(self):
+        return connections[self.db].vendor == 'postgresql'
+    
+    def _with_period(self):
+        from django.contrib.postgres.fields import DateRangeField
+        
+        # Misma expresión que el índice; LEAST evita rangos inválidos si la salida precede al ingreso
+        lower = models.Func(models.F('move_in_date'), models.F('move_out_date'), function='LEAST')
+        return self.alias(period=models.Func(
+            lower, models.F('move_out_date'), models.Value('[]'),
+            function='daterange', output_field=DateRangeField()
+        ))
+    
+    def active_on(self, day):
+        """Residencias vigentes en la fecha indicada"""
+        if self._uses_range_index():
+            return self._with_period().filter(period__contains=day)
+        return self.filter(move_in_date__lte=day).filter(
+            models.Q(move_out_date__isnull=True) | models.Q(move_out_date__gte=day)
+        )
+    
+    def overlapping(self, date_from, date_to):
+        """Residencias que estuvieron vigentes en algún día del rango (inclusive)"""
+        if self._uses_range_index():
+            from django.db.backends.postgresql.psycopg_any import DateRange
+            
+            return self._with_period().filter(period__overlap=DateRange(date_from, date_to, '[]'))
+        return self.filter(move_in_date__lte=date_to).filter(
+            models.Q(move_out_date__isnull=True) | models.Q(move_out_date__gte=date_from)
+        )
+
+
 class Property(models.Model):
     """Modelo para las casas/propiedades del condominio"""
     
@@ -41,6 +94,8 @@ class Property(models.Model):
     created_at = models.DateTimeField('Creado', auto_now_add=True)
     updated_at = models.DateTimeField('Actualizado', auto_now=True)
     
+    objects = PropertyQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'Propiedad'
         verbose_name_plural = 'Propiedades'
@@ -50,6 +105,31 @@ class Property(models.Model):
     def __str__(self):
         return f"{self.house_number} - Bloque {self.block}"
     
+    # Campos de los que depende el ``house_identifier`` de propietario y residentes
+    IDENTIFIER_FIELDS = ('house_number', 'block', 'floor', 'owner_id')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Valores tal como están en la base, para detectar cambios al guardar
+        if all(name in field_names for name in cls.IDENTIFIER_FIELDS):
+            instance._identifier_state = instance.identifier_state()
+        return instance
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not hasattr(self, '_identifier_state'):
+            # Cargada con only()/defer(): leer el estado guardado antes de sobrescribirlo
+            self._identifier_state = self.stored_identifier_state()
+        super().save(*args, **kwargs)
+    
+    def identifier_state(self):
+        return (self.full_identifier, self.owner_id)
+    
+    def stored_identifier_state(self):
+        """Estado de la fila tal como está guardada (None si no existe)"""
+        stored = Property.objects.filter(pk=self.pk).only('house_number', 'block', 'floor', 'owner').first()
+        return stored.identifier_state() if stored else None
+    
     @property
     def full_identifier(self):
         """Identificador completo de la propiedad"""
@@ -89,11 +169,61 @@ class PropertyResident(models.Model):
     created_at = models.DateTimeField('Creado', auto_now_add=True)
     updated_at = models.DateTimeField('Actualizado', auto_now=True)
     
+    objects = PropertyResidentQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'Residente de Propiedad'
         verbose_name_plural = 'Residentes de Propiedades'
         db_table = 'property_residents'
-        unique_together = ['property', 'resident']
+        constraints = [
+            # Una estadía activa por residente y propiedad; las pasadas se conservan como historial
+            models.UniqueConstraint(
+                fields=['property', 'resident'], condition=models.Q(is_active=True),
+                name='unique_active_property_resident'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['property', 'move_in_date'], name='resident_property_period_idx'),
+            models.Index(fields=['resident', 'move_in_date'], name='resident_user_period_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.resident.get_full_name()} - {self.property.full_identifier}"
+
+
+class PropertyOccupancy(models.Model):
+    """Índice de ocupación: quién vive en qué propiedad y con qué rol
+    
+    Se mantiene sincronizado desde los cambios de propietario y de residentes
+    (ver ``services.sync_property_occupancy``) para resolver consultas de
+    pertenencia sin combinar ``owner`` y ``residents`` con OR y DISTINCT.
+    """
+    
+    ROLE_CHOICES = (
+        ('owner', 'Propietario'),
+        ('resident', 'Residente'),
+    )
+    
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='occupancies')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='occupancies')
+    role = models.CharField('Rol', max_length=20, choices=ROLE_CHOICES)
+    is_active = models.BooleanField('Activo', default=True)
+    
+    # Timestamps
+    created_at = models.DateTimeField('Creado', auto_now_add=True)
+    updated_at = models.DateTimeField('Actualizado', auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Ocupación de Propiedad'
+        verbose_name_plural = 'Ocupaciones de Propiedades'
+        db_table = 'property_occupancy'
+        constraints = [
+            models.UniqueConstraint(fields=['property', 'user', 'role'], name='unique_property_occupancy'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'is_active', 'property'], name='occupancy_user_idx'),
+            models.Index(fields=['property', 'is_active', 'user'], name='occupancy_property_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.resident.get_full_name()} - {self.property.full_identifier}"
\ No newline at end of file
+        return f"{self.user_id} - {self.property_id} ({self.get_role_display()})"
\ No newline at end of file
@@ -104,15 +104,86 @@ class AddResidentToPropertySerializer(serializers.Serializer):
         except User.DoesNotExist:
             raise serializers.ValidationError("Usuario no encontrado")
 
+class PropertyImportRowSerializer(PropertyCreateSerializer):
+    """Serializer para validar una fila del CSV de importación masiva
+    
+    La unicidad de house_number se verifica por lote en el importador, con una
+    sola consulta, en lugar de una consulta por fila.
+    """
+    
+    resident_id = serializers.IntegerField(required=False, allow_null=True)
+    relationship = serializers.CharField(max_length=50, required=False, allow_blank=True)
+    is_primary_resident = serializers.BooleanField(required=False, default=False)
+    
+    class Meta(PropertyCreateSerializer.Meta):
+        fields = PropertyCreateSerializer.Meta.fields + [
+            'resident_id', 'relationship', 'is_primary_resident'
+        ]
+        extra_kwargs = {'house_number': {'validators': []}}
+    
+    def validate_house_number(self, value):
+        return value
+
+class PropertyImportSerializer(serializers.Serializer):
+    """Serializer para el archivo CSV de importación de propiedades"""
+    
+    file = serializers.FileField()
+    
+    def validate_file(self, value):
+        if not value.name.lower().endswith('.csv'):
+            raise serializers.ValidationError("El archivo debe tener extensión .csv")
+        return value
+
+class ResidencyHistoryQuerySerializer(serializers.Serializer):
+    """Filtros del historial de residencia: una fecha puntual o un rango"""
+    
+    property_id = serializers.IntegerField(required=False)
+    resident_id = serializers.IntegerField(required=False)
+    block = serializers.CharField(max_length=50, required=False)
+    date = serializers.DateField(required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    
+    def validate(self, attrs):
+        has_range = 'date_from' in attrs or 'date_to' in attrs
+        if 'date' in attrs and has_range:
+            raise serializers.ValidationError("Use date o date_from/date_to, no ambos")
+        if has_range and not ('date_from' in attrs and 'date_to' in attrs):
+            raise serializers.ValidationError("date_from y date_to son requeridos juntos")
+        if has_range and attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError("date_from debe ser anterior o igual a date_to")
+        return attrs
+
+class MonthlyOccupancyQuerySerializer(serializers.Serializer):
+    """Rango de meses para la ocupación mensual por bloque"""
+    
+    date_from = serializers.DateField()
+    date_to = serializers.DateField()
+    block = serializers.CharField(max_length=50, required=False)
+    
+    def validate(self, attrs):
+        from .history import MAX_HISTORY_MONTHS
+        
+        if attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError("date_from debe ser anterior o igual a date_to")
+        months = (attrs['date_to'].year - attrs['date_from'].year) * 12 + attrs['date_to'].month - attrs['date_from'].month + 1
+        if months > MAX_HISTORY_MONTHS:
+            raise serializers.ValidationError(f"El rango no puede superar {MAX_HISTORY_MONTHS} meses")
+        return attrs
+
 class PropertyWithResidentsSerializer(serializers.ModelSerializer):
-    """Serializer para mostrar propiedades con sus residentes"""
+    """Serializer para mostrar propiedades con sus residentes activos
+    
+    Espera un queryset construido con ``Property.objects.with_active_residents()``
+    para no consultar residentes por cada propiedad.
+    """
     
     owner = UserSerializer(read_only=True)
-    residents = PropertyResidentSerializer(many=True, read_only=True)
+    residents = PropertyResidentSerializer(source='active_residents', many=True, read_only=True)
     owner_name = serializers.ReadOnlyField()
     full_identifier = serializers.ReadOnlyField()
     status_display = serializers.CharField(source='get_status_display', read_only=True)
-    total_residents = serializers.SerializerMethodField()
+    total_residents = serializers.IntegerField(source='active_residents_count', read_only=True)
     
     class Meta:
         model = Property
@@ -121,7 +192,4 @@ class PropertyWithResidentsSerializer(serializers.ModelSerializer):
             'bedrooms', 'bathrooms', 'parking_spaces', 'status', 'status_display',
             'description', 'owner', 'owner_name', 'full_identifier',
             'residents', 'total_residents', 'created_at', 'updated_at'
-        ]
-    
-    def get_total_residents(self, obj):
-        return obj.residents.filter(is_active=True).count()
\ No newline at end of file
+        ]
\ No newline at end of file
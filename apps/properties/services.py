@@ -0,0 +1,239 @@
+"""Servicio central de ocupación.
+
+Todo cambio de propietario o de residentes pasa por aquí para que el
+``house_identifier`` desnormalizado en ``ResidentProfile`` y el índice
+``PropertyOccupancy`` se actualicen en la misma transacción que el cambio de
+ocupación.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
+from django.utils import timezone
+
+from django.contrib.auth.models import User
+
+from apps.users.models import ResidentProfile
+from .models import Property, PropertyResident, PropertyOccupancy
+from .stats import invalidate_property_stats
+
+HOUSE_IDENTIFIER_MAX_LENGTH = ResidentProfile._meta.get_field('house_identifier').max_length
+
+# Se envía tras el commit cuando cambian filas de ``PropertyOccupancy`` (argumento ``property_ids``),
+# incluidos los cambios masivos que no disparan post_save
+occupancy_changed = Signal()
+
+
+def house_property_id(user_ref):
+    """Subconsulta con el id de la casa de ``user_ref``: la que posee o, si no, su residencia activa
+    
+    Entre varias propiedades propias gana la primera registrada; entre
+    residencias, la principal y luego la mudanza más reciente. Es la única
+    regla de "casa del usuario": la usan ``house_identifier``, el listado de
+    residentes para vehículos y el desglose por bloque.
+    """
+    owned = Property.objects.filter(owner=user_ref).order_by('id').values('id')[:1]
+    resided = PropertyResident.objects.filter(resident=user_ref, is_active=True).order_by(
+        '-is_primary_resident', '-move_in_date', '-id'
+    ).values('property_id')[:1]
+    return Coalesce(Subquery(owned), Subquery(resided), output_field=IntegerField())
+
+
+def house_property_field(user_ref, field):
+    """Subconsulta con ``field`` de la casa de ``user_ref`` (ver ``house_property_id``)"""
+    return Subquery(Property.objects.filter(pk=house_property_id(user_ref)).values(field)[:1])
+
+
+def resolve_house_identifiers(user_ids):
+    """Identificador vigente por usuario: la propiedad que posee o, si no, su residencia activa"""
+    houses = dict(User.objects.filter(id__in=user_ids).annotate(
+        house_id=house_property_id(OuterRef('pk'))
+    ).filter(house_id__isnull=False).values_list('id', 'house_id'))
+    properties = Property.objects.only('house_number', 'block', 'floor').in_bulk(set(houses.values()))
+    
+    return {
+        user_id: properties[house_id].full_identifier[:HOUSE_IDENTIFIER_MAX_LENGTH]
+        for user_id, house_id in houses.items()
+    }
+
+
+def sync_house_identifiers(user_ids, batch_size=500):
+    """Recalcular house_identifier de los usuarios indicados; retorna cuántos cambiaron"""
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if not user_ids:
+        return 0
+    
+    identifiers = resolve_house_identifiers(user_ids)
+    profiles = ResidentProfile.objects.filter(
+        user_profile__user_id__in=user_ids
+    ).values_list('id', 'user_profile__user_id', 'house_identifier')
+    
+    now = timezone.now()
+    changed = [
+        ResidentProfile(id=profile_id, house_identifier=identifiers.get(user_id, ''), updated_at=now)
+        for profile_id, user_id, current in profiles
+        if identifiers.get(user_id, '') != current
+    ]
+    ResidentProfile.objects.bulk_update(changed, ['house_identifier', 'updated_at'], batch_size=batch_size)
+    
+    return len(changed)
+
+
+def sync_property_occupancy(property_ids, batch_size=500):
+    """Alinear el índice de ocupación de las propiedades indicadas con propietarios y residentes activos"""
+    property_ids = {property_id for property_id in property_ids if property_id}
+    if not property_ids:
+        return
+    
+    desired = {
+        (property_id, owner_id, 'owner')
+        for property_id, owner_id in Property.objects.filter(
+            id__in=property_ids, owner__isnull=False
+        ).values_list('id', 'owner_id')
+    }
+    desired.update(
+        (property_id, resident_id, 'resident')
+        for property_id, resident_id in PropertyResident.objects.filter(
+            property_id__in=property_ids, is_active=True
+        ).values_list('property_id', 'resident_id')
+    )
+    
+    existing = {
+        (property_id, user_id, role): (occupancy_id, is_active)
+        for occupancy_id, property_id, user_id, role, is_active in PropertyOccupancy.objects.filter(
+            property_id__in=property_ids
+        ).values_list('id', 'property_id', 'user_id', 'role', 'is_active')
+    }
+    
+    to_activate = [occupancy_id for key, (occupancy_id, is_active) in existing.items() if key in desired and not is_active]
+    to_deactivate = [occupancy_id for key, (occupancy_id, is_active) in existing.items() if key not in desired and is_active]
+    to_create = [
+        PropertyOccupancy(property_id=property_id, user_id=user_id, role=role)
+        for property_id, user_id, role in desired - existing.keys()
+    ]
+    
+    now = timezone.now()
+    with transaction.atomic():
+        if to_activate:
+            PropertyOccupancy.objects.filter(id__in=to_activate).update(is_active=True, updated_at=now)
+        if to_deactivate:
+            PropertyOccupancy.objects.filter(id__in=to_deactivate).update(is_active=False, updated_at=now)
+        PropertyOccupancy.objects.bulk_create(to_create, batch_size=batch_size)
+    
+    if to_activate or to_deactivate or to_create:
+        transaction.on_commit(
+            lambda: occupancy_changed.send(sender=PropertyOccupancy, property_ids=property_ids)
+        )
+
+
+def assign_owner(property_obj, owner):
+    """Asignar propietario y marcar la propiedad como ocupada"""
+    # El house_identifier del propietario anterior y del nuevo lo recalcula la señal post_save
+    with transaction.atomic():
+        property_obj.owner = owner
+        property_obj.status = 'occupied'
+        property_obj.save(update_fields=['owner', 'status', 'updated_at'])
+    return property_obj
+
+
+def remove_owner(property_obj):
+    """Quitar el propietario y dejar la propiedad disponible"""
+    with transaction.atomic():
+        property_obj.owner = None
+        property_obj.status = 'available'
+        property_obj.save(update_fields=['owner', 'status', 'updated_at'])
+    return property_obj
+
+
+def add_resident(property_obj, resident, relationship, is_primary_resident=False, move_in_date=None):
+    """Vincular un residente a la propiedad
+    
+    Cada estadía es una fila nueva: volver a una casa no reescribe las fechas
+    de una estadía anterior, que el historial de residencia necesita.
+    """
+    with transaction.atomic():
+        property_resident = PropertyResident.objects.create(
+            property=property_obj,
+            resident=resident,
+            relationship=relationship,
+            is_primary_resident=is_primary_resident,
+            move_in_date=move_in_date or timezone.localdate(),
+        )
+        sync_house_identifiers([resident.id])
+    return property_resident
+
+
+def remove_resident(property_resident):
+    """Desactivar la relación residente-propiedad registrando la fecha de salida"""
+    with transaction.atomic():
+        property_resident.is_active = False
+        property_resident.move_out_date = timezone.localdate()
+        property_resident.save(update_fields=['is_active', 'move_out_date', 'updated_at'])
+        sync_house_identifiers([property_resident.resident_id])
+    return property_resident
+
+
+class ResidentConflictError(Exception):
+    """Otra petición activó la misma asignación residente-propiedad"""
+
+
+def bulk_add_residents(assignments, batch_size=500):
+    """Vincular residentes en lote a partir de dicts con property_id, resident_id y relationship
+    
+    Como en ``add_resident``, cada asignación crea una estadía nueva con
+    ``bulk_create``; retorna las filas creadas. Si otra petición activa la
+    misma asignación a la vez (``unique_active_property_resident``) no se crea
+    ninguna y se levanta ``ResidentConflictError``.
+    """
+    if not assignments:
+        return []
+    
+    today = timezone.localdate()
+    rows = [
+        PropertyResident(
+            property_id=item['property_id'],
+            resident_id=item['resident_id'],
+            relationship=item['relationship'],
+            is_primary_resident=item.get('is_primary_resident', False),
+            move_in_date=item.get('move_in_date') or today,
+        )
+        for item in assignments
+    ]
+    
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                PropertyResident.objects.bulk_create(rows, batch_size=batch_size)
+        except IntegrityError:
+            raise ResidentConflictError('Otra petición asignó alguno de estos residentes')
+        sync_property_occupancy([row.property_id for row in rows], batch_size=batch_size)
+        sync_house_identifiers([row.resident_id for row in rows], batch_size=batch_size)
+        transaction.on_commit(invalidate_property_stats)
+    
+    return rows
+
+
+def bulk_remove_residents(resident_ids, batch_size=500):
+    """Desactivar en lote las residencias activas de los usuarios indicados; retorna las filas afectadas"""
+    assignments = list(PropertyResident.objects.filter(
+        resident_id__in=set(resident_ids), is_active=True
+    ).select_related('property'))
+    if not assignments:
+        return []
+    
+    today = timezone.localdate()
+    now = timezone.now()
+    for assignment in assignments:
+        assignment.is_active = False
+        assignment.move_out_date = today
+        assignment.updated_at = now
+    
+    with transaction.atomic():
+        PropertyResident.objects.bulk_update(
+            assignments, ['is_active', 'move_out_date', 'updated_at'], batch_size=batch_size
+        )
+        sync_property_occupancy([assignment.property_id for assignment in assignments], batch_size=batch_size)
+        sync_house_identifiers([assignment.resident_id for assignment in assignments], batch_size=batch_size)
+        transaction.on_commit(invalidate_property_stats)
+    
+    return assignments
@@ -0,0 +1,64 @@
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from .models import Property, PropertyResident
+from .services import sync_property_occupancy, sync_house_identifiers
+from .stats import invalidate_property_stats
+
+
+@receiver(post_save, sender=Property)
+@receiver(post_delete, sender=Property)
+@receiver(post_save, sender=PropertyResident)
+@receiver(post_delete, sender=PropertyResident)
+def invalidate_stats_on_change(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_property_stats)
+
+
+@receiver(post_save, sender=Property)
+def sync_occupancy_on_property_save(sender, instance, created, update_fields=None, **kwargs):
+    # Solo el propietario afecta la ocupación
+    if created and not instance.owner_id:
+        return
+    if update_fields is not None and 'owner' not in update_fields:
+        return
+    sync_property_occupancy([instance.id])
+
+
+@receiver(post_save, sender=Property)
+def sync_identifiers_on_property_save(sender, instance, created, **kwargs):
+    # Renombrar la casa (número, bloque, piso) o cambiar el propietario desde la edición
+    old = getattr(instance, '_identifier_state', None)
+    new = instance.identifier_state()
+    instance._identifier_state = new
+    if created:
+        sync_house_identifiers([instance.owner_id])
+        return
+    if old is None or old == new:
+        return
+    
+    user_ids = {old[1], new[1]}
+    user_ids.update(instance.residents.filter(is_active=True).values_list('resident_id', flat=True))
+    sync_house_identifiers(user_ids)
+
+
+@receiver(pre_delete, sender=Property)
+def capture_identifier_users_on_property_delete(sender, instance, **kwargs):
+    # Los residentes se borran en cascada antes del post_delete: anotarlos ahora
+    user_ids = set(instance.residents.filter(is_active=True).values_list('resident_id', flat=True))
+    user_ids.add(instance.owner_id)
+    instance._identifier_user_ids = user_ids
+
+
+@receiver(post_delete, sender=Property)
+def sync_identifiers_on_property_delete(sender, instance, **kwargs):
+    sync_house_identifiers(getattr(instance, '_identifier_user_ids', {instance.owner_id}))
+
+
+@receiver(post_save, sender=PropertyResident)
+@receiver(post_delete, sender=PropertyResident)
+def sync_occupancy_on_resident_change(sender, instance, origin=None, **kwargs):
+    # Al borrar la propiedad, su ocupación se elimina en cascada
+    if isinstance(origin, Property) or getattr(origin, 'model', None) is Property:
+        return
+    sync_property_occupancy([instance.property_id])
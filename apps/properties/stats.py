@@ -0,0 +1,72 @@
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from apps.common.cache import cached_snapshot
+from .models import Property, PropertyResident
+
+PROPERTY_STATS_CACHE_KEY = 'properties:stats'
+PROPERTY_STATS_BY_BLOCK_CACHE_KEY = 'properties:stats:by_block'
+
+
+def _property_counters():
+    """Conteos condicionales de propiedades para una sola agregación"""
+    counters = {
+        'total_properties': Count('id'),
+        'with_owner': Count('id', filter=Q(owner__isnull=False)),
+        'without_owner': Count('id', filter=Q(owner__isnull=True)),
+    }
+    for status_code, _ in Property.STATUS_CHOICES:
+        counters[f'status_{status_code}'] = Count('id', filter=Q(status=status_code))
+    return counters
+
+
+def _format_stats(row, total_residents):
+    """Dar a una fila agregada la forma de respuesta del endpoint"""
+    return {
+        'total_properties': row.get('total_properties') or 0,
+        'by_status': {
+            status_code: {
+                'count': row.get(f'status_{status_code}') or 0,
+                'display_name': status_name
+            }
+            for status_code, status_name in Property.STATUS_CHOICES
+        },
+        'with_owner': row.get('with_owner') or 0,
+        'without_owner': row.get('without_owner') or 0,
+        'total_residents': total_residents
+    }
+
+
+def compute_property_stats(by_block=False):
+    """Calcular estadísticas con una agregación sobre propiedades y otra sobre residentes"""
+    counters = _property_counters()
+    active_residents = PropertyResident.objects.filter(is_active=True)
+    
+    if not by_block:
+        totals = Property.objects.aggregate(**counters)
+        return _format_stats(totals, active_residents.count())
+    
+    # La misma agregación agrupada por bloque; los totales se derivan de los grupos
+    block_rows = list(Property.objects.order_by().values('block').annotate(**counters).order_by('block'))
+    residents_by_block = dict(
+        active_residents.order_by().values('property__block').annotate(
+            count=Count('id')
+        ).values_list('property__block', 'count')
+    )
+    
+    totals = {key: sum(row[key] for row in block_rows) for key in counters}
+    stats = _format_stats(totals, sum(residents_by_block.values()))
+    stats['by_block'] = {
+        row['block']: _format_stats(row, residents_by_block.get(row['block'], 0))
+        for row in block_rows
+    }
+    return stats
+
+
+def get_property_stats(by_block=False):
+    cache_key = PROPERTY_STATS_BY_BLOCK_CACHE_KEY if by_block else PROPERTY_STATS_CACHE_KEY
+    return cached_snapshot(cache_key, lambda: compute_property_stats(by_block=by_block))
+
+
+def invalidate_property_stats():
+    cache.delete_many([PROPERTY_STATS_CACHE_KEY, PROPERTY_STATS_BY_BLOCK_CACHE_KEY])
@@ -1,3 +1,234 @@
+from datetime import date
+from unittest import mock
+
+from django.db import connection
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgreSQLWrapper
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.users.models import UserProfile, ResidentProfile
+from .models import Property, PropertyResident, PropertyResidentQuerySet
+from . import services
+from .imports import import_properties_csv
+
+
+class PropertyOccupancyTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='testadmin')
+        self.client.force_authenticate(user=self.admin)
+        self.property = Property.objects.create(house_number='101', block='A', area_m2=100)
+
+    def _resident(self, username):
+        user = User.objects.create_user(username=username)
+        profile = UserProfile.objects.create(user=user, user_type='resident')
+        ResidentProfile.objects.create(user_profile=profile, resident_type='tenant', birth_date=date(1990, 1, 1))
+        return user
+
+    def _house_identifier(self, user):
+        return ResidentProfile.objects.get(user_profile__user=user).house_identifier
+
+    def test_renaming_property_resyncs_house_identifiers(self):
+        owner = self._resident('owner')
+        resident = self._resident('resident')
+        services.assign_owner(self.property, owner)
+        services.add_resident(self.property, resident, 'Familiar')
+        self.assertEqual(self._house_identifier(resident), '101 - Bloque A')
+
+        response = self.client.patch(
+            reverse('properties:property_detail', args=[self.property.id]),
+            {'house_number': '102', 'floor': '1'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._house_identifier(owner), '102 - Bloque A, Piso 1')
+        self.assertEqual(self._house_identifier(resident), '102 - Bloque A, Piso 1')
+
+    def test_owner_change_syncs_identifiers_once(self):
+        """Cambiar el propietario recalcula una sola vez al anterior y al nuevo"""
+        previous = self._resident('previous')
+        owner = self._resident('owner')
+        services.assign_owner(self.property, previous)
+
+        sync = mock.Mock(wraps=services.sync_house_identifiers)
+        with mock.patch('apps.properties.services.sync_house_identifiers', sync), \
+                mock.patch('apps.properties.signals.sync_house_identifiers', sync):
+            services.assign_owner(Property.objects.get(pk=self.property.pk), owner)
+        sync.assert_called_once()
+        self.assertEqual(set(sync.call_args.args[0]), {previous.id, owner.id})
+        self.assertEqual(self._house_identifier(previous), '')
+        self.assertEqual(self._house_identifier(owner), '101 - Bloque A')
+
+        # Cargada con only(): el estado anterior se lee de la base al guardar
+        services.remove_owner(Property.objects.only('id', 'status').get(pk=self.property.pk))
+        self.assertEqual(self._house_identifier(owner), '')
+
+    def test_deleting_property_clears_house_identifiers(self):
+        owner = self._resident('owner')
+        resident = self._resident('resident')
+        services.assign_owner(self.property, owner)
+        services.add_resident(self.property, resident, 'Familiar')
+
+        self.property.delete()
+        self.assertEqual(self._house_identifier(owner), '')
+        self.assertEqual(self._house_identifier(resident), '')
+
+    def test_returning_resident_keeps_previous_stay(self):
+        """Volver a una casa crea una estadía nueva y conserva las fechas de la anterior"""
+        resident = self._resident('resident')
+        first = services.add_resident(self.property, resident, 'Inquilino', move_in_date=date(2024, 1, 1))
+        services.remove_resident(first)
+        second = services.add_resident(self.property, resident, 'Inquilino', move_in_date=date(2025, 6, 1))
+
+        first.refresh_from_db()
+        self.assertNotEqual(first.id, second.id)
+        self.assertFalse(first.is_active)
+        self.assertEqual(first.move_in_date, date(2024, 1, 1))
+        self.assertIsNotNone(first.move_out_date)
+        self.assertEqual(
+            list(self.property.residents.filter(is_active=True).values_list('id', flat=True)), [second.id]
+        )
+
+    def test_import_checks_residents_and_is_all_or_nothing(self):
+        resident = self._resident('resident')
+        housed = self._resident('housed')
+        services.add_resident(self.property, housed, 'Inquilino')
+        # Asignar un residente por separado no cambia el estado de la casa
+        self.property.refresh_from_db()
+        self.assertEqual(self.property.status, 'available')
+
+        header = 'house_number,block,area_m2,resident_id\n'
+        rows = (
+            f'201,B,80,{resident.id}\n'
+            f'202,B,80,{resident.id}\n'
+            f'203,B,80,{housed.id}\n'
+        )
+        result = import_properties_csv(SimpleUploadedFile('p.csv', (header + rows).encode()), chunk_size=2)
+        self.assertEqual(result['created'], 1)
+        self.assertEqual([error['row'] for error in result['errors']], [3, 4])
+        self.assertEqual(Property.objects.get(house_number='201').status, 'occupied')
+
+        # Un archivo ilegible no deja ninguna fila importada
+        broken = header.encode() + b'301,C,80,\n302,C,80,\n303,C,\xff\n'
+        with self.assertRaises(UnicodeDecodeError):
+            import_properties_csv(SimpleUploadedFile('p.csv', broken), chunk_size=2)
+        self.assertFalse(Property.objects.filter(block='C').exists())
+
+
+class ResidencyHistoryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_user(username='testadmin'))
+        self.house_a1 = Property.objects.create(house_number='101', block='A', area_m2=100)
+        Property.objects.create(house_number='102', block='A', area_m2=100)
+        self.house_b1 = Property.objects.create(house_number='201', block='B', area_m2=100)
+
+        self.former = self._stay('former', self.house_a1, date(2024, 1, 10), date(2024, 2, 15))
+        self.current = self._stay('current', self.house_a1, date(2024, 3, 1))
+        self.early = self._stay('early', self.house_b1, date(2023, 12, 1), date(2024, 1, 5))
+
+    def _stay(self, username, property_obj, move_in_date, move_out_date=None):
+        return PropertyResident.objects.create(
+            property=property_obj, resident=User.objects.create_user(username=username),
+            relationship='Inquilino', move_in_date=move_in_date, move_out_date=move_out_date,
+            is_active=move_out_date is None
+        )
+
+    def _history(self, **params):
+        response = self.client.get(reverse('properties:residency_history'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [residency['id'] for residency in response.data['residencies']]
+
+    def test_history_filters_by_date_and_range(self):
+        """Una fecha puntual y un rango incluyen sus extremos"""
+        self.assertEqual(self._history(date='2024-02-15'), [self.former.id])
+        self.assertEqual(self._history(date='2024-02-16'), [])
+        self.assertEqual(
+            self._history(date_from='2024-01-05', date_to='2024-03-01'),
+            [self.former.id, self.current.id, self.early.id]
+        )
+        self.assertEqual(self._history(date_from='2024-01-06', date_to='2024-02-29'), [self.former.id])
+        self.assertEqual(self._history(block='B'), [self.early.id])
+        self.assertEqual(self._history(property_id=self.house_a1.id, date='2024-06-01'), [self.current.id])
+
+    def test_history_rejects_mixed_or_partial_ranges(self):
+        url = reverse('properties:residency_history')
+        for params in (
+            {'date': '2024-01-01', 'date_from': '2024-01-01', 'date_to': '2024-02-01'},
+            {'date_from': '2024-01-01'},
+            {'date_from': '2024-02-01', 'date_to': '2024-01-01'},
+        ):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_history_constant_queries(self):
+        """La cantidad de consultas no crece con el número de estadías"""
+        url = reverse('properties:residency_history')
+        params = {'date_from': '2024-01-01', 'date_to': '2024-12-31'}
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, params)
+        small = len(queries)
+
+        for index in range(10):
+            self._stay(f'extra{index}', self.house_b1, date(2024, 5, 1))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.data['count'], 13)
+        self.assertEqual(len(queries), small)
+
+    def test_range_filters_use_daterange_on_postgresql(self):
+        """En PostgreSQL se filtra por daterange (índice GiST); en otros motores por btree"""
+        postgresql = PostgreSQLWrapper(
+            {**connection.settings_dict, 'ENGINE': 'django.db.backends.postgresql'}, alias='postgresql'
+        )
+        with mock.patch.object(PropertyResidentQuerySet, '_uses_range_index', return_value=True):
+            overlapping, _ = PropertyResident.objects.overlapping(
+                date(2024, 1, 1), date(2024, 1, 31)
+            ).query.get_compiler(connection=postgresql).as_sql()
+            active_on, _ = PropertyResident.objects.active_on(
+                date(2024, 1, 1)
+            ).query.get_compiler(connection=postgresql).as_sql()
+        self.assertIn('daterange(LEAST(', overlapping)
+        self.assertIn(' && ', overlapping)
+        self.assertIn('daterange(LEAST(', active_on)
+        self.assertIn(' @> ', active_on)
+
+        fallback = str(PropertyResident.objects.overlapping(date(2024, 1, 1), date(2024, 1, 31)).query)
+        self.assertNotIn('daterange', fallback)
+        self.assertIn('"move_in_date" <=', fallback)
+
+    def test_monthly_occupancy_buckets_by_block(self):
+        """Cada mes cuenta las casas y residentes con algún día de estadía en él"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('properties:monthly_occupancy'), {'date_from': '2023-12-15', 'date_to': '2024-03-10'}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+
+        blocks = {row['block']: row for row in response.data['blocks']}
+        self.assertEqual(blocks['A']['total_units'], 2)
+        self.assertEqual(
+            [(month['month'], month['occupied_units'], month['residents'], month['occupancy_rate'])
+             for month in blocks['A']['months']],
+            [('2023-12', 0, 0, 0), ('2024-01', 1, 1, 50.0), ('2024-02', 1, 1, 50.0), ('2024-03', 1, 1, 50.0)]
+        )
+        self.assertEqual(
+            [month['occupied_units'] for month in blocks['B']['months']], [1, 1, 0, 0]
+        )
+
+        response = self.client.get(
+            reverse('properties:monthly_occupancy'),
+            {'date_from': '2024-01-01', 'date_to': '2024-01-31', 'block': 'B'}
+        )
+        self.assertEqual([row['block'] for row in response.data['blocks']], ['B'])
 
-# Create your tests here.
+    def test_monthly_occupancy_limits_range(self):
+        response = self.client.get(
+            reverse('properties:monthly_occupancy'), {'date_from': '2021-01-01', 'date_to': '2024-01-31'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -7,6 +7,7 @@ urlpatterns = [
     # CRUD básico de propiedades
     path('', views.PropertyListCreateView.as_view(), name='property_list_create'),
     path('<int:pk>/', views.PropertyDetailView.as_view(), name='property_detail'),
+    path('import/', views.import_properties_view, name='import_properties'),
     
     # Gestión de propietarios
     path('<int:property_id>/assign-owner/', views.assign_owner_view, name='assign_owner'),
@@ -15,6 +16,8 @@ urlpatterns = [
     # Gestión de residentes
     path('<int:property_id>/add-resident/', views.add_resident_to_property_view, name='add_resident'),
     path('with-residents/', views.properties_with_residents_view, name='properties_with_residents'),
+    path('residents/history/', views.residency_history_view, name='residency_history'),
+    path('occupancy/monthly/', views.monthly_occupancy_view, name='monthly_occupancy'),
     
     # Filtros y consultas
     path('status/<str:status_type>/', views.properties_by_status_view, name='properties_by_status'),
@@ -1,10 +1,17 @@
+import csv
+
 from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.pagination import PageNumberPagination
 from django.contrib.auth.models import User
 from django.db.models import Q
 from .models import Property, PropertyResident
+from .stats import get_property_stats
+from .history import compute_monthly_occupancy
+from . import services
+from .imports import import_properties_csv
 from .serializers import (
     PropertyCreateSerializer,
     PropertySerializer,
@@ -12,9 +19,17 @@ from .serializers import (
     AssignOwnerSerializer,
     PropertyResidentSerializer,
     AddResidentToPropertySerializer,
-    PropertyWithResidentsSerializer
+    PropertyWithResidentsSerializer,
+    PropertyImportSerializer,
+    ResidencyHistoryQuerySerializer,
+    MonthlyOccupancyQuerySerializer
 )
 
+class PropertyPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
 class PropertyListCreateView(generics.ListCreateAPIView):
     """Vista para listar todas las propiedades y crear nuevas"""
     queryset = Property.objects.all().select_related('owner')
@@ -95,15 +110,8 @@ def assign_owner_view(request, property_id):
             'error': f'El usuario ya es propietario de la propiedad {existing_property.full_identifier}'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Asignar propietario
-    property_obj.owner = owner
-    property_obj.status = 'occupied'
-    property_obj.save()
-    
-    # Actualizar el identificador de casa en el perfil del residente
-    if hasattr(owner.profile, 'resident_info'):
-        owner.profile.resident_info.house_identifier = property_obj.full_identifier
-        owner.profile.resident_info.save()
+    # Asignar propietario y sincronizar su identificador de casa
+    services.assign_owner(property_obj, owner)
     
     response_serializer = PropertySerializer(property_obj)
     
@@ -117,7 +125,7 @@ def assign_owner_view(request, property_id):
 def remove_owner_view(request, property_id):
     """Remover propietario de una propiedad"""
     try:
-        property_obj = Property.objects.get(id=property_id)
+        property_obj = Property.objects.select_related('owner').get(id=property_id)
     except Property.DoesNotExist:
         return Response({
             'error': 'Propiedad no encontrada'
@@ -128,15 +136,10 @@ def remove_owner_view(request, property_id):
             'error': 'La propiedad no tiene propietario asignado'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Limpiar identificador de casa en el perfil del residente
-    if hasattr(property_obj.owner.profile, 'resident_info'):
-        property_obj.owner.profile.resident_info.house_identifier = ''
-        property_obj.owner.profile.resident_info.save()
-    
     owner_name = property_obj.owner.get_full_name()
-    property_obj.owner = None
-    property_obj.status = 'available'
-    property_obj.save()
+    
+    # Remover propietario y limpiar su identificador de casa
+    services.remove_owner(property_obj)
     
     response_serializer = PropertySerializer(property_obj)
     
@@ -145,6 +148,36 @@ def remove_owner_view(request, property_id):
         'property': response_serializer.data
     })
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def import_properties_view(request):
+    """Importar propiedades de forma masiva desde un archivo CSV
+    
+    Columnas: house_number, block, floor, area_m2, bedrooms, bathrooms,
+    parking_spaces, status, description y, opcionalmente, resident_id,
+    relationship e is_primary_resident para vincular un residente.
+    """
+    serializer = PropertyImportSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    
+    try:
+        result = import_properties_csv(serializer.validated_data['file'])
+    except (UnicodeDecodeError, csv.Error):
+        return Response({
+            'error': 'No se pudo leer el archivo. Verifique que sea un CSV en UTF-8'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if not result['created'] and result['errors']:
+        return Response({
+            'error': 'No se importó ninguna propiedad',
+            **result
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'message': f"Se importaron {result['created']} propiedades",
+        **result
+    }, status=status.HTTP_201_CREATED)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def properties_by_status_view(request, status_type):
@@ -168,13 +201,34 @@ def properties_by_status_view(request, status_type):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def properties_with_residents_view(request):
-    """Obtener todas las propiedades con información de residentes"""
-    properties = Property.objects.all().select_related('owner').prefetch_related('residents__resident')
+    """Obtener todas las propiedades con información de residentes
+    
+    Filtros opcionales: ?block=A. La paginación se activa al enviar ?page=N.
+    """
+    properties = Property.objects.with_active_residents().order_by('block', 'house_number')
+    
+    block = request.query_params.get('block')
+    if block:
+        properties = properties.filter(block=block)
+    
+    if 'page' in request.query_params:
+        paginator = PropertyPagination()
+        page = paginator.paginate_queryset(properties, request)
+        serializer = PropertyWithResidentsSerializer(page, many=True)
+        
+        return Response({
+            'message': 'Propiedades con residentes obtenidas exitosamente',
+            'count': paginator.page.paginator.count,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'properties': serializer.data
+        })
+    
     serializer = PropertyWithResidentsSerializer(properties, many=True)
     
     return Response({
         'message': 'Propiedades con residentes obtenidas exitosamente',
-        'count': properties.count(),
+        'count': len(serializer.data),
         'properties': serializer.data
     })
 
@@ -201,20 +255,15 @@ def add_resident_to_property_view(request, property_id):
             'error': 'El residente ya está asignado a esta propiedad'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Crear relación residente-propiedad
-    property_resident = PropertyResident.objects.create(
-        property=property_obj,
-        resident=resident,
+    # Crear relación residente-propiedad y actualizar su identificador de casa
+    property_resident = services.add_resident(
+        property_obj,
+        resident,
         relationship=serializer.validated_data['relationship'],
         is_primary_resident=serializer.validated_data.get('is_primary_resident', False),
         move_in_date=serializer.validated_data.get('move_in_date')
     )
     
-    # Actualizar identificador de casa en el perfil del residente
-    if hasattr(resident.profile, 'resident_info'):
-        resident.profile.resident_info.house_identifier = property_obj.full_identifier
-        resident.profile.resident_info.save()
-    
     response_serializer = PropertyResidentSerializer(property_resident)
     
     return Response({
@@ -225,23 +274,71 @@ def add_resident_to_property_view(request, property_id):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def property_stats_view(request):
-    """Obtener estadísticas de propiedades"""
-    total_properties = Property.objects.count()
-    
-    stats = {
-        'total_properties': total_properties,
-        'by_status': {},
-        'with_owner': Property.objects.filter(owner__isnull=False).count(),
-        'without_owner': Property.objects.filter(owner__isnull=True).count(),
-        'total_residents': PropertyResident.objects.filter(is_active=True).count()
-    }
-    
-    # Contar por estado
-    for status_code, status_name in Property.STATUS_CHOICES:
-        count = Property.objects.filter(status=status_code).count()
-        stats['by_status'][status_code] = {
-            'count': count,
-            'display_name': status_name
-        }
-    
-    return Response(stats)
\ No newline at end of file
+    """Obtener estadísticas de propiedades (opcionalmente por bloque con ?by_block=true)"""
+    by_block = request.query_params.get('by_block') == 'true'
+    
+    return Response(get_property_stats(by_block=by_block))
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def residency_history_view(request):
+    """Historial de residencia
+    
+    Filtros: ?property_id=, ?resident_id=, ?block= y ?date=YYYY-MM-DD (quién vivía
+    en esa fecha) o ?date_from=&date_to= (quién vivió en algún día del rango).
+    La paginación se activa al enviar ?page=N.
+    """
+    filters = ResidencyHistoryQuerySerializer(data=request.query_params)
+    filters.is_valid(raise_exception=True)
+    params = filters.validated_data
+    
+    residencies = PropertyResident.objects.select_related('property', 'resident')
+    if 'property_id' in params:
+        residencies = residencies.filter(property_id=params['property_id'])
+    if 'resident_id' in params:
+        residencies = residencies.filter(resident_id=params['resident_id'])
+    if 'block' in params:
+        residencies = residencies.filter(property__block=params['block'])
+    if 'date' in params:
+        residencies = residencies.active_on(params['date'])
+    elif 'date_from' in params:
+        residencies = residencies.overlapping(params['date_from'], params['date_to'])
+    residencies = residencies.order_by('property__block', 'property__house_number', 'move_in_date', 'id')
+    
+    if 'page' in request.query_params:
+        paginator = PropertyPagination()
+        page = paginator.paginate_queryset(residencies, request)
+        serializer = PropertyResidentSerializer(page, many=True)
+        
+        return Response({
+            'message': 'Historial de residencia obtenido exitosamente',
+            'count': paginator.page.paginator.count,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'residencies': serializer.data
+        })
+    
+    serializer = PropertyResidentSerializer(residencies, many=True)
+    
+    return Response({
+        'message': 'Historial de residencia obtenido exitosamente',
+        'count': len(serializer.data),
+        'residencies': serializer.data
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def monthly_occupancy_view(request):
+    """Ocupación mensual por bloque (?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD&block=)"""
+    filters = MonthlyOccupancyQuerySerializer(data=request.query_params)
+    filters.is_valid(raise_exception=True)
+    params = filters.validated_data
+    
+    blocks = compute_monthly_occupancy(params['date_from'], params['date_to'], block=params.get('block'))
+    
+    return Response({
+        'message': 'Ocupación mensual obtenida exitosamente',
+        'date_from': params['date_from'],
+        'date_to': params['date_to'],
+        'blocks': blocks
+    })
@@ -0,0 +1,149 @@
+# apps/reservations/analytics.py
+import time
+from datetime import datetime, date
+
+from django.core.cache import cache
+from django.db.models import Sum
+from django.db.models.functions import ExtractWeekDay
+
+from apps.common.cache import cached_snapshot
+from apps.common_areas.models import CommonArea
+from .models import AreaUsageRollup
+
+UTILIZATION_CACHE_TIMEOUT = 60 * 60  # 1 hora
+
+# ExtractWeekDay devuelve 1 (domingo) a 7 (sábado)
+WEEKDAY_NAMES = {
+    1: 'Domingo',
+    2: 'Lunes',
+    3: 'Martes',
+    4: 'Miércoles',
+    5: 'Jueves',
+    6: 'Viernes',
+    7: 'Sábado',
+}
+
+
+def _version_key(common_area_id):
+    return f"reservations:utilization:version:{common_area_id or 'all'}"
+
+
+def _get_version(common_area_id):
+    return cache.get_or_set(_version_key(common_area_id), time.time_ns(), None)
+
+
+def invalidate_utilization_cache(common_area_id):
+    """Invalidar los reportes cacheados del área y el reporte general"""
+    new_version = time.time_ns()
+    cache.set_many({
+        _version_key(common_area_id): new_version,
+        _version_key(None): new_version,
+    }, None)
+
+
+def _opening_minutes_per_day(area):
+    """Minutos de apertura diaria, considerando horarios que cruzan medianoche"""
+    start = datetime.combine(date.today(), area.start_time)
+    end = datetime.combine(date.today(), area.end_time)
+    minutes = (end - start).total_seconds() / 60
+    if minutes <= 0:
+        minutes += 24 * 60
+    return minutes
+
+
+def _percentage(part, total):
+    return round(part / total * 100, 2) if total else 0
+
+
+def compute_area_utilization(date_from, date_to, common_area_id=None):
+    """Calcular la utilización por área a partir del resumen diario"""
+    areas = CommonArea.objects.all()
+    rollups = AreaUsageRollup.objects.filter(date__gte=date_from, date__lte=date_to)
+    
+    if common_area_id:
+        areas = areas.filter(id=common_area_id)
+        rollups = rollups.filter(common_area_id=common_area_id)
+    
+    totals = rollups.values('common_area_id').annotate(
+        reservations=Sum('reservations_count'),
+        cancelled=Sum('cancelled_count'),
+        booked=Sum('booked_minutes'),
+    )
+    by_hour = rollups.values('common_area_id', 'hour').annotate(
+        reservations=Sum('reservations_count'),
+        booked=Sum('booked_minutes'),
+    ).order_by('hour')
+    by_weekday = rollups.annotate(
+        weekday=ExtractWeekDay('date')
+    ).values('common_area_id', 'weekday').annotate(
+        reservations=Sum('reservations_count'),
+        booked=Sum('booked_minutes'),
+    ).order_by('weekday')
+    
+    totals_by_area = {row['common_area_id']: row for row in totals}
+    hours_by_area = {}
+    for row in by_hour:
+        hours_by_area.setdefault(row['common_area_id'], []).append({
+            'hour': row['hour'],
+            'reservations': row['reservations'],
+            'booked_hours': round(row['booked'] / 60, 2),
+        })
+    weekdays_by_area = {}
+    for row in by_weekday:
+        weekdays_by_area.setdefault(row['common_area_id'], []).append({
+            'weekday': row['weekday'],
+            'display': WEEKDAY_NAMES[row['weekday']],
+            'reservations': row['reservations'],
+            'booked_hours': round(row['booked'] / 60, 2),
+        })
+    
+    days = (date_to - date_from).days + 1
+    areas_data = []
+    for area in areas:
+        area_totals = totals_by_area.get(area.id, {})
+        total_reservations = area_totals.get('reservations') or 0
+        cancelled = area_totals.get('cancelled') or 0
+        booked_minutes = area_totals.get('booked') or 0
+        open_minutes = _opening_minutes_per_day(area) * days
+        hours = hours_by_area.get(area.id, [])
+        weekdays = weekdays_by_area.get(area.id, [])
+        
+        areas_data.append({
+            'id': area.id,
+            'name': area.name,
+            'area_type': area.area_type,
+            'open_hours': round(open_minutes / 60, 2),
+            'booked_hours': round(booked_minutes / 60, 2),
+            'utilization_percentage': _percentage(booked_minutes, open_minutes),
+            'total_reservations': total_reservations,
+            'cancelled_reservations': cancelled,
+            'cancellation_rate': _percentage(cancelled, total_reservations),
+            'peak_hour': max(hours, key=lambda h: h['booked_hours'])['hour'] if hours else None,
+            'peak_weekday': max(weekdays, key=lambda w: w['booked_hours'])['display'] if weekdays else None,
+            'by_hour': hours,
+            'by_weekday': weekdays,
+        })
+    
+    return {
+        'date_range': {
+            'start': date_from.strftime('%Y-%m-%d'),
+            'end': date_to.strftime('%Y-%m-%d'),
+            'days': days,
+        },
+        'areas': areas_data,
+    }
+
+
+def get_area_utilization(date_from, date_to, common_area_id=None):
+    """Reporte de utilización cacheado por (área, rango)"""
+    cache_key = "reservations:utilization:{}:{}:{}:{}".format(
+        common_area_id or 'all',
+        date_from.isoformat(),
+        date_to.isoformat(),
+        _get_version(common_area_id),
+    )
+    return cached_snapshot(
+        cache_key,
+        lambda: compute_area_utilization(date_from, date_to, common_area_id),
+        UTILIZATION_CACHE_TIMEOUT,
+    )
@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.reservations.models import AreaUsageRollup
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el resumen diario de uso de áreas comunes a partir de las reservas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--area-id', type=int, help='Limitar a un área común')
+        parser.add_argument('--date-from', help='Fecha inicial (YYYY-MM-DD)')
+        parser.add_argument('--date-to', help='Fecha final (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        try:
+            date_from = self._parse_date(options['date_from'])
+            date_to = self._parse_date(options['date_to'])
+        except ValueError:
+            raise CommandError('Formato de fecha inválido. Use YYYY-MM-DD')
+
+        created = AreaUsageRollup.rebuild(
+            common_area_id=options['area_id'],
+            date_from=date_from,
+            date_to=date_to,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Se generaron {created} registros de resumen.'))
+
+    def _parse_date(self, value):
+        return datetime.strptime(value, '%Y-%m-%d').date() if value else None
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common_areas', '0001_initial'),
+        ('reservations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AreaUsageRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Fecha')),
+                ('hour', models.PositiveSmallIntegerField(verbose_name='Hora de Inicio')),
+                ('reservations_count', models.PositiveIntegerField(default=0, verbose_name='Reservas')),
+                ('cancelled_count', models.PositiveIntegerField(default=0, verbose_name='Cancelaciones')),
+                ('booked_minutes', models.PositiveIntegerField(default=0, verbose_name='Minutos Reservados')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('common_area', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usage_rollups', to='common_areas.commonarea', verbose_name='Área Común')),
+            ],
+            options={
+                'verbose_name': 'Resumen de Uso de Área',
+                'verbose_name_plural': 'Resúmenes de Uso de Áreas',
+                'db_table': 'area_usage_rollups',
+                'indexes': [models.Index(fields=['common_area', 'date'], name='area_usage__common__74ec95_idx'), models.Index(fields=['date'], name='area_usage__date_41bf17_idx')],
+                'constraints': [models.UniqueConstraint(fields=('common_area', 'date', 'hour'), name='unique_area_usage_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0002_area_usage_rollup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='areausagerollup',
+            name='hour',
+            field=models.PositiveSmallIntegerField(verbose_name='Hora'),
+        ),
+    ]
@@ -1,5 +1,9 @@
 # apps/reservations/models.py
-from django.db import models
+from collections import defaultdict
+
+from django.db import connection, models, transaction
+from django.db.models import F, Case, When, Value
+from django.db.models.functions import ExtractHour, ExtractMinute
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.utils import timezone
@@ -7,7 +11,7 @@ from datetime import datetime, time, timedelta, date
 
 # Importar modelos existentes
 from apps.common_areas.models import CommonArea
-from apps.properties.models import Property, PropertyResident
+from apps.properties.models import Property, PropertyOccupancy
 
 class ReservationStatus(models.TextChoices):
     PENDING = 'pending', 'Pendiente'
@@ -92,17 +96,14 @@ class Reservation(models.Model):
         
         # Validar que el residente pertenezca a la propiedad seleccionada
         if self.resident and self.house_property:
-            # Verificar si el residente es el propietario
-            is_owner = self.house_property.owner == self.resident
-            
-            # O si es residente de la propiedad
-            is_resident = PropertyResident.objects.filter(
+            # Propietario o residente activo, según el índice de ocupación
+            belongs = PropertyOccupancy.objects.filter(
                 property=self.house_property,
-                resident=self.resident,
+                user=self.resident,
                 is_active=True
             ).exists()
             
-            if not (is_owner or is_resident):
+            if not belongs:
                 errors['resident'] = 'El residente seleccionado no pertenece a la propiedad indicada.'
         
         if errors:
@@ -110,8 +111,31 @@ class Reservation(models.Model):
     
     def save(self, *args, **kwargs):
         self.clean()
+        if not self._state.adding and not hasattr(self, '_usage_state'):
+            # Cargada con only()/defer(): leer el aporte guardado antes de sobrescribirlo
+            self._usage_state = self.stored_usage_contribution()
         super().save(*args, **kwargs)
     
+    # Campos que determinan el aporte al resumen de uso
+    USAGE_FIELDS = ('common_area_id', 'date', 'start_time', 'end_time', 'status')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Aporte al resumen tal como está en la base, para aplicar solo la diferencia al guardar
+        if all(name in field_names for name in cls.USAGE_FIELDS):
+            instance._usage_state = instance.usage_contribution()
+        return instance
+    
+    def usage_contribution(self):
+        """{(área, fecha, hora): [reservas, cancelaciones, minutos]} que esta reserva suma al resumen"""
+        return reservation_usage(self.common_area_id, self.date, self.start_time, self.end_time, self.status)
+    
+    def stored_usage_contribution(self):
+        """Aporte de la fila tal como está guardada (vacío si no existe)"""
+        row = Reservation.objects.filter(pk=self.pk).values_list(*self.USAGE_FIELDS).first()
+        return reservation_usage(*row) if row else {}
+    
     @property
     def duration_hours(self):
         """Calcular duración en horas"""
@@ -191,4 +215,180 @@ class Reservation(models.Model):
             
             current_time += timedelta(hours=1)
         
-        return slots
\ No newline at end of file
+        return slots
+
+
+def reservation_usage(common_area_id, day, start_time, end_time, status):
+    """Aporte de una reserva al resumen por hora
+    
+    La reserva y su cancelación cuentan en la hora de inicio; los minutos
+    reservados (si no está cancelada) se reparten entre las horas que abarca.
+    """
+    usage = {}
+    if not (common_area_id and day and start_time and end_time):
+        return usage
+    cancelled = status == ReservationStatus.CANCELLED
+    usage[(common_area_id, day, start_time.hour)] = [1, int(cancelled), 0]
+    if cancelled:
+        return usage
+    
+    start = start_time.hour * 60 + start_time.minute
+    end = end_time.hour * 60 + end_time.minute
+    for hour in range(start_time.hour, (end - 1) // 60 + 1 if end > start else start_time.hour):
+        minutes = min(end, (hour + 1) * 60) - max(start, hour * 60)
+        usage.setdefault((common_area_id, day, hour), [0, 0, 0])[2] += minutes
+    return usage
+
+
+class AreaUsageRollup(models.Model):
+    """Resumen diario de uso de áreas comunes, agrupado por hora.
+
+    Se mantiene de forma incremental desde las señales de ``Reservation``
+    (solo la diferencia de cada reserva, con UPDATE/upsert atómicos) y
+    alimenta el reporte de utilización sin recorrer todas las reservas.
+    """
+    
+    common_area = models.ForeignKey(
+        CommonArea, 
+        on_delete=models.CASCADE, 
+        related_name='usage_rollups',
+        verbose_name="Área Común"
+    )
+    date = models.DateField(verbose_name="Fecha")
+    hour = models.PositiveSmallIntegerField(verbose_name="Hora")
+    
+    # Métricas agregadas
+    reservations_count = models.PositiveIntegerField(default=0, verbose_name="Reservas")
+    cancelled_count = models.PositiveIntegerField(default=0, verbose_name="Cancelaciones")
+    booked_minutes = models.PositiveIntegerField(default=0, verbose_name="Minutos Reservados")
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Resumen de Uso de Área"
+        verbose_name_plural = "Resúmenes de Uso de Áreas"
+        db_table = 'area_usage_rollups'
+        constraints = [
+            models.UniqueConstraint(fields=['common_area', 'date', 'hour'], name='unique_area_usage_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['common_area', 'date']),
+            models.Index(fields=['date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.common_area_id} - {self.date} {self.hour:02d}h ({self.reservations_count})"
+    
+    @classmethod
+    def apply_change(cls, old, new):
+        """Aplicar el paso del aporte ``old`` al ``new`` (ver ``reservation_usage``)"""
+        deltas = defaultdict(lambda: [0, 0, 0])
+        for usage, sign in ((old or {}, -1), (new or {}, 1)):
+            for key, values in usage.items():
+                for index, value in enumerate(values):
+                    deltas[key][index] += sign * value
+        
+        now = timezone.now()
+        for (common_area_id, day, hour), (reservations, cancelled, minutes) in deltas.items():
+            if not (reservations or cancelled or minutes):
+                continue
+            if min(reservations, cancelled, minutes) < 0:
+                # Restar implica que el aporte anterior ya está en la fila
+                cls.objects.filter(common_area_id=common_area_id, date=day, hour=hour).update(
+                    reservations_count=F('reservations_count') + reservations,
+                    cancelled_count=F('cancelled_count') + cancelled,
+                    booked_minutes=F('booked_minutes') + minutes,
+                    updated_at=now,
+                )
+            else:
+                cls._upsert(common_area_id, day, hour, reservations, cancelled, minutes, now)
+    
+    @classmethod
+    def _upsert(cls, common_area_id, day, hour, reservations, cancelled, minutes, now):
+        """Sumar a la fila (área, fecha, hora) creándola si falta, en una sola sentencia"""
+        meta = cls._meta
+        quote = connection.ops.quote_name
+        table = quote(meta.db_table)
+        column = lambda name: quote(meta.get_field(name).column)
+        counters = ['reservations_count', 'cancelled_count', 'booked_minutes']
+        columns = ['common_area', 'date', 'hour', *counters, 'updated_at']
+        
+        updates = ', '.join(
+            f'{column(name)} = {table}.{column(name)} + EXCLUDED.{column(name)}' for name in counters
+        )
+        sql = (
+            f'INSERT INTO {table} ({", ".join(column(name) for name in columns)}) '
+            f'VALUES ({", ".join(["%s"] * len(columns))}) '
+            f'ON CONFLICT ({column("common_area")}, {column("date")}, {column("hour")}) '
+            f'DO UPDATE SET {updates}, {column("updated_at")} = EXCLUDED.{column("updated_at")}'
+        )
+        params = [
+            common_area_id,
+            connection.ops.adapt_datefield_value(day),
+            hour, reservations, cancelled, minutes,
+            connection.ops.adapt_datetimefield_value(now),
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+    
+    @classmethod
+    def rebuild(cls, common_area_id=None, date_from=None, date_to=None):
+        """Recalcular el resumen desde las reservas con el mismo reparto por hora de las señales
+        
+        Un solo ``INSERT ... SELECT``: cada reserva se cruza con la serie de horas
+        del día que abarca y se agrupa por (área, fecha, hora) en la base.
+        """
+        reservations = Reservation.objects.order_by()
+        rollups = cls.objects.all()
+        
+        if common_area_id:
+            reservations = reservations.filter(common_area_id=common_area_id)
+            rollups = rollups.filter(common_area_id=common_area_id)
+        if date_from:
+            reservations = reservations.filter(date__gte=date_from)
+            rollups = rollups.filter(date__gte=date_from)
+        if date_to:
+            reservations = reservations.filter(date__lte=date_to)
+            rollups = rollups.filter(date__lte=date_to)
+        
+        source = reservations.annotate(
+            start_hour=ExtractHour('start_time'),
+            start_minute=ExtractHour('start_time') * 60 + ExtractMinute('start_time'),
+            end_minute=ExtractHour('end_time') * 60 + ExtractMinute('end_time'),
+            cancelled=Case(When(status=ReservationStatus.CANCELLED, then=Value(1)), default=Value(0)),
+        ).values_list('common_area_id', 'date', 'start_hour', 'start_minute', 'end_minute', 'cancelled')
+        source_sql, source_params = source.query.sql_with_params()
+        
+        meta = cls._meta
+        quote = connection.ops.quote_name
+        columns = ', '.join(
+            quote(meta.get_field(name).column) for name in (
+                'common_area', 'date', 'hour',
+                'reservations_count', 'cancelled_count', 'booked_minutes', 'updated_at'
+            )
+        )
+        area, day = quote('common_area_id'), quote('date')
+        hour, start, end = 'hours.column1', 'booking.start_minute', 'booking.end_minute'
+        # Minutos de la reserva dentro de la hora (mínimo/máximo portables entre motores)
+        minutes = (
+            f'CASE WHEN {end} < ({hour} + 1) * 60 THEN {end} ELSE ({hour} + 1) * 60 END'
+            f' - CASE WHEN {start} > {hour} * 60 THEN {start} ELSE {hour} * 60 END'
+        )
+        sql = (
+            f'INSERT INTO {quote(meta.db_table)} ({columns}) '
+            f'SELECT booking.{area}, booking.{day}, {hour}, '
+            f'SUM(CASE WHEN {hour} = booking.start_hour THEN 1 ELSE 0 END), '
+            f'SUM(CASE WHEN {hour} = booking.start_hour THEN booking.cancelled ELSE 0 END), '
+            f'SUM(CASE WHEN booking.cancelled = 0 AND {end} > {start} THEN {minutes} ELSE 0 END), %s '
+            f'FROM ({source_sql}) booking '
+            f'INNER JOIN (VALUES {", ".join(f"({h})" for h in range(24))}) hours '
+            f'ON {hour} = booking.start_hour OR ({hour} > booking.start_hour '
+            f'AND booking.cancelled = 0 AND {hour} * 60 < {end}) '
+            f'GROUP BY booking.{area}, booking.{day}, {hour}'
+        )
+        params = [connection.ops.adapt_datetimefield_value(timezone.now()), *source_params]
+        
+        with transaction.atomic(), connection.cursor() as cursor:
+            rollups.delete()
+            cursor.execute(sql, params)
+            return cursor.rowcount
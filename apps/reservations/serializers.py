@@ -5,7 +5,7 @@ from django.utils import timezone
 from datetime import datetime, date, time
 from .models import Reservation, ReservationStatus
 from apps.common_areas.models import CommonArea
-from apps.properties.models import Property, PropertyResident
+from apps.properties.models import Property, PropertyOccupancy
 from apps.users.models import UserProfile
 
 class CommonAreaForReservationSerializer(serializers.ModelSerializer):
@@ -136,14 +136,13 @@ class CreateReservationSerializer(serializers.ModelSerializer):
             })
         
         # Validar que el residente pertenece a la propiedad
-        is_owner = property_obj.owner == resident
-        is_resident = PropertyResident.objects.filter(
+        belongs = PropertyOccupancy.objects.filter(
             property=property_obj,
-            resident=resident,
+            user=resident,
             is_active=True
         ).exists()
         
-        if not (is_owner or is_resident):
+        if not belongs:
             raise serializers.ValidationError({
                 'resident_id': 'El residente seleccionado no pertenece a la propiedad indicada.'
             })
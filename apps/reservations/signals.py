@@ -0,0 +1,36 @@
+# apps/reservations/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from .models import Reservation, AreaUsageRollup
+from .analytics import invalidate_utilization_cache
+
+
+def _invalidate_areas(*usages):
+    for common_area_id in {key[0] for usage in usages if usage for key in usage}:
+        transaction.on_commit(lambda area_id=common_area_id: invalidate_utilization_cache(area_id))
+
+
+@receiver(post_save, sender=Reservation)
+def update_area_usage_on_save(sender, instance, **kwargs):
+    # Solo la diferencia de esta reserva, dentro de la misma transacción
+    old = getattr(instance, '_usage_state', None)
+    new = instance.usage_contribution()
+    AreaUsageRollup.apply_change(old, new)
+    instance._usage_state = new
+    _invalidate_areas(old, new)
+
+
+@receiver(pre_delete, sender=Reservation)
+def capture_area_usage_on_delete(sender, instance, **kwargs):
+    # Cargada con only()/defer(): leer el aporte mientras la fila todavía existe
+    if not hasattr(instance, '_usage_state'):
+        instance._usage_state = instance.stored_usage_contribution()
+
+
+@receiver(post_delete, sender=Reservation)
+def update_area_usage_on_delete(sender, instance, **kwargs):
+    old = instance._usage_state
+    AreaUsageRollup.apply_change(old, None)
+    _invalidate_areas(old)
@@ -0,0 +1,80 @@
+from datetime import date, time, timedelta
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+
+from apps.common_areas.models import CommonArea
+from apps.properties.models import Property
+from .models import Reservation, ReservationStatus, AreaUsageRollup
+
+
+class AreaUsageRollupTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner')
+        self.property = Property.objects.create(house_number='101', block='A', area_m2=80, owner=self.owner)
+        self.area = CommonArea.objects.create(
+            name='Salón Social', area_type='salon_social', location='Torre A', capacity=50,
+            start_time=time(8, 0), end_time=time(22, 0), usage_rules='Sin ruido después de las 22:00'
+        )
+        self.day = date.today() + timedelta(days=7)
+
+    def _reserve(self, start_time, end_time, **extra):
+        return Reservation.objects.create(
+            common_area=self.area, house_property=self.property, resident=self.owner,
+            created_by=self.owner, date=self.day, start_time=start_time, end_time=end_time, **extra
+        )
+
+    def _rollup(self):
+        return {
+            row.hour: (row.reservations_count, row.cancelled_count, row.booked_minutes)
+            for row in AreaUsageRollup.objects.filter(common_area=self.area, date=self.day)
+        }
+
+    def test_minutes_split_across_hours(self):
+        """La reserva cuenta en su hora de inicio y los minutos se reparten por hora"""
+        self._reserve(time(10, 30), time(12, 15))
+        self.assertEqual(self._rollup(), {10: (1, 0, 30), 11: (0, 0, 60), 12: (0, 0, 15)})
+
+    def test_upsert_adds_to_existing_hour(self):
+        """Dos reservas en la misma hora suman sobre la misma fila"""
+        self._reserve(time(10, 0), time(10, 30))
+        self._reserve(time(10, 30), time(11, 0))
+        self.assertEqual(AreaUsageRollup.objects.count(), 1)
+        self.assertEqual(self._rollup(), {10: (2, 0, 60)})
+
+    def test_update_applies_only_the_difference(self):
+        """Editar o cancelar una reserva aplica solo la diferencia de su aporte"""
+        reservation = self._reserve(time(10, 0), time(11, 0))
+        self._reserve(time(11, 0), time(12, 0))
+
+        reservation = Reservation.objects.get(pk=reservation.pk)
+        reservation.end_time = time(11, 30)
+        reservation.save()
+        self.assertEqual(self._rollup(), {10: (1, 0, 60), 11: (1, 0, 90)})
+
+        reservation.status = ReservationStatus.CANCELLED
+        reservation.save()
+        self.assertEqual(self._rollup(), {10: (1, 1, 0), 11: (1, 0, 60)})
+
+    def test_deferred_load_is_not_counted_twice(self):
+        """Guardar o borrar una reserva cargada con only() lee el aporte guardado"""
+        reservation = self._reserve(time(10, 0), time(11, 0))
+
+        partial = Reservation.objects.only('id', 'notes').get(pk=reservation.pk)
+        partial.notes = 'Cumpleaños'
+        partial.save()
+        self.assertEqual(self._rollup(), {10: (1, 0, 60)})
+
+        Reservation.objects.only('id').get(pk=reservation.pk).delete()
+        self.assertEqual(self._rollup(), {10: (0, 0, 0)})
+
+    def test_rebuild_matches_incremental_rollup(self):
+        """Reconstruir desde las reservas da el mismo resumen que las señales"""
+        self._reserve(time(9, 45), time(11, 10))
+        self._reserve(time(11, 10), time(11, 40))
+        self._reserve(time(14, 0), time(16, 0), status=ReservationStatus.CANCELLED)
+        incremental = self._rollup()
+
+        created = AreaUsageRollup.rebuild(common_area_id=self.area.id)
+        self.assertEqual(created, 4)
+        self.assertEqual(self._rollup(), incremental)
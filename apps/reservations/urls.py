@@ -27,4 +27,5 @@ urlpatterns = [
     # Utilidades
     path('check-availability/', views.check_availability_view, name='check-availability'),
     path('stats/', views.reservation_stats_view, name='reservation-stats'),
+    path('utilization/', views.area_utilization_view, name='area-utilization'),
 ]
\ No newline at end of file
@@ -10,6 +10,7 @@ from django.contrib.auth.models import User
 from datetime import datetime, date, time, timedelta
 
 from .models import Reservation
+from .analytics import get_area_utilization
 from .serializers import (
     ReservationSerializer,
     CreateReservationSerializer,
@@ -22,8 +23,9 @@ from .serializers import (
     ResidentForReservationSerializer
 )
 from apps.common_areas.models import CommonArea
-from apps.properties.models import Property, PropertyResident
+from apps.properties.models import Property, PropertyOccupancy
 from apps.users.models import UserProfile
+from apps.idempotency.decorators import idempotent
 
 class ReservationPagination(PageNumberPagination):
     page_size = 10
@@ -67,13 +69,13 @@ class ReservationListCreateView(generics.ListCreateAPIView):
         # Filtrar por usuario actual si no es admin
         if not self.request.user.is_staff:
             # Mostrar solo reservas del usuario o de sus propiedades
-            user_properties = Property.objects.filter(
-                Q(owner=self.request.user) |
-                Q(residents__resident=self.request.user, residents__is_active=True)
-            )
+            user_properties = PropertyOccupancy.objects.filter(
+                user=self.request.user,
+                is_active=True
+            ).values('property_id')
             queryset = queryset.filter(
                 Q(resident=self.request.user) |
-                Q(property__in=user_properties)
+                Q(house_property_id__in=user_properties)
             )
         
         return queryset.order_by('-date', '-start_time')
@@ -83,6 +85,7 @@ class ReservationListCreateView(generics.ListCreateAPIView):
             return CreateReservationSerializer
         return ReservationSerializer
     
+    @idempotent
     def create(self, request, *args, **kwargs):
         """Crear nueva reserva"""
         serializer = self.get_serializer(data=request.data)
@@ -170,9 +173,8 @@ def available_properties_view(request):
     """Obtener propiedades con propietarios o residentes"""
     # Propiedades que tienen propietario o residentes activos
     properties = Property.objects.filter(
-        Q(owner__isnull=False) |
-        Q(residents__is_active=True)
-    ).distinct().select_related('owner')
+        id__in=PropertyOccupancy.objects.filter(is_active=True).values('property_id')
+    ).select_related('owner')
     
     serializer = PropertyForReservationSerializer(properties, many=True)
     
@@ -192,33 +194,25 @@ def residents_by_property_view(request):
     property_id = serializer.validated_data['property_id']
     property_obj = Property.objects.get(id=property_id)
     
-    # Obtener propietario y residentes
-    residents = []
-    
-    # Agregar propietario si existe
-    if property_obj.owner:
-        residents.append(property_obj.owner)
-    
-    # Agregar residentes activos
-    property_residents = PropertyResident.objects.filter(
+    # Propietario primero y luego residentes activos, en una sola consulta
+    occupancies = PropertyOccupancy.objects.filter(
         property=property_obj,
-        is_active=True
-    ).select_related('resident')
-    
-    for prop_resident in property_residents:
-        if prop_resident.resident not in residents:
-            residents.append(prop_resident.resident)
+        is_active=True,
+        user__profile__user_type='resident'
+    ).select_related('user').order_by('role', 'id')
     
-    # Serializar residentes
+    # Serializar residentes (un usuario puede ser propietario y residente)
     resident_data = []
-    for resident in residents:
-        # Verificar que sea residente
-        if hasattr(resident, 'profile') and resident.profile.user_type == 'resident':
-            resident_data.append({
-                'id': resident.id,
-                'display_name': resident.get_full_name(),
-                'is_owner': resident == property_obj.owner
-            })
+    seen = set()
+    for occupancy in occupancies:
+        if occupancy.user_id in seen:
+            continue
+        seen.add(occupancy.user_id)
+        resident_data.append({
+            'id': occupancy.user_id,
+            'display_name': occupancy.user.get_full_name(),
+            'is_owner': occupancy.user_id == property_obj.owner_id
+        })
     
     return Response({
         'property': {
@@ -265,21 +259,21 @@ def my_reservations_view(request):
     user = request.user
 
     # 1. Identificar propiedades vinculadas al usuario (Dueño o Residente)
-    user_properties = Property.objects.filter(
-        Q(owner=user) |
-        Q(residents__resident=user, residents__is_active=True)
-    )
+    user_properties = PropertyOccupancy.objects.filter(
+        user=user,
+        is_active=True
+    ).values('property_id')
 
     # 2. Hacer una ÚNICA consulta con condiciones OR
     all_reservations = Reservation.objects.filter(
         Q(resident=user) | 
-        Q(house_property__in=user_properties)
+        Q(house_property_id__in=user_properties)
     ).select_related(
         'common_area', 
         'house_property', 
         'resident', 
         'created_by'
-    ).order_by('-date', '-start_time').distinct()
+    ).order_by('-date', '-start_time')
     
     # 3. Serializar y responder
     serializer = ReservationSerializer(all_reservations, many=True)
@@ -523,4 +517,44 @@ def check_availability_view(request):
             'end': end_date
         },
         'availability': availability
-    })
\ No newline at end of file
+    })
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def area_utilization_view(request):
+    """Reporte de utilización de áreas comunes en un rango de fechas"""
+    area_id = request.query_params.get('area_id')
+    date_from = request.query_params.get('date_from')
+    date_to = request.query_params.get('date_to')
+    
+    if not all([date_from, date_to]):
+        return Response({
+            'error': 'Parámetros requeridos: date_from, date_to (formato: YYYY-MM-DD)'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        date_from_obj = datetime.strptime(date_from, '%Y-%m-%d').date()
+        date_to_obj = datetime.strptime(date_to, '%Y-%m-%d').date()
+    except ValueError:
+        return Response({
+            'error': 'Formato de fecha inválido. Use YYYY-MM-DD'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if date_from_obj > date_to_obj:
+        return Response({
+            'error': 'date_from debe ser anterior o igual a date_to'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if area_id:
+        try:
+            area_id = int(area_id)
+        except ValueError:
+            area_id = None
+        if not area_id or not CommonArea.objects.filter(id=area_id).exists():
+            return Response({
+                'error': 'Área común no encontrada'
+            }, status=status.HTTP_404_NOT_FOUND)
+    
+    report = get_area_utilization(date_from_obj, date_to_obj, area_id)
+    
+    return Response(report)
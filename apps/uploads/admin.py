@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import UploadJob
+
+
+@admin.register(UploadJob)
+class UploadJobAdmin(admin.ModelAdmin):
+    list_display = ('original_name', 'processor', 'status', 'attempts', 'spool_host', 'created_by', 'created_at')
+    list_filter = ('status', 'processor', 'spool_host')
+    search_fields = ('original_name', 'result_name', 'created_by__username')
+    readonly_fields = ('created_at', 'updated_at', 'completed_at')
@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.uploads.queue import sweep_spool
+
+
+class Command(BaseCommand):
+    help = 'Borra del spool de subidas los archivos huérfanos y los de subidas fallidas antiguas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orphan-hours', type=float, default=1, help='Antigüedad mínima de un archivo sin trabajo')
+        parser.add_argument(
+            '--failed-days', type=float, default=settings.UPLOAD_SPOOL_RETENTION_DAYS,
+            help='Días que se conserva el archivo de una subida fallida'
+        )
+
+    def handle(self, *args, **options):
+        orphans, failed = sweep_spool(
+            orphan_age=timedelta(hours=options['orphan_hours']),
+            failed_age=timedelta(days=options['failed_days']),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Archivos borrados del spool: {orphans} huérfanos, {failed} de subidas fallidas'
+        ))
@@ -0,0 +1,34 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from apps.uploads.queue import due_job_ids, run_job
+
+
+class Command(BaseCommand):
+    help = 'Procesa la cola de subidas diferidas (reintentos incluidos) con un pool de workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Hilos que suben en paralelo')
+        parser.add_argument('--batch-size', type=int, default=50, help='Trabajos reclamados por vuelta')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Segundos de espera cuando no hay trabajos')
+        parser.add_argument('--once', action='store_true', help='Procesar lo pendiente una vez y salir')
+
+    def handle(self, *args, **options):
+        processed = succeeded = 0
+        with ThreadPoolExecutor(max_workers=options['workers'], thread_name_prefix='uploads') as executor:
+            while True:
+                job_ids = due_job_ids(options['batch_size'])
+                results = [result for result in executor.map(run_job, job_ids)]
+                processed += len(job_ids)
+                succeeded += sum(1 for result in results if result)
+
+                if options['once'] and len(job_ids) < options['batch_size']:
+                    break
+                if not job_ids:
+                    time.sleep(options['poll_interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Subidas procesadas: {processed} (completadas: {succeeded})'
+        ))
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:27
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('app_label', models.CharField(max_length=100, verbose_name='App')),
+                ('model_name', models.CharField(max_length=100, verbose_name='Modelo')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='ID del objeto')),
+                ('field_name', models.CharField(max_length=100, verbose_name='Campo')),
+                ('processor', models.CharField(default='file', max_length=50, verbose_name='Procesador')),
+                ('spool_name', models.CharField(max_length=255, verbose_name='Archivo en spool')),
+                ('original_name', models.CharField(max_length=255, verbose_name='Nombre original')),
+                ('content_type', models.CharField(blank=True, max_length=100, verbose_name='Tipo de contenido')),
+                ('size', models.PositiveIntegerField(default=0, verbose_name='Tamaño (bytes)')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('processing', 'Procesando'), ('done', 'Completada'), ('failed', 'Fallida')], default='pending', max_length=20, verbose_name='Estado')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Intentos')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Próximo intento')),
+                ('last_error', models.TextField(blank=True, verbose_name='Último error')),
+                ('result_name', models.CharField(blank=True, max_length=255, verbose_name='Nombre en storage')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Creado')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Actualizado')),
+                ('completed_at', models.DateTimeField(blank=True, null=True, verbose_name='Completado')),
+            ],
+            options={
+                'verbose_name': 'Subida Pendiente',
+                'verbose_name_plural': 'Subidas Pendientes',
+                'db_table': 'upload_jobs',
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='upload_job_due_idx'), models.Index(fields=['app_label', 'model_name', 'object_id'], name='upload_job_target_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 04:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uploads', '0002_upload_job_created_by'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadjob',
+            name='spool_host',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Host del spool'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# apps/uploads/models.py
+from django.db import models
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+class UploadStatus(models.TextChoices):
+    PENDING = 'pending', 'Pendiente'
+    PROCESSING = 'processing', 'Procesando'
+    DONE = 'done', 'Completada'
+    FAILED = 'failed', 'Fallida'
+
+class UploadJob(models.Model):
+    """Subida diferida: los bytes esperan en el spool local hasta llegar al storage del campo destino"""
+
+    # Destino: campo de archivo de una instancia concreta
+    app_label = models.CharField('App', max_length=100)
+    model_name = models.CharField('Modelo', max_length=100)
+    object_id = models.PositiveBigIntegerField('ID del objeto')
+    field_name = models.CharField('Campo', max_length=100)
+    processor = models.CharField('Procesador', max_length=50, default='file')
+
+    # Archivo en el spool
+    spool_name = models.CharField('Archivo en spool', max_length=255)
+    # Vacío en trabajos anteriores: cualquier host puede tomarlos
+    spool_host = models.CharField('Host del spool', max_length=255, blank=True)
+    original_name = models.CharField('Nombre original', max_length=255)
+    content_type = models.CharField('Tipo de contenido', max_length=100, blank=True)
+    size = models.PositiveIntegerField('Tamaño (bytes)', default=0)
+
+    # Estado y reintentos
+    status = models.CharField('Estado', max_length=20, choices=UploadStatus.choices, default=UploadStatus.PENDING)
+    attempts = models.PositiveIntegerField('Intentos', default=0)
+    next_attempt_at = models.DateTimeField('Próximo intento', default=timezone.now)
+    last_error = models.TextField('Último error', blank=True)
+    result_name = models.CharField('Nombre en storage', max_length=255, blank=True)
+
+    # Quién la encoló: solo esa persona (o el staff) puede consultar su estado
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='upload_jobs',
+        verbose_name='Subido por'
+    )
+
+    # Timestamps
+    created_at = models.DateTimeField('Creado', auto_now_add=True)
+    updated_at = models.DateTimeField('Actualizado', auto_now=True)
+    completed_at = models.DateTimeField('Completado', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Subida Pendiente'
+        verbose_name_plural = 'Subidas Pendientes'
+        db_table = 'upload_jobs'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='upload_job_due_idx'),
+            models.Index(fields=['app_label', 'model_name', 'object_id'], name='upload_job_target_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.app_label}.{self.model_name}#{self.object_id}.{self.field_name} ({self.get_status_display()})"
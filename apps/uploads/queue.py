@@ -0,0 +1,286 @@
+"""Cola durable de subidas diferidas.
+
+La petición guarda los bytes en un spool local y registra un ``UploadJob``;
+un pool de hilos (en el proceso web y/o en ``manage.py process_uploads``)
+los envía al storage del campo destino con reintentos y backoff exponencial.
+En el proceso web un hilo sondea la tabla cada ``UPLOAD_POLL_INTERVAL``
+segundos y reenvía al pool los reintentos vencidos y los trabajos que quedaron
+de un worker reiniciado. Los trabajos se reclaman con un UPDATE condicional,
+así que varios workers pueden convivir sin procesar dos veces el mismo archivo.
+Cada trabajo recuerda el host de su spool y solo ese host lo reclama;
+``manage.py cleanup_upload_spool`` borra los archivos que ya nadie necesita.
+"""
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import UploadJob, UploadStatus
+
+logger = logging.getLogger(__name__)
+
+# Procesador -> función ``(job, data) -> nombre en storage``
+UPLOAD_PROCESSORS = {
+    'file': 'apps.uploads.queue.store_file',
+    'face_photo': 'apps.users.images.process_face_photo_upload',
+}
+
+# Trabajos vencidos que el sondeo reenvía por vuelta
+POLL_BATCH_SIZE = 100
+
+_executor = None
+_executor_lock = threading.Lock()
+_poller = None
+
+
+class PermanentUploadError(Exception):
+    """Error que no se resuelve reintentando (p. ej. el objeto destino ya no existe)"""
+
+
+def _spool_path(spool_name):
+    return os.path.join(settings.UPLOAD_SPOOL_DIR, spool_name)
+
+
+def _remove_spool(spool_name):
+    try:
+        os.remove(_spool_path(spool_name))
+    except FileNotFoundError:
+        pass
+
+
+def _local_jobs():
+    """Trabajos cuyo archivo está en el spool de este host"""
+    return UploadJob.objects.filter(spool_host__in=[settings.UPLOAD_SPOOL_HOST, ''])
+
+
+def _write_spool(data):
+    """Escribir los bytes en el spool de forma atómica y durable"""
+    os.makedirs(settings.UPLOAD_SPOOL_DIR, exist_ok=True)
+    spool_name = uuid.uuid4().hex
+    path = _spool_path(spool_name)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as spool_file:
+        spool_file.write(data)
+        spool_file.flush()
+        os.fsync(spool_file.fileno())
+    os.replace(tmp_path, path)
+    return spool_name
+
+
+def enqueue_upload(instance, field_name, uploaded_file, processor='file', created_by=None):
+    """Encolar la subida de ``uploaded_file`` al campo ``field_name`` de ``instance``"""
+    uploaded_file.seek(0)
+    data = uploaded_file.read()
+    spool_name = _write_spool(data)
+
+    try:
+        job = UploadJob.objects.create(
+            app_label=instance._meta.app_label,
+            model_name=instance._meta.model_name,
+            object_id=instance.pk,
+            field_name=field_name,
+            processor=processor,
+            spool_name=spool_name,
+            spool_host=settings.UPLOAD_SPOOL_HOST,
+            original_name=os.path.basename(uploaded_file.name or field_name),
+            content_type=getattr(uploaded_file, 'content_type', '') or '',
+            size=len(data),
+            created_by=created_by,
+        )
+    except Exception:
+        _remove_spool(spool_name)
+        raise
+    # Si la transacción se deshace después, el archivo queda huérfano hasta ``sweep_spool``
+    transaction.on_commit(lambda: dispatch(job.id))
+    return job
+
+
+def store_file(job, data):
+    """Procesador por defecto: guardar los bytes tal cual en el storage del campo"""
+    model = apps.get_model(job.app_label, job.model_name)
+    field = model._meta.get_field(job.field_name)
+    try:
+        instance = model.objects.get(pk=job.object_id)
+    except model.DoesNotExist:
+        raise PermanentUploadError(f'{model.__name__} {job.object_id} ya no existe')
+
+    name = field.storage.save(field.generate_filename(instance, job.original_name), ContentFile(data))
+    model.objects.filter(pk=job.object_id).update(**{field.attname: name})
+    return name
+
+
+def retry_delay(attempts):
+    """Backoff exponencial con jitter para el intento número ``attempts``"""
+    delay = min(settings.UPLOAD_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.UPLOAD_RETRY_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim(job_id):
+    """Reclamar un trabajo vencido; False si otro worker lo tomó o aún no toca"""
+    now = timezone.now()
+    return _local_jobs().filter(
+        id=job_id,
+        status__in=[UploadStatus.PENDING, UploadStatus.PROCESSING],
+        next_attempt_at__lte=now,
+    ).update(
+        status=UploadStatus.PROCESSING,
+        attempts=F('attempts') + 1,
+        next_attempt_at=now + timedelta(seconds=settings.UPLOAD_LEASE_SECONDS),
+        updated_at=now,
+    ) == 1
+
+
+def process_job(job):
+    """Ejecutar un trabajo ya reclamado y registrar el resultado o el reintento"""
+    try:
+        with open(_spool_path(job.spool_name), 'rb') as spool_file:
+            data = spool_file.read()
+        if job.processor not in UPLOAD_PROCESSORS:
+            raise PermanentUploadError(f'Procesador desconocido: {job.processor}')
+        processor = import_string(UPLOAD_PROCESSORS[job.processor])
+        result_name = processor(job, data)
+    except Exception as exc:
+        now = timezone.now()
+        permanent = isinstance(exc, (PermanentUploadError, FileNotFoundError))
+        if permanent or job.attempts >= settings.UPLOAD_MAX_ATTEMPTS:
+            logger.exception('Subida %s fallida definitivamente', job.id)
+            UploadJob.objects.filter(id=job.id).update(
+                status=UploadStatus.FAILED, last_error=repr(exc), updated_at=now
+            )
+        else:
+            logger.warning('Subida %s fallida (intento %s): %r', job.id, job.attempts, exc)
+            UploadJob.objects.filter(id=job.id).update(
+                status=UploadStatus.PENDING,
+                next_attempt_at=now + retry_delay(job.attempts),
+                last_error=repr(exc),
+                updated_at=now,
+            )
+        return False
+
+    now = timezone.now()
+    UploadJob.objects.filter(id=job.id).update(
+        status=UploadStatus.DONE, result_name=result_name or '', last_error='',
+        completed_at=now, updated_at=now,
+    )
+    _remove_spool(job.spool_name)
+    return True
+
+
+def run_job(job_id):
+    """Reclamar y procesar un trabajo; seguro de llamar desde cualquier worker"""
+    try:
+        if not claim(job_id):
+            return False
+        return process_job(UploadJob.objects.get(id=job_id))
+    finally:
+        close_old_connections()
+
+
+def due_job_ids(limit):
+    return list(_local_jobs().filter(
+        status__in=[UploadStatus.PENDING, UploadStatus.PROCESSING],
+        next_attempt_at__lte=timezone.now(),
+    ).order_by('next_attempt_at').values_list('id', flat=True)[:limit])
+
+
+def dispatch(job_id):
+    """Enviar el trabajo al pool del proceso; sin workers lo toma ``process_uploads``"""
+    global _executor
+    if settings.UPLOAD_WORKERS <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.UPLOAD_WORKERS, thread_name_prefix='uploads')
+    start_poller()
+    return _executor.submit(run_job, job_id)
+
+
+def poll_due_jobs():
+    """Enviar al pool los trabajos vencidos; retorna cuántos se enviaron"""
+    try:
+        job_ids = due_job_ids(POLL_BATCH_SIZE)
+    finally:
+        close_old_connections()
+    for job_id in job_ids:
+        dispatch(job_id)
+    return len(job_ids)
+
+
+def _poll_forever(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            poll_due_jobs()
+        except Exception:
+            logger.exception('Error al sondear la cola de subidas')
+
+
+def start_poller():
+    """Iniciar (una vez por proceso) el hilo que reintenta los trabajos vencidos
+    
+    Se llama al despachar la primera subida y desde ``post_worker_init`` de
+    Gunicorn (``gunicorn.conf.py``), para recoger lo pendiente tras un reinicio.
+    """
+    global _poller
+    interval = settings.UPLOAD_POLL_INTERVAL
+    if settings.UPLOAD_WORKERS <= 0 or interval <= 0:
+        return None
+    with _executor_lock:
+        if _poller is None:
+            _poller = threading.Thread(
+                target=_poll_forever, args=(interval,), name='uploads-poller', daemon=True
+            )
+            _poller.start()
+    return _poller
+
+
+def sweep_spool(orphan_age=timedelta(hours=1), failed_age=None, batch_size=500):
+    """Borrar del spool de este host los archivos que ya no necesita ningún trabajo
+
+    Se borran, si tienen más de ``orphan_age``, los archivos sin ``UploadJob``
+    (la transacción que los encoló se deshizo o la escritura se interrumpió) y
+    los de trabajos completados; los de trabajos fallidos se conservan
+    ``failed_age`` (``UPLOAD_SPOOL_RETENTION_DAYS`` por defecto) para inspección.
+    Retorna (huérfanos, de fallidas) borrados.
+    """
+    if failed_age is None:
+        failed_age = timedelta(days=settings.UPLOAD_SPOOL_RETENTION_DAYS)
+    if not os.path.isdir(settings.UPLOAD_SPOOL_DIR):
+        return 0, 0
+
+    now = timezone.now()
+    cutoff = (now - orphan_age).timestamp()
+    with os.scandir(settings.UPLOAD_SPOOL_DIR) as entries:
+        names = [entry.name for entry in entries if entry.is_file() and entry.stat().st_mtime < cutoff]
+
+    orphans = failed = 0
+    for start in range(0, len(names), batch_size):
+        batch = names[start:start + batch_size]
+        jobs = {
+            spool_name: (status, updated_at)
+            for spool_name, status, updated_at in UploadJob.objects.filter(
+                spool_name__in=[name.removesuffix('.tmp') for name in batch]
+            ).values_list('spool_name', 'status', 'updated_at')
+        }
+        for name in batch:
+            job = None if name.endswith('.tmp') else jobs.get(name)
+            if job is None or job[0] == UploadStatus.DONE:
+                orphans += 1
+            elif job[0] == UploadStatus.FAILED and job[1] < now - failed_age:
+                failed += 1
+            else:
+                continue
+            _remove_spool(name)
+    return orphans, failed
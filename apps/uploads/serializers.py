@@ -0,0 +1,17 @@
+from rest_framework import serializers
+from .models import UploadJob
+
+class UploadJobSerializer(serializers.ModelSerializer):
+    """Serializer para consultar el estado de una subida diferida"""
+    
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    
+    class Meta:
+        model = UploadJob
+        fields = [
+            'id', 'app_label', 'model_name', 'object_id', 'field_name',
+            'original_name', 'size', 'status', 'status_display', 'attempts',
+            'next_attempt_at', 'last_error', 'result_name',
+            'created_at', 'completed_at'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,177 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.visitor_control.models import VisitorLog
+from .models import UploadJob, UploadStatus
+from . import queue
+
+IN_MEMORY_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.InMemoryStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+class UploadQueueTests(TestCase):
+    def setUp(self):
+        self.spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spool_dir, ignore_errors=True)
+        settings_override = override_settings(
+            UPLOAD_SPOOL_DIR=self.spool_dir,
+            UPLOAD_WORKERS=0,
+            UPLOAD_MAX_ATTEMPTS=3,
+            STORAGES=IN_MEMORY_STORAGES,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='guard')
+        self.client.force_authenticate(user=self.user)
+
+    def _run_due(self):
+        """Reclamar y procesar en el hilo del test lo que esté vencido"""
+        results = []
+        for job_id in queue.due_job_ids(100):
+            if queue.claim(job_id):
+                results.append(queue.process_job(UploadJob.objects.get(id=job_id)))
+        return results
+
+    def test_visitor_documents_are_spooled_and_uploaded_later(self):
+        """El registro responde sin subir; el worker guarda los archivos en el storage"""
+        data = {
+            'full_name': 'Visitante Uno',
+            'document_photo_front': SimpleUploadedFile('front.jpg', b'front-bytes', 'image/jpeg'),
+            'document_photo_back': SimpleUploadedFile('back.jpg', b'back-bytes', 'image/jpeg'),
+        }
+        response = self.client.post(reverse('visitor_control:visitor_log_list_create'), data, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['pending_uploads']), 2)
+
+        visitor_log = VisitorLog.objects.get()
+        self.assertFalse(visitor_log.document_photo_front)
+        self.assertEqual(len(os.listdir(self.spool_dir)), 2)
+
+        self.assertEqual(self._run_due(), [True, True])
+
+        visitor_log.refresh_from_db()
+        with default_storage.open(visitor_log.document_photo_front.name) as stored:
+            self.assertEqual(stored.read(), b'front-bytes')
+        self.assertEqual(UploadJob.objects.filter(status=UploadStatus.DONE).count(), 2)
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_failed_upload_is_retried_with_backoff_then_marked_failed(self):
+        visitor_log = VisitorLog.objects.create(full_name='Visitante Dos', registered_by=self.user)
+        job = queue.enqueue_upload(
+            visitor_log, 'document_photo_front', SimpleUploadedFile('front.jpg', b'x', 'image/jpeg')
+        )
+
+        with mock.patch.object(default_storage, 'save', side_effect=ConnectionError('storage caído')):
+            self.assertEqual(self._run_due(), [False])
+            job.refresh_from_db()
+            self.assertEqual(job.status, UploadStatus.PENDING)
+            self.assertEqual(job.attempts, 1)
+            self.assertGreater(job.next_attempt_at, timezone.now())
+
+            # Aún no vence el backoff: nadie lo reclama
+            self.assertEqual(self._run_due(), [])
+
+            for _ in range(2):
+                UploadJob.objects.filter(id=job.id).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+                self._run_due()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, UploadStatus.FAILED)
+        self.assertEqual(job.attempts, 3)
+        self.assertIn('storage caído', job.last_error)
+        # El archivo queda en el spool para inspección
+        self.assertTrue(os.path.exists(os.path.join(self.spool_dir, job.spool_name)))
+
+    def test_claim_is_exclusive(self):
+        visitor_log = VisitorLog.objects.create(full_name='Visitante Tres', registered_by=self.user)
+        job = queue.enqueue_upload(
+            visitor_log, 'document_photo_back', SimpleUploadedFile('back.jpg', b'y', 'image/jpeg')
+        )
+        self.assertTrue(queue.claim(job.id))
+        self.assertFalse(queue.claim(job.id))
+
+    def test_poller_redispatches_due_jobs(self):
+        """Los reintentos vencidos vuelven al pool sin depender de process_uploads"""
+        visitor_log = VisitorLog.objects.create(full_name='Visitante Cuatro', registered_by=self.user)
+        job = queue.enqueue_upload(
+            visitor_log, 'document_photo_front', SimpleUploadedFile('front.jpg', b'z', 'image/jpeg')
+        )
+        UploadJob.objects.filter(id=job.id).update(next_attempt_at=timezone.now() + timedelta(minutes=1))
+
+        with mock.patch.object(queue, 'dispatch') as dispatch:
+            self.assertEqual(queue.poll_due_jobs(), 0)
+            UploadJob.objects.filter(id=job.id).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+            self.assertEqual(queue.poll_due_jobs(), 1)
+        dispatch.assert_called_once_with(job.id)
+
+    def test_status_is_visible_to_uploader_and_staff_only(self):
+        data = {
+            'full_name': 'Visitante Cinco',
+            'document_photo_front': SimpleUploadedFile('front.jpg', b'front-bytes', 'image/jpeg'),
+        }
+        response = self.client.post(reverse('visitor_control:visitor_log_list_create'), data, format='multipart')
+        upload_id = response.data['pending_uploads'][0]['upload_id']
+        url = reverse('uploads:upload_status', args=[upload_id])
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['upload']['original_name'], 'front.jpg')
+
+        self.client.force_authenticate(user=User.objects.create_user(username='other'))
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_authenticate(user=User.objects.create_user(username='admin', is_staff=True))
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+    def test_jobs_are_claimed_only_on_their_spool_host(self):
+        """Otro host no tiene el archivo: no reclama el trabajo ni lo marca como fallido"""
+        visitor_log = VisitorLog.objects.create(full_name='Visitante Seis', registered_by=self.user)
+        job = queue.enqueue_upload(
+            visitor_log, 'document_photo_front', SimpleUploadedFile('front.jpg', b'w', 'image/jpeg')
+        )
+        with override_settings(UPLOAD_SPOOL_HOST='otro-host'):
+            self.assertEqual(queue.due_job_ids(100), [])
+            self.assertFalse(queue.claim(job.id))
+        self.assertEqual(queue.due_job_ids(100), [job.id])
+
+    def test_sweep_removes_orphans_and_old_failed_files(self):
+        visitor_log = VisitorLog.objects.create(full_name='Visitante Siete', registered_by=self.user)
+        jobs = [
+            queue.enqueue_upload(
+                visitor_log, 'document_photo_front', SimpleUploadedFile(f'{index}.jpg', b'v', 'image/jpeg')
+            )
+            for index in range(3)
+        ]
+        pending, old_failed, recent_failed = jobs
+        UploadJob.objects.filter(id=old_failed.id).update(
+            status=UploadStatus.FAILED, updated_at=timezone.now() - timedelta(days=30)
+        )
+        UploadJob.objects.filter(id=recent_failed.id).update(status=UploadStatus.FAILED)
+        # Archivo de una petición cuya transacción se deshizo
+        orphan = queue._write_spool(b'huerfano')
+
+        self.assertEqual(queue.sweep_spool(), (0, 0))
+
+        two_hours_ago = (timezone.now() - timedelta(hours=2)).timestamp()
+        for name in os.listdir(self.spool_dir):
+            os.utime(os.path.join(self.spool_dir, name), (two_hours_ago, two_hours_ago))
+        self.assertEqual(queue.sweep_spool(), (1, 1))
+        self.assertEqual(
+            sorted(os.listdir(self.spool_dir)), sorted([pending.spool_name, recent_failed.spool_name])
+        )
+        self.assertNotIn(orphan, os.listdir(self.spool_dir))
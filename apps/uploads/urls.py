@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+app_name = 'uploads'
+
+urlpatterns = [
+    path('<int:upload_id>/', views.upload_status_view, name='upload_status'),
+]
@@ -0,0 +1,25 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .models import UploadJob
+from .serializers import UploadJobSerializer
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def upload_status_view(request, upload_id):
+    """Consultar el estado de una subida diferida (propia, o cualquiera para el staff)"""
+    jobs = UploadJob.objects.all()
+    if not request.user.is_staff:
+        jobs = jobs.filter(created_by=request.user)
+    try:
+        job = jobs.get(id=upload_id)
+    except UploadJob.DoesNotExist:
+        return Response({
+            'error': 'Subida no encontrada'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    return Response({
+        'upload': UploadJobSerializer(job).data
+    })
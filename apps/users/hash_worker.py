@@ -0,0 +1,15 @@
+"""Funciones de los procesos del pool de hasheo.
+
+Viven aparte de ``provisioning`` porque los workers arrancan con ``spawn`` e
+importan este módulo antes de ``django.setup()``: no debe importar modelos.
+"""
+from django.contrib.auth.hashers import make_password
+
+
+def init_worker():
+    import django
+    django.setup()
+
+
+def hash_password(password, hasher):
+    return make_password(password, hasher=hasher)
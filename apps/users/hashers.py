@@ -0,0 +1,12 @@
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class InvitePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2 con menos iteraciones para contraseñas de invitación
+    
+    Como no es el hasher predeterminado, Django vuelve a hashear la contraseña
+    con el predeterminado en el primer inicio de sesión.
+    """
+    
+    algorithm = 'pbkdf2_sha256_invite'
+    iterations = 20_000
@@ -0,0 +1,114 @@
+"""Normalización de fotos de rostro.
+
+Cada foto se decodifica reducida con ``draft()``, se orienta según EXIF, se
+guarda sin metadatos como JPEG de tamaño acotado y se generan miniaturas. Los
+nombres derivan del contenido, así que reprocesar la misma foto es idempotente.
+El procesamiento corre en la cola de subidas (``apps.uploads``), fuera de la petición.
+"""
+import hashlib
+import re
+from io import BytesIO
+
+from django.conf import settings
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+JPEG_QUALITY = 85
+NORMALIZED_NAME = re.compile(r'face_[0-9a-f]{16}\.jpg')
+
+
+class InvalidImageError(ValueError):
+    pass
+
+
+def check_image(uploaded_file):
+    """Validar que el archivo sea una imagen legible sin decodificarla completa"""
+    try:
+        with Image.open(uploaded_file) as image:
+            image.verify()
+    except Image.DecompressionBombError as exc:
+        raise InvalidImageError('La imagen es demasiado grande') from exc
+    except (UnidentifiedImageError, OSError, SyntaxError) as exc:
+        raise InvalidImageError('El archivo no es una imagen válida') from exc
+    finally:
+        uploaded_file.seek(0)
+
+
+def _encode_jpeg(image):
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', quality=JPEG_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def thumbnail_name(name, size):
+    """Nombre de la miniatura ``size`` para la foto principal ``name``"""
+    stem, _, ext = name.rpartition('.')
+    return f'{stem}_thumb_{size}.{ext}'
+
+
+def normalize_face_photo(data):
+    """Retornar (nombre, bytes) de la foto principal y de cada miniatura"""
+    max_size = settings.FACE_PHOTO_MAX_SIZE
+    try:
+        image = Image.open(BytesIO(data))
+        # En JPEG decodifica directamente a una escala reducida (1/2, 1/4, 1/8)
+        image.draft('RGB', (max_size, max_size))
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGB')
+    except Image.DecompressionBombError as exc:
+        raise InvalidImageError('La imagen es demasiado grande') from exc
+    except (UnidentifiedImageError, OSError, SyntaxError) as exc:
+        raise InvalidImageError('El archivo no es una imagen válida') from exc
+
+    # La imagen nueva no conserva EXIF, ICC ni otros metadatos
+    image.info = {}
+    image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+    primary = _encode_jpeg(image)
+    name = f'face_{hashlib.sha256(primary).hexdigest()[:16]}.jpg'
+
+    outputs = [(name, primary)]
+    for size in sorted(settings.FACE_PHOTO_THUMBNAIL_SIZES, reverse=True):
+        thumb = image.copy()
+        thumb.thumbnail((size, size), Image.Resampling.LANCZOS)
+        outputs.append((thumbnail_name(name, size), _encode_jpeg(thumb)))
+    return outputs
+
+
+def is_normalized_name(name):
+    """Las fotos del pipeline tienen nombre ``face_<sha16>.jpg``; las antiguas no tienen miniaturas"""
+    return bool(NORMALIZED_NAME.fullmatch(name))
+
+
+def face_photo_names(name):
+    """Nombres de la foto principal y sus miniaturas"""
+    return [name] + [thumbnail_name(name, size) for size in settings.FACE_PHOTO_THUMBNAIL_SIZES]
+
+
+def process_face_photo(resident_profile_id, data):
+    """Normalizar, subir y asignar la foto al perfil, borrando la versión anterior"""
+    from .models import ResidentProfile
+
+    outputs = normalize_face_photo(data)
+    storage = ResidentProfile._meta.get_field('face_photo').storage
+    for name, content in outputs:
+        storage.put(name, content, 'image/jpeg')
+
+    new_name = outputs[0][0]
+    previous = ResidentProfile.objects.filter(id=resident_profile_id).values_list('face_photo', flat=True).first()
+    ResidentProfile.objects.filter(id=resident_profile_id).update(face_photo=new_name, updated_at=timezone.now())
+
+    # Los nombres derivan del contenido: otro perfil con la misma foto comparte los archivos
+    if previous and previous != new_name and not ResidentProfile.objects.filter(face_photo=previous).exists():
+        for name in face_photo_names(previous) if is_normalized_name(previous) else [previous]:
+            storage.delete(name)
+    return new_name
+
+
+def process_face_photo_upload(job, data):
+    """Procesador de la cola de subidas para fotos de rostro"""
+    from apps.uploads.queue import PermanentUploadError
+
+    try:
+        return process_face_photo(job.object_id, data)
+    except InvalidImageError as exc:
+        raise PermanentUploadError(str(exc)) from exc
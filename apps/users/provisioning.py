@@ -0,0 +1,88 @@
+"""Aprovisionamiento masivo de usuarios.
+
+Las contraseñas se hashean en paralelo en un pool de procesos (o con el
+hasher de invitación, más barato) y ``User``, ``UserProfile`` y
+``ResidentProfile`` se insertan con ``bulk_create`` en una sola transacción.
+El pool se crea por lote, con a lo sumo ``BULK_USER_HASH_WORKERS`` procesos, y
+se cierra al terminar, así cada worker web no mantiene intérpretes ociosos.
+Arranca sus workers con ``spawn``: el proceso web tiene hilos (p. ej. la cola
+de subidas) y hacer ``fork`` de él puede bloquearse.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from . import hash_worker
+from .models import UserProfile, ResidentProfile
+from .stats import invalidate_user_stats
+
+# Por debajo de este tamaño el costo de levantar el pool supera al de hashear en serie
+PARALLEL_HASH_THRESHOLD = 16
+
+
+def hash_passwords(passwords, hasher='default'):
+    """Hashear contraseñas conservando el orden, en paralelo cuando conviene"""
+    passwords = list(passwords)
+    workers = min(settings.BULK_USER_HASH_WORKERS, len(passwords))
+    if workers < 2 or len(passwords) < PARALLEL_HASH_THRESHOLD:
+        return [make_password(password, hasher=hasher) for password in passwords]
+
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=hash_worker.init_worker,
+    ) as pool:
+        return list(pool.map(hash_worker.hash_password, passwords, [hasher] * len(passwords), chunksize=chunksize))
+
+
+def provision_users(rows, invite=False, batch_size=500):
+    """Crear usuarios con sus perfiles a partir de filas ya validadas por ``BulkUserRowSerializer``
+    
+    Si otra petición registra uno de los usernames entre la verificación y la
+    inserción, se levanta ``IntegrityError`` y no se crea ninguno.
+    """
+    passwords = [row['password'] for row in rows]
+    if invite:
+        # El hasher de invitación es barato: en serie cuesta menos que repartir al pool
+        hashed = [make_password(password, hasher=settings.INVITE_PASSWORD_HASHER) for password in passwords]
+    else:
+        hashed = hash_passwords(passwords)
+
+    users = [
+        User(
+            username=User.normalize_username(row['username']),
+            email=User.objects.normalize_email(row.get('email', '')),
+            first_name=row.get('first_name', ''),
+            last_name=row.get('last_name', ''),
+            password=password,
+        )
+        for row, password in zip(rows, hashed)
+    ]
+
+    with transaction.atomic():
+        User.objects.bulk_create(users, batch_size=batch_size)
+
+        profiles = UserProfile.objects.bulk_create([
+            UserProfile(user=user, user_type=row['user_type'], phone=row.get('phone', ''))
+            for user, row in zip(users, rows)
+        ], batch_size=batch_size)
+
+        ResidentProfile.objects.bulk_create([
+            ResidentProfile(
+                user_profile=profile,
+                resident_type=row['resident_type'],
+                birth_date=row['birth_date'],
+                house_identifier=row.get('house_identifier', '')
+            )
+            for profile, row in zip(profiles, rows)
+            if row['user_type'] == 'resident'
+        ], batch_size=batch_size)
+
+        transaction.on_commit(invalidate_user_stats)
+
+    return users
@@ -1,5 +1,7 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from .models import UserProfile, ResidentProfile
 
 class UserSerializer(serializers.ModelSerializer):
@@ -27,15 +29,28 @@ class ResidentProfileSerializer(serializers.ModelSerializer):
     user_profile = UserProfileSerializer(read_only=True)
     resident_type_display = serializers.CharField(source='get_resident_type_display', read_only=True)
     age = serializers.ReadOnlyField()
+    face_photo_thumbnails = serializers.SerializerMethodField()
     
     class Meta:
         model = ResidentProfile
         fields = [
             'id', 'user_profile', 'resident_type', 'resident_type_display', 
-            'birth_date', 'age', 'face_photo', 'house_identifier', 
+            'birth_date', 'age', 'face_photo', 'face_photo_thumbnails', 'house_identifier', 
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+    
+    def get_face_photo_thumbnails(self, obj):
+        """URLs de las miniaturas por tamaño (solo fotos procesadas por el pipeline)"""
+        from .images import thumbnail_name, is_normalized_name
+        
+        if not obj.face_photo or not is_normalized_name(obj.face_photo.name):
+            return {}
+        storage = obj.face_photo.storage
+        return {
+            str(size): storage.url(thumbnail_name(obj.face_photo.name, size))
+            for size in settings.FACE_PHOTO_THUMBNAIL_SIZES
+        }
 
 class UserCreateSerializer(serializers.ModelSerializer):
     """Serializer para crear usuarios completos"""
@@ -99,6 +114,18 @@ class UserCreateSerializer(serializers.ModelSerializer):
         
         return user
 
+class BulkUserRowSerializer(UserCreateSerializer):
+    """Fila de aprovisionamiento masivo; la unicidad de username se verifica por lote"""
+    
+    class Meta(UserCreateSerializer.Meta):
+        extra_kwargs = {'username': {'validators': [UnicodeUsernameValidator()]}}
+
+class BulkUserCreateSerializer(serializers.Serializer):
+    """Serializer para crear varios usuarios en una sola petición"""
+    
+    users = serializers.ListField(child=serializers.DictField(), allow_empty=False, max_length=5000)
+    invite = serializers.BooleanField(default=False)
+
 class AssignHouseSerializer(serializers.Serializer):
     """Serializer para asignar casa a residente"""
     
@@ -115,6 +142,26 @@ class AssignHouseSerializer(serializers.Serializer):
         except Property.DoesNotExist:
             raise serializers.ValidationError("Propiedad no encontrada")
 
+class BulkAssignHouseItemSerializer(serializers.Serializer):
+    """Elemento de una asignación masiva de casas"""
+    
+    user_id = serializers.IntegerField()
+    property_id = serializers.IntegerField()
+    relationship = serializers.CharField(max_length=50, default='resident')
+    is_primary_resident = serializers.BooleanField(default=False)
+
+class BulkAssignHouseSerializer(serializers.Serializer):
+    """Serializer para asignar casas a varios residentes en una sola petición"""
+    
+    assignments = BulkAssignHouseItemSerializer(many=True, allow_empty=False, max_length=1000)
+
+class BulkRemoveHouseSerializer(serializers.Serializer):
+    """Serializer para remover la casa de varios residentes en una sola petición"""
+    
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=1000
+    )
+
 class UserDetailSerializer(serializers.ModelSerializer):
     """Serializer completo para mostrar detalles del usuario"""
     
@@ -122,4 +169,67 @@ class UserDetailSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = User
-        fields = ['id', 'username', 'email', 'first_name', 'last_name', 'is_active', 'date_joined', 'profile']
\ No newline at end of file
+        fields = ['id', 'username', 'email', 'first_name', 'last_name', 'is_active', 'date_joined', 'profile']
+
+class _ResidentInfoSerializer(ResidentProfileSerializer):
+    """ResidentProfileSerializer sin el perfil anidado, que ya viene serializado"""
+    
+    user_profile = None
+    
+    class Meta(ResidentProfileSerializer.Meta):
+        fields = [field for field in ResidentProfileSerializer.Meta.fields if field != 'user_profile']
+
+class ResidentDetailSerializer(UserDetailSerializer):
+    """Residente con ``resident_details`` serializado en una sola pasada
+    
+    Espera ``select_related('profile', 'profile__resident_info')``. El perfil
+    se serializa una vez y se reutiliza como ``resident_details.user_profile``,
+    manteniendo la forma de ``ResidentProfileSerializer``.
+    """
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        
+        profile = getattr(instance, 'profile', None)
+        resident_info = getattr(profile, 'resident_info', None) if profile else None
+        if resident_info is not None:
+            if not hasattr(self, '_resident_info_serializer'):
+                self._resident_info_serializer = _ResidentInfoSerializer()
+            details = self._resident_info_serializer.to_representation(resident_info)
+            data['resident_details'] = {
+                'id': details.pop('id'),
+                'user_profile': data['profile'],
+                **details
+            }
+        
+        return data
+
+class ResidentWithHouseSerializer(UserDetailSerializer):
+    """Residente con sus casas asignadas a partir de ``active_assignments``
+    
+    Espera usuarios con las asignaciones activas precargadas (ver
+    ``residents_with_house_view``), sin consultas adicionales por fila.
+    """
+    
+    house_assignment = serializers.SerializerMethodField()
+    house_assignments = serializers.SerializerMethodField()
+    
+    class Meta(UserDetailSerializer.Meta):
+        fields = UserDetailSerializer.Meta.fields + ['house_assignment', 'house_assignments']
+    
+    def _assignment_data(self, assignment):
+        return {
+            'property_id': assignment.property_id,
+            'property_identifier': assignment.property.full_identifier,
+            'relationship': assignment.relationship,
+            'is_primary_resident': assignment.is_primary_resident,
+            'move_in_date': assignment.move_in_date
+        }
+    
+    def get_house_assignment(self, obj):
+        # La casa principal: residente principal primero y luego la mudanza más reciente
+        return self._assignment_data(obj.active_assignments[0])
+    
+    def get_house_assignments(self, obj):
+        # Todas las asignaciones activas, para residentes en más de una casa
+        return [self._assignment_data(assignment) for assignment in obj.active_assignments]
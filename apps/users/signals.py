@@ -0,0 +1,24 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import UserProfile, ResidentProfile
+from .stats import invalidate_user_stats
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_save, sender=ResidentProfile)
+@receiver(post_delete, sender=ResidentProfile)
+def invalidate_stats_on_profile_change(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_user_stats)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_stats_on_user_change(sender, instance, created=False, **kwargs):
+    # Los guardados de usuarios existentes (p. ej. last_login) no cambian los conteos
+    if kwargs.get('signal') is post_save and not created:
+        return
+    transaction.on_commit(invalidate_user_stats)
@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.functions import TruncDay, TruncWeek, TruncMonth
+from django.utils import timezone
+
+from apps.common.cache import cached_snapshot
+from .models import UserProfile, ResidentProfile
+
+USER_STATS_CACHE_KEY = 'users:stats'
+
+# Granularidad de altas -> (función de truncado, ventana hacia atrás)
+SIGNUP_BUCKETS = {
+    'day': (TruncDay, timedelta(days=30)),
+    'week': (TruncWeek, timedelta(weeks=12)),
+    'month': (TruncMonth, timedelta(days=365)),
+}
+
+
+def _grouped_counts(queryset, field):
+    """Conteo por valor de ``field`` en una sola consulta agrupada"""
+    return dict(
+        queryset.order_by().values(field).annotate(count=Count('id')).values_list(field, 'count')
+    )
+
+
+def compute_user_stats():
+    """Calcular estadísticas con una agregación agrupada por cada tipo de perfil"""
+    users_by_type = _grouped_counts(UserProfile.objects.all(), 'user_type')
+    residents_by_type = _grouped_counts(ResidentProfile.objects.all(), 'resident_type')
+    
+    return {
+        'total_users': User.objects.count(),
+        'by_type': {
+            user_type: {
+                'count': users_by_type.get(user_type, 0),
+                'display_name': display_name
+            }
+            for user_type, display_name in UserProfile.USER_TYPES
+        },
+        'residents_by_type': {
+            resident_type: {
+                'count': residents_by_type.get(resident_type, 0),
+                'display_name': display_name
+            }
+            for resident_type, display_name in ResidentProfile.RESIDENT_TYPES
+        }
+    }
+
+
+def compute_signups(granularity):
+    """Altas de perfiles agrupadas por día, semana o mes dentro de su ventana"""
+    trunc, window = SIGNUP_BUCKETS[granularity]
+    rows = UserProfile.objects.filter(
+        created_at__gte=timezone.now() - window
+    ).annotate(
+        bucket=trunc('created_at')
+    ).order_by().values('bucket').annotate(count=Count('id')).order_by('bucket')
+    
+    return [
+        {'period': row['bucket'].date().isoformat(), 'count': row['count']}
+        for row in rows
+    ]
+
+
+def _cache_key(signups):
+    return f'{USER_STATS_CACHE_KEY}:{signups}' if signups else USER_STATS_CACHE_KEY
+
+
+def _compute_stats(signups):
+    stats = compute_user_stats()
+    if signups:
+        stats['signups'] = {
+            'granularity': signups,
+            'buckets': compute_signups(signups)
+        }
+    return stats
+
+
+def get_user_stats(signups=None):
+    return cached_snapshot(_cache_key(signups), lambda: _compute_stats(signups))
+
+
+def invalidate_user_stats():
+    cache.delete_many([_cache_key(None)] + [_cache_key(granularity) for granularity in SIGNUP_BUCKETS])
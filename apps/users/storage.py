@@ -1,18 +1,145 @@
 from django.core.files.storage import Storage
 from django.conf import settings
-from supabase import create_client
+import os
+import threading
 import uuid
+from collections import defaultdict
 from io import BytesIO
 from django.utils.deconstruct import deconstructible 
+from cachetools import TTLCache
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+# Metadatos recientes por (bucket, nombre): None si el objeto no existe, su tamaño
+# en bytes o _EXISTS si existe pero aún no se consultó su tamaño
+_metadata_cache = None
+_metadata_lock = threading.Lock()
+
+_MISSING = object()
+_EXISTS = object()
+
+
+class InMemoryStorageClient:
+    """Backend en memoria con la parte de la interfaz de storage3 que usa SupabaseStorage
+    
+    Se selecciona con ``SUPABASE_STORAGE_BACKEND = 'memory'`` para pruebas y
+    desarrollo sin red.
+    """
+    
+    def __init__(self):
+        self.buckets = defaultdict(dict)
+    
+    def from_(self, bucket_id):
+        return InMemoryBucket(self.buckets[bucket_id])
+
+
+class InMemoryBucket:
+    def __init__(self, files):
+        self.files = files
+    
+    def upload(self, path, file, file_options=None):
+        content_type = (file_options or {}).get('content-type', 'application/octet-stream')
+        self.files[path] = (bytes(file), content_type)
+        return {'Key': path}
+    
+    def remove(self, paths):
+        return [{'name': path} for path in paths if self.files.pop(path, None) is not None]
+    
+    def exists(self, path):
+        return path in self.files
+    
+    def info(self, path):
+        data, content_type = self.files[path]
+        return {'name': path, 'size': len(data), 'content_type': content_type}
+    
+    def list(self, path=None, options=None):
+        return [{'name': name} for name in self.files]
+    
+    def download(self, path, options=None):
+        return self.files[path][0]
+
+
+def _create_storage_client():
+    if settings.SUPABASE_STORAGE_BACKEND == 'memory':
+        return InMemoryStorageClient()
+    
+    import httpx
+    from storage3 import SyncStorageClient
+    
+    # Un solo pool HTTP/2 con keep-alive para todo el proceso
+    http_client = httpx.Client(
+        http2=True,
+        follow_redirects=True,
+        timeout=settings.SUPABASE_STORAGE_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=settings.SUPABASE_STORAGE_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SUPABASE_STORAGE_MAX_CONNECTIONS,
+            keepalive_expiry=60,
+        ),
+    )
+    return SyncStorageClient(
+        url=f"{settings.SUPABASE_URL.rstrip('/')}/storage/v1",
+        headers={
+            'apiKey': settings.SUPABASE_KEY,
+            'Authorization': f'Bearer {settings.SUPABASE_KEY}',
+        },
+        http_client=http_client,
+    )
+
+
+def get_storage_client():
+    """Cliente de Storage compartido por el proceso, creado en el primer uso
+    
+    Se recrea tras un fork (p. ej. workers de Gunicorn con preload) para no
+    compartir conexiones entre procesos.
+    """
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid():
+                _client = _create_storage_client()
+                _client_pid = os.getpid()
+    return _client
+
+
+def reset_storage_client():
+    """Descartar el cliente compartido (p. ej. al cambiar de backend en pruebas)"""
+    global _client, _client_pid, _metadata_cache
+    with _client_lock:
+        _client = None
+        _client_pid = None
+    with _metadata_lock:
+        _metadata_cache = None
+
+
+def _cached_metadata(key):
+    with _metadata_lock:
+        if _metadata_cache is None:
+            return _MISSING
+        return _metadata_cache.get(key, _MISSING)
+
+
+def _remember_metadata(key, size):
+    global _metadata_cache
+    with _metadata_lock:
+        if _metadata_cache is None:
+            _metadata_cache = TTLCache(maxsize=4096, ttl=settings.SUPABASE_STORAGE_METADATA_TTL)
+        _metadata_cache[key] = size
+
 
 @deconstructible
 class SupabaseStorage(Storage):
-    def __init__(self):
-        self.client = create_client(
-            settings.SUPABASE_URL,
-            settings.SUPABASE_KEY
-        )
-        self.bucket = 'resident-photos'
+    def __init__(self, bucket='resident-photos'):
+        self.bucket = bucket
+    
+    @property
+    def client(self):
+        return get_storage_client()
+    
+    def _bucket(self):
+        return self.client.from_(self.bucket)
     
     def _save(self, name, content):
         # Generar nombre único
@@ -24,14 +151,21 @@ class SupabaseStorage(Storage):
         file_bytes = content.read()
         
         # Subir a Supabase
-        self.client.storage.from_(self.bucket).upload(
+        self._bucket().upload(
             filename,
             file_bytes,
             {'content-type': getattr(content, 'content_type', 'image/jpeg')}
         )
+        _remember_metadata((self.bucket, filename), len(file_bytes))
         
         return filename
     
+    def put(self, name, data, content_type='image/jpeg'):
+        """Subir bytes bajo un nombre fijo, reemplazando el objeto si ya existe"""
+        self._bucket().upload(name, data, {'content-type': content_type, 'upsert': 'true'})
+        _remember_metadata((self.bucket, name), len(data))
+        return name
+    
     def url(self, name):
         if not name:
             return ''
@@ -39,17 +173,34 @@ class SupabaseStorage(Storage):
         return f"{settings.SUPABASE_URL}/storage/v1/object/public/{self.bucket}/{name}"
     
     def exists(self, name):
+        cached = _cached_metadata((self.bucket, name))
+        if cached is not _MISSING:
+            return cached is not None
+        
+        # HEAD sobre el objeto en lugar de listar el bucket
         try:
-            files = self.client.storage.from_(self.bucket).list()
-            return any(f['name'] == name for f in files)
+            found = self._bucket().exists(name)
         except:
             return False
+        _remember_metadata((self.bucket, name), _EXISTS if found else None)
+        return found
     
     def delete(self, name):
         try:
-            self.client.storage.from_(self.bucket).remove([name])
+            self._bucket().remove([name])
+            _remember_metadata((self.bucket, name), None)
         except:
             pass
     
     def size(self, name):
-        return 0  # No implementado
\ No newline at end of file
+        cached = _cached_metadata((self.bucket, name))
+        if isinstance(cached, int):
+            return cached
+        
+        try:
+            info = self._bucket().info(name)
+        except:
+            return 0
+        size = info.get('size') or (info.get('metadata') or {}).get('size') or 0
+        _remember_metadata((self.bucket, name), size)
+        return size
\ No newline at end of file
@@ -1,3 +1,211 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.contrib.auth.hashers import check_password, identify_hasher
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.properties.models import Property, PropertyResident
+from .models import UserProfile
+from .provisioning import hash_passwords
+
+class ResidentHouseListTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='testadmin', password='password')
+        self.client.force_authenticate(user=self.admin)
+        self.created = 0
+
+    def _add_residents(self, count):
+        """Crear residentes alternando con y sin casa asignada"""
+        for _ in range(count):
+            index = self.created
+            self.created += 1
+            user = User.objects.create_user(username=f'resident{index}')
+            UserProfile.objects.create(user=user, user_type='resident')
+            if index % 2 == 0:
+                property_obj = Property.objects.create(house_number=f'{index}', block='A', area_m2=80)
+                PropertyResident.objects.create(
+                    property=property_obj, resident=user, relationship='Inquilino'
+                )
+
+    def _query_count(self, url_name, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(url_name), params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries), response
+
+    def test_residents_without_house_constant_queries(self):
+        """La cantidad de consultas no crece con el número de residentes"""
+        self._add_residents(4)
+        small, response = self._query_count('users:residents_without_house')
+        self.assertEqual(response.data['count'], 2)
+
+        self._add_residents(40)
+        large, response = self._query_count('users:residents_without_house')
+        self.assertEqual(response.data['count'], 22)
+        self.assertEqual(small, large)
+
+        usernames = {resident['username'] for resident in response.data['residents']}
+        self.assertNotIn('resident0', usernames)
+        self.assertIn('resident1', usernames)
+
+    def test_residents_with_house_constant_queries(self):
+        """Los datos de la casa se anotan sin consultas por fila"""
+        self._add_residents(4)
+        small, response = self._query_count('users:residents_with_house')
+        self.assertEqual(response.data['count'], 2)
+
+        self._add_residents(40)
+        large, response = self._query_count('users:residents_with_house')
+        self.assertEqual(response.data['count'], 22)
+        self.assertEqual(small, large)
+
+        first = response.data['residents'][0]
+        self.assertEqual(first['username'], 'resident0')
+        self.assertEqual(first['house_assignment']['property_identifier'], '0 - Bloque A')
+        self.assertEqual(first['house_assignment']['relationship'], 'Inquilino')
+
+    def test_residents_with_house_lists_every_active_assignment(self):
+        """Un residente activo en dos casas aparece una vez, con ambas asignaciones"""
+        self._add_residents(1)
+        user = User.objects.get(username='resident0')
+        second = Property.objects.create(house_number='200', block='B', area_m2=80)
+        PropertyResident.objects.create(
+            property=second, resident=user, relationship='Propietario', is_primary_resident=True
+        )
+
+        _, response = self._query_count('users:residents_with_house')
+        self.assertEqual(response.data['count'], 1)
+        resident = response.data['residents'][0]
+        self.assertEqual(resident['house_assignment']['property_identifier'], '200 - Bloque B')
+        self.assertEqual(
+            [assignment['property_identifier'] for assignment in resident['house_assignments']],
+            ['200 - Bloque B', '0 - Bloque A']
+        )
+
+    def test_residents_with_house_paginated(self):
+        """Con ?page se devuelve una página y los enlaces de navegación"""
+        self._add_residents(50)
+        queries, response = self._query_count('users:residents_with_house', {'page': 1, 'page_size': 10})
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['residents']), 10)
+        self.assertIsNotNone(response.data['next'])
+
+
+class BulkHouseAssignmentTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='testadmin')
+        self.client.force_authenticate(user=self.admin)
+        self.house = Property.objects.create(house_number='101', block='A', area_m2=80)
+        self.other_house = Property.objects.create(house_number='102', block='A', area_m2=80)
+        self.residents = []
+        for index in range(3):
+            user = User.objects.create_user(username=f'resident{index}')
+            UserProfile.objects.create(user=user, user_type='resident')
+            self.residents.append(user)
+
+    def _assign(self, *items):
+        return self.client.post(reverse('users:bulk_assign_houses'), {'assignments': [
+            {'user_id': user_id, 'property_id': property_id} for user_id, property_id in items
+        ]}, format='json')
+
+    def test_bulk_assign_and_remove(self):
+        first, second, third = self.residents
+        PropertyResident.objects.create(property=self.other_house, resident=third, relationship='Inquilino')
+
+        response = self._assign(
+            (first.id, self.house.id),
+            (first.id, self.other_house.id),
+            (second.id, self.other_house.id),
+            (third.id, self.house.id),
+            (self.admin.id, self.house.id),
+            (second.id, 0),
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 3, 4, 5])
+        self.assertEqual(
+            set(PropertyResident.objects.filter(is_active=True).values_list('resident_id', 'property_id')),
+            {(first.id, self.house.id), (second.id, self.other_house.id), (third.id, self.other_house.id)}
+        )
+
+        response = self.client.post(
+            reverse('users:bulk_remove_houses'), {'user_ids': [first.id, second.id, self.admin.id]}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(response.data['without_house'], [self.admin.id])
+        self.assertEqual(
+            list(PropertyResident.objects.filter(is_active=True).values_list('resident_id', flat=True)), [third.id]
+        )
+
+    def test_bulk_assign_race_is_a_conflict(self):
+        """Si otra petición activa la misma asignación antes de insertar, no se asigna ninguna"""
+        first, second, _ = self.residents
+        bulk_create = PropertyResident.objects.bulk_create
+
+        def bulk_create_after_concurrent_assign(rows, **kwargs):
+            PropertyResident.objects.create(property=self.house, resident=second, relationship='Inquilino')
+            return bulk_create(rows, **kwargs)
+
+        with mock.patch.object(
+            PropertyResident.objects, 'bulk_create', side_effect=bulk_create_after_concurrent_assign
+        ):
+            response = self._assign((first.id, self.house.id), (second.id, self.house.id))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(PropertyResident.objects.filter(resident=first).exists())
+
+
+class BulkCreateUsersTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='testadmin')
+        self.client.force_authenticate(user=self.admin)
+
+    def _row(self, username, **extra):
+        return {'username': username, 'password': 'clave-segura-123', 'user_type': 'security', **extra}
+
+    def test_bulk_create_reports_invalid_rows(self):
+        response = self.client.post(reverse('users:bulk_create_users'), {'invite': True, 'users': [
+            self._row('ana'),
+            self._row('testadmin'),
+            self._row('ana'),
+            self._row('luis', user_type='resident'),
+            self._row('marta', user_type='resident', resident_type='owner', birth_date='1990-01-01'),
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2, 3])
+
+        marta = User.objects.get(username='marta')
+        self.assertEqual(marta.profile.resident_info.resident_type, 'owner')
+        self.assertEqual(identify_hasher(marta.password).algorithm, 'pbkdf2_sha256_invite')
+        self.assertTrue(check_password('clave-segura-123', marta.password))
+
+    def test_bulk_create_concurrent_username_is_a_conflict(self):
+        """Un username registrado por otra petición tras la verificación no produce un 500"""
+        bulk_create = User.objects.bulk_create
+
+        def bulk_create_after_concurrent_signup(users, **kwargs):
+            User.objects.create_user(username='pedro')
+            return bulk_create(users, **kwargs)
+
+        with mock.patch.object(User.objects, 'bulk_create', side_effect=bulk_create_after_concurrent_signup):
+            response = self.client.post(reverse('users:bulk_create_users'), {'invite': True, 'users': [
+                self._row('ana'), self._row('pedro'),
+            ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(User.objects.filter(username='ana').exists())
+
+    @override_settings(BULK_USER_HASH_WORKERS=2)
+    def test_parallel_hashing_keeps_order(self):
+        """El pool por lote devuelve los hashes en el orden de las contraseñas"""
+        passwords = [f'clave-{index}' for index in range(16)]
+        hashed = hash_passwords(passwords, hasher='pbkdf2_sha256_invite')
+        self.assertTrue(all(check_password(password, value) for password, value in zip(passwords, hashed)))
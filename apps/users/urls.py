@@ -7,6 +7,7 @@ urlpatterns = [
     # CRUD básico de usuarios
     path('', views.UserListCreateView.as_view(), name='user_list_create'),
     path('<int:pk>/', views.UserDetailView.as_view(), name='user_detail'),
+    path('bulk/', views.bulk_create_users_view, name='bulk_create_users'),
     
     # Filtros y listados especiales
     path('type/<str:user_type>/', views.users_by_type_view, name='users_by_type'),
@@ -15,6 +16,8 @@ urlpatterns = [
     # Gestión de casas para residentes
     path('<int:user_id>/assign-house/', views.assign_house_to_resident_view, name='assign_house_to_resident'),
     path('<int:user_id>/remove-house/', views.remove_house_from_resident_view, name='remove_house_from_resident'),
+    path('residents/bulk-assign-house/', views.bulk_assign_houses_view, name='bulk_assign_houses'),
+    path('residents/bulk-remove-house/', views.bulk_remove_houses_view, name='bulk_remove_houses'),
     path('residents/without-house/', views.residents_without_house_view, name='residents_without_house'),
     path('residents/with-house/', views.residents_with_house_view, name='residents_with_house'),
     
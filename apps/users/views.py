@@ -2,16 +2,25 @@ from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.pagination import PageNumberPagination
 from django.contrib.auth.models import User
+from django.db import IntegrityError
 from django.utils import timezone
 from .models import UserProfile, ResidentProfile
 from .serializers import (
     UserCreateSerializer, 
     UserDetailSerializer, 
     UserProfileSerializer,
-    ResidentProfileSerializer
+    ResidentProfileSerializer,
+    ResidentDetailSerializer,
+    ResidentWithHouseSerializer
 )
 
+class UserPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
 class UserListCreateView(generics.ListCreateAPIView):
     """Vista para listar todos los usuarios y crear nuevos"""
     queryset = User.objects.all().select_related('profile')
@@ -36,6 +45,55 @@ class UserListCreateView(generics.ListCreateAPIView):
             'user': response_serializer.data
         }, status=status.HTTP_201_CREATED)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_create_users_view(request):
+    """Crear varios usuarios con sus perfiles en una sola petición
+    
+    Con ``invite: true`` las contraseñas se hashean con el hasher de invitación,
+    que se actualiza al predeterminado en el primer inicio de sesión.
+    """
+    from .serializers import BulkUserCreateSerializer, BulkUserRowSerializer
+    from .provisioning import provision_users
+    
+    serializer = BulkUserCreateSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    rows = serializer.validated_data['users']
+    
+    # Usernames ya registrados: una consulta para todo el lote, con la misma normalización que al crear
+    usernames = {User.normalize_username(str(row.get('username', ''))) for row in rows}
+    taken = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+    
+    errors = []
+    valid = []
+    for index, row in enumerate(rows):
+        row_serializer = BulkUserRowSerializer(data=row)
+        if not row_serializer.is_valid():
+            errors.append({'index': index, 'errors': row_serializer.errors})
+            continue
+        
+        username = User.normalize_username(row_serializer.validated_data['username'])
+        if username in taken:
+            errors.append({'index': index, 'errors': {'username': ['Ya existe un usuario con este nombre.']}})
+            continue
+        
+        taken.add(username)
+        valid.append(row_serializer.validated_data)
+    
+    try:
+        users = provision_users(valid, invite=serializer.validated_data['invite']) if valid else []
+    except IntegrityError:
+        return Response({
+            'error': 'Otra petición registró alguno de estos usuarios; no se creó ninguno. Reintente el lote.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'message': f'{len(users)} usuarios creados exitosamente',
+        'count': len(users),
+        'users': [{'id': user.id, 'username': user.username} for user in users],
+        'errors': errors
+    }, status=status.HTTP_201_CREATED if users else status.HTTP_400_BAD_REQUEST)
+
 class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
     """Vista para ver, actualizar y eliminar un usuario específico"""
     queryset = User.objects.all().select_related('profile')
@@ -81,23 +139,27 @@ def residents_detail_view(request):
     """Obtener todos los residentes con información detallada"""
     residents = User.objects.filter(
         profile__user_type='resident'
-    ).select_related('profile__resident_info')
+    ).select_related('profile', 'profile__resident_info').order_by('id')
     
-    users_data = []
-    for user in residents:
-        user_data = UserDetailSerializer(user).data
+    if 'page' in request.query_params:
+        paginator = UserPagination()
+        page = paginator.paginate_queryset(residents, request)
+        serializer = ResidentDetailSerializer(page, many=True)
         
-        # Agregar información de residente si existe
-        if hasattr(user.profile, 'resident_info'):
-            resident_data = ResidentProfileSerializer(user.profile.resident_info).data
-            user_data['resident_details'] = resident_data
-        
-        users_data.append(user_data)
+        return Response({
+            'message': 'Residentes obtenidos exitosamente',
+            'count': paginator.page.paginator.count,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'residents': serializer.data
+        })
+    
+    serializer = ResidentDetailSerializer(residents, many=True)
     
     return Response({
         'message': 'Residentes obtenidos exitosamente',
-        'count': len(users_data),
-        'residents': users_data
+        'count': len(serializer.data),
+        'residents': serializer.data
     })
 
 @api_view(['PUT'])
@@ -203,26 +265,22 @@ def assign_house_to_resident_view(request, user_id):
     # Verificar si el residente ya tiene una casa asignada
     existing_assignment = PropertyResident.objects.filter(
         resident=user, is_active=True
-    ).first()
+    ).select_related('property').first()
     
     if existing_assignment:
         return Response({
             'error': f'El residente ya está asignado a la propiedad {existing_assignment.property.full_identifier}'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Crear asignación
-    property_resident = PropertyResident.objects.create(
-        property=property_obj,
-        resident=user,
+    # Crear asignación y actualizar el identificador en el perfil del residente
+    from apps.properties import services
+    services.add_resident(
+        property_obj,
+        user,
         relationship=relationship,
         is_primary_resident=is_primary
     )
     
-    # Actualizar el identificador en el perfil del residente
-    if hasattr(user.profile, 'resident_info'):
-        user.profile.resident_info.house_identifier = property_obj.full_identifier
-        user.profile.resident_info.save()
-    
     return Response({
         'message': f'Casa {property_obj.full_identifier} asignada exitosamente a {user.get_full_name()}',
         'assignment': {
@@ -252,10 +310,12 @@ def remove_house_from_resident_view(request, user_id):
     
     from apps.properties.models import PropertyResident
     
+    from apps.properties import services
+    
     # Buscar asignación activa
     assignment = PropertyResident.objects.filter(
         resident=user, is_active=True
-    ).first()
+    ).select_related('property').first()
     
     if not assignment:
         return Response({
@@ -264,74 +324,188 @@ def remove_house_from_resident_view(request, user_id):
     
     property_identifier = assignment.property.full_identifier
     
-    # Desactivar asignación
-    assignment.is_active = False
-    assignment.move_out_date = timezone.now().date()
-    assignment.save()
-    
-    # Limpiar identificador en el perfil
-    if hasattr(user.profile, 'resident_info'):
-        user.profile.resident_info.house_identifier = ''
-        user.profile.resident_info.save()
+    # Desactivar asignación y recalcular el identificador en el perfil
+    services.remove_resident(assignment)
     
     return Response({
         'message': f'Casa {property_identifier} removida exitosamente de {user.get_full_name()}'
     })
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_assign_houses_view(request):
+    """Asignar casas a varios residentes en una sola petición"""
+    from .serializers import BulkAssignHouseSerializer
+    from apps.properties.models import Property, PropertyResident
+    from apps.properties import services
+    
+    serializer = BulkAssignHouseSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    
+    items = serializer.validated_data['assignments']
+    user_ids = {item['user_id'] for item in items}
+    property_ids = {item['property_id'] for item in items}
+    
+    # Una consulta por verificación sobre todos los IDs recibidos
+    users = User.objects.filter(id__in=user_ids).select_related('profile').in_bulk()
+    properties = Property.objects.in_bulk(property_ids)
+    already_assigned = {
+        assignment.resident_id: assignment.property.full_identifier
+        for assignment in PropertyResident.objects.filter(
+            resident_id__in=user_ids, is_active=True
+        ).select_related('property')
+    }
+    
+    errors = []
+    valid = []
+    seen_users = set()
+    for index, item in enumerate(items):
+        user = users.get(item['user_id'])
+        error = None
+        if user is None:
+            error = 'Usuario no encontrado'
+        elif not hasattr(user, 'profile') or user.profile.user_type != 'resident':
+            error = 'El usuario debe ser de tipo residente'
+        elif item['property_id'] not in properties:
+            error = 'Propiedad no encontrada'
+        elif item['user_id'] in already_assigned:
+            error = f'El residente ya está asignado a la propiedad {already_assigned[item["user_id"]]}'
+        elif item['user_id'] in seen_users:
+            error = 'El usuario aparece más de una vez en la petición'
+        
+        if error:
+            errors.append({'index': index, 'user_id': item['user_id'], 'error': error})
+            continue
+        
+        seen_users.add(item['user_id'])
+        valid.append({
+            'property_id': item['property_id'],
+            'resident_id': item['user_id'],
+            'relationship': item['relationship'],
+            'is_primary_resident': item['is_primary_resident'],
+        })
+    
+    try:
+        assignments = services.bulk_add_residents(valid)
+    except services.ResidentConflictError:
+        return Response({
+            'error': 'Otra petición asignó alguno de estos residentes; no se asignó ninguno. Reintente el lote.'
+        }, status=status.HTTP_409_CONFLICT)
+    
+    assigned = [{
+        'user_id': assignment.resident_id,
+        'user_name': users[assignment.resident_id].get_full_name(),
+        'property_id': assignment.property_id,
+        'property_identifier': properties[assignment.property_id].full_identifier,
+        'relationship': assignment.relationship,
+        'is_primary_resident': assignment.is_primary_resident
+    } for assignment in assignments]
+    
+    return Response({
+        'message': f'{len(assigned)} casas asignadas exitosamente',
+        'count': len(assigned),
+        'assignments': assigned,
+        'errors': errors
+    }, status=status.HTTP_200_OK if assigned else status.HTTP_400_BAD_REQUEST)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_remove_houses_view(request):
+    """Remover la casa de varios residentes en una sola petición"""
+    from .serializers import BulkRemoveHouseSerializer
+    from apps.properties import services
+    
+    serializer = BulkRemoveHouseSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    
+    user_ids = set(serializer.validated_data['user_ids'])
+    removed = services.bulk_remove_residents(user_ids)
+    removed_user_ids = {assignment.resident_id for assignment in removed}
+    
+    return Response({
+        'message': f'{len(removed)} casas removidas exitosamente',
+        'count': len(removed),
+        'removed': [{
+            'user_id': assignment.resident_id,
+            'property_id': assignment.property_id,
+            'property_identifier': assignment.property.full_identifier
+        } for assignment in removed],
+        'without_house': sorted(user_ids - removed_user_ids)
+    })
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def residents_without_house_view(request):
-    """Listar residentes que no tienen casa asignada"""
+    """Listar residentes que no tienen casa asignada (paginación opcional con ?page=N)"""
+    from django.db.models import Exists, OuterRef
     from apps.properties.models import PropertyResident
     
-    # Obtener residentes que no tienen asignación activa
-    assigned_resident_ids = PropertyResident.objects.filter(
-        is_active=True
-    ).values_list('resident_id', flat=True)
-    
+    # Anti-join: residentes sin ninguna asignación activa
+    active_assignment = PropertyResident.objects.filter(resident=OuterRef('pk'), is_active=True)
     residents_without_house = User.objects.filter(
+        ~Exists(active_assignment),
         profile__user_type='resident'
-    ).exclude(
-        id__in=assigned_resident_ids
-    ).select_related('profile__resident_info')
+    ).select_related('profile').order_by('id')
+    
+    if 'page' in request.query_params:
+        paginator = UserPagination()
+        page = paginator.paginate_queryset(residents_without_house, request)
+        serializer = UserDetailSerializer(page, many=True)
+        
+        return Response({
+            'message': 'Residentes sin casa asignada',
+            'count': paginator.page.paginator.count,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'residents': serializer.data
+        })
     
-    users_data = []
-    for user in residents_without_house:
-        user_data = UserDetailSerializer(user).data
-        users_data.append(user_data)
+    serializer = UserDetailSerializer(residents_without_house, many=True)
     
     return Response({
         'message': 'Residentes sin casa asignada',
-        'count': len(users_data),
-        'residents': users_data
+        'count': len(serializer.data),
+        'residents': serializer.data
     })
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def residents_with_house_view(request):
-    """Listar residentes que tienen casa asignada"""
+    """Listar residentes que tienen casa asignada (paginación opcional con ?page=N)"""
+    from django.db.models import Exists, OuterRef, Prefetch
     from apps.properties.models import PropertyResident
     
-    assignments = PropertyResident.objects.filter(
-        is_active=True
-    ).select_related('resident', 'property', 'resident__profile')
-    
-    residents_data = []
-    for assignment in assignments:
-        user_data = UserDetailSerializer(assignment.resident).data
-        user_data['house_assignment'] = {
-            'property_id': assignment.property.id,
-            'property_identifier': assignment.property.full_identifier,
-            'relationship': assignment.relationship,
-            'is_primary_resident': assignment.is_primary_resident,
-            'move_in_date': assignment.move_in_date
-        }
-        residents_data.append(user_data)
+    # Semi-join para filtrar y una sola consulta extra con las asignaciones activas y su casa
+    active_assignments = PropertyResident.objects.filter(is_active=True)
+    residents_with_house = User.objects.filter(
+        Exists(active_assignments.filter(resident=OuterRef('pk')))
+    ).prefetch_related(Prefetch(
+        'resided_properties',
+        queryset=active_assignments.select_related('property').order_by(
+            '-is_primary_resident', '-move_in_date', '-id'
+        ),
+        to_attr='active_assignments'
+    )).select_related('profile').order_by('id')
+    
+    if 'page' in request.query_params:
+        paginator = UserPagination()
+        page = paginator.paginate_queryset(residents_with_house, request)
+        serializer = ResidentWithHouseSerializer(page, many=True)
+        
+        return Response({
+            'message': 'Residentes con casa asignada',
+            'count': paginator.page.paginator.count,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'residents': serializer.data
+        })
+    
+    serializer = ResidentWithHouseSerializer(residents_with_house, many=True)
     
     return Response({
         'message': 'Residentes con casa asignada',
-        'count': len(residents_data),
-        'residents': residents_data
+        'count': len(serializer.data),
+        'residents': serializer.data
     })
 
 @api_view(['POST'])
@@ -361,44 +535,44 @@ def upload_resident_photo_view(request, user_id):
             'error': 'Debe enviar una imagen en el campo face_photo'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Actualizar la foto
+    from .images import check_image, InvalidImageError
+    from apps.uploads.queue import enqueue_upload
+    
+    try:
+        check_image(face_photo)
+    except InvalidImageError as exc:
+        return Response({
+            'error': str(exc)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Encolar: la normalización y la subida ocurren fuera de la petición
     resident_profile = user.profile.resident_info
-    resident_profile.face_photo = face_photo
-    resident_profile.save()
+    job = enqueue_upload(
+        resident_profile, 'face_photo', face_photo, processor='face_photo', created_by=request.user
+    )
     
     serializer = ResidentProfileSerializer(resident_profile)
     
     return Response({
-        'message': 'Foto actualizada exitosamente',
+        'message': 'Foto recibida, se está procesando',
+        'status': job.status,
+        'upload_id': job.id,
         'resident_profile': serializer.data
-    })
+    }, status=status.HTTP_202_ACCEPTED)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def user_stats_view(request):
-    """Obtener estadísticas de usuarios"""
-    total_users = User.objects.count()
-    
-    stats = {
-        'total_users': total_users,
-        'by_type': {},
-        'residents_by_type': {}
-    }
+    """Obtener estadísticas de usuarios
     
-    # Contar por tipo de usuario
-    for user_type, display_name in UserProfile.USER_TYPES:
-        count = UserProfile.objects.filter(user_type=user_type).count()
-        stats['by_type'][user_type] = {
-            'count': count,
-            'display_name': display_name
-        }
+    Con ?signups=day|week|month agrega las altas agrupadas por periodo.
+    """
+    from .stats import get_user_stats, SIGNUP_BUCKETS
     
-    # Contar residentes por tipo
-    for resident_type, display_name in ResidentProfile.RESIDENT_TYPES:
-        count = ResidentProfile.objects.filter(resident_type=resident_type).count()
-        stats['residents_by_type'][resident_type] = {
-            'count': count,
-            'display_name': display_name
-        }
+    signups = request.query_params.get('signups')
+    if signups and signups not in SIGNUP_BUCKETS:
+        return Response({
+            'error': f'signups debe ser uno de: {", ".join(SIGNUP_BUCKETS)}'
+        }, status=status.HTTP_400_BAD_REQUEST)
     
-    return Response(stats)
\ No newline at end of file
+    return Response(get_user_stats(signups=signups))
\ No newline at end of file
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_parking_spaces(apps, schema_editor):
+    """Crear los espacios a partir del texto libre; si varios vehículos activos
+    declaran el mismo espacio, solo el registrado primero queda asignado"""
+    Vehicle = apps.get_model('vehicles', 'Vehicle')
+    ParkingSpace = apps.get_model('vehicles', 'ParkingSpace')
+    ParkingAssignment = apps.get_model('vehicles', 'ParkingAssignment')
+    
+    first_vehicle = {}
+    for vehicle_id, parking_space in Vehicle.objects.filter(
+        is_active=True
+    ).exclude(parking_space='').order_by('id').values_list('id', 'parking_space').iterator():
+        first_vehicle.setdefault(parking_space.strip().upper(), vehicle_id)
+    
+    spaces = ParkingSpace.objects.bulk_create(
+        [ParkingSpace(code=code) for code in first_vehicle if code], batch_size=1000
+    )
+    ParkingAssignment.objects.bulk_create(
+        [ParkingAssignment(space=space, vehicle_id=first_vehicle[space.code]) for space in spaces],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0003_residency_history_indexes'),
+        ('vehicles', '0002_vehicle_license_plate_normalized'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParkingSpace',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(help_text='Ej: P-15, Sótano A-23', max_length=50, unique=True, verbose_name='Código')),
+                ('block', models.CharField(blank=True, help_text='Bloque o zona del espacio', max_length=10, verbose_name='Bloque')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Activo')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Creado')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Actualizado')),
+                ('property', models.ForeignKey(blank=True, help_text='Propiedad a la que pertenece el espacio; vacío si es de uso común', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='allocated_parking_spaces', to='properties.property')),
+            ],
+            options={
+                'verbose_name': 'Espacio de Parqueo',
+                'verbose_name_plural': 'Espacios de Parqueo',
+                'db_table': 'parking_spaces',
+                'ordering': ['block', 'code'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ParkingAssignment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Activo')),
+                ('assigned_at', models.DateTimeField(auto_now_add=True, verbose_name='Asignado')),
+                ('released_at', models.DateTimeField(blank=True, null=True, verbose_name='Liberado')),
+                ('vehicle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='parking_assignments', to='vehicles.vehicle')),
+                ('space', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assignments', to='vehicles.parkingspace')),
+            ],
+            options={
+                'verbose_name': 'Asignación de Parqueo',
+                'verbose_name_plural': 'Asignaciones de Parqueo',
+                'db_table': 'parking_assignments',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='parkingspace',
+            index=models.Index(fields=['block', 'code'], name='parking_space_block_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='parkingassignment',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('space',), name='unique_active_space_assignment'),
+        ),
+        migrations.AddConstraint(
+            model_name='parkingassignment',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('vehicle',), name='unique_active_vehicle_assignment'),
+        ),
+        migrations.RunPython(backfill_parking_spaces, migrations.RunPython.noop),
+    ]
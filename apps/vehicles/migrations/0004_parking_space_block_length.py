@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0003_parking_spaces'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='parkingspace',
+            name='block',
+            field=models.CharField(blank=True, help_text='Bloque o zona del espacio', max_length=50, verbose_name='Bloque'),
+        ),
+    ]
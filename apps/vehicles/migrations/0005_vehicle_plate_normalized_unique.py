@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-19 04:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0004_parking_space_block_length'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='vehicle',
+            constraint=models.UniqueConstraint(fields=('license_plate_normalized',), name='unique_vehicle_plate_normalized'),
+        ),
+    ]
@@ -2,6 +2,16 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from .plates import normalize_plate
+
+class VehicleQuerySet(models.QuerySet):
+    """Consultas reutilizables para vehículos"""
+    
+    def with_owner_details(self):
+        """Traer propietario, perfil y datos de residente en el mismo JOIN que usa ``VehicleSerializer``"""
+        return self.select_related('owner__profile__resident_info')
+
+
 class Vehicle(models.Model):
     """Modelo para los vehículos de los residentes"""
     
@@ -13,6 +23,10 @@ class Vehicle(models.Model):
     
     # Información básica del vehículo
     license_plate = models.CharField('Placa', max_length=20, unique=True, help_text='Ej: ABC123')
+    license_plate_normalized = models.CharField(
+        'Placa Normalizada', max_length=20, db_index=True, editable=False,
+        help_text='Placa en mayúsculas y sin separadores, para búsquedas exactas y por prefijo'
+    )
     brand = models.CharField('Marca', max_length=50, help_text='Ej: Toyota, Chevrolet')
     model = models.CharField('Modelo', max_length=50, help_text='Ej: Corolla, Spark')
     year = models.PositiveIntegerField('Año', help_text='Ej: 2020')
@@ -40,11 +54,32 @@ class Vehicle(models.Model):
     created_at = models.DateTimeField('Creado', auto_now_add=True)
     updated_at = models.DateTimeField('Actualizado', auto_now=True)
     
+    objects = VehicleQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'Vehículo'
         verbose_name_plural = 'Vehículos'
         db_table = 'vehicles'
         ordering = ['license_plate']
+        constraints = [
+            # 'ABC-123' y 'abc123' son la misma placa para la garita
+            models.UniqueConstraint(fields=['license_plate_normalized'], name='unique_vehicle_plate_normalized'),
+        ]
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Placa tal como está en la base, para invalidarla también si cambia
+        if 'license_plate' in field_names:
+            instance._loaded_plate = instance.license_plate
+        return instance
+    
+    def save(self, *args, **kwargs):
+        self.license_plate_normalized = normalize_plate(self.license_plate)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'license_plate' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'license_plate_normalized'}
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.license_plate} - {self.brand} {self.model} ({self.owner.get_full_name()})"
@@ -64,4 +99,67 @@ class Vehicle(models.Model):
         """Casa del propietario"""
         if hasattr(self.owner.profile, 'resident_info'):
             return self.owner.profile.resident_info.house_identifier
-        return "Sin casa asignada"
\ No newline at end of file
+        return "Sin casa asignada"
+
+
+def normalize_parking_code(value):
+    """' p-15 ' -> 'P-15'; mismo criterio para el registro y el texto libre de ``Vehicle``"""
+    return (value or '').strip().upper()
+
+
+class ParkingSpace(models.Model):
+    """Espacio de parqueo del condominio, opcionalmente asignado a una propiedad"""
+    
+    code = models.CharField('Código', max_length=50, unique=True, help_text='Ej: P-15, Sótano A-23')
+    block = models.CharField('Bloque', max_length=50, blank=True, help_text='Bloque o zona del espacio')
+    property = models.ForeignKey(
+        'properties.Property',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='allocated_parking_spaces',
+        help_text='Propiedad a la que pertenece el espacio; vacío si es de uso común'
+    )
+    is_active = models.BooleanField('Activo', default=True)
+    
+    # Timestamps
+    created_at = models.DateTimeField('Creado', auto_now_add=True)
+    updated_at = models.DateTimeField('Actualizado', auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Espacio de Parqueo'
+        verbose_name_plural = 'Espacios de Parqueo'
+        db_table = 'parking_spaces'
+        ordering = ['block', 'code']
+        indexes = [
+            models.Index(fields=['block', 'code'], name='parking_space_block_idx'),
+        ]
+    
+    def __str__(self):
+        return self.code
+
+
+class ParkingAssignment(models.Model):
+    """Ocupación de un espacio por un vehículo; solo una asignación activa por espacio y por vehículo"""
+    
+    space = models.ForeignKey(ParkingSpace, on_delete=models.CASCADE, related_name='assignments')
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='parking_assignments')
+    is_active = models.BooleanField('Activo', default=True)
+    assigned_at = models.DateTimeField('Asignado', auto_now_add=True)
+    released_at = models.DateTimeField('Liberado', null=True, blank=True)
+    
+    class Meta:
+        verbose_name = 'Asignación de Parqueo'
+        verbose_name_plural = 'Asignaciones de Parqueo'
+        db_table = 'parking_assignments'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['space'], condition=models.Q(is_active=True), name='unique_active_space_assignment'
+            ),
+            models.UniqueConstraint(
+                fields=['vehicle'], condition=models.Q(is_active=True), name='unique_active_vehicle_assignment'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.space.code} - {self.vehicle.license_plate}"
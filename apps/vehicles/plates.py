@@ -0,0 +1,137 @@
+"""Búsqueda de placas para la garita y la cámara de acceso.
+
+Las placas se guardan también normalizadas (mayúsculas, sin separadores) en
+``license_plate_normalized``, indexada en ``Vehicle`` y ``VisitVehicle``. Una
+consulta exacta resuelve en dos lecturas por índice (vehículo de residente y
+vehículo de visita activa) y el resultado se recuerda en un LRU con TTL corto
+del proceso, que las señales invalidan al cambiar la placa o la visita. Quien
+llama recibe una copia, así que modificarla no altera el LRU.
+"""
+import copy
+import re
+import threading
+
+from django.conf import settings
+from cachetools import TTLCache
+
+PLATE_SEPARATORS = re.compile(r'[^0-9A-Z]')
+PREFIX_LOOKUP_LIMIT = 20
+
+_lookup_cache = None
+_lookup_lock = threading.Lock()
+
+
+def normalize_plate(value):
+    """'abc-123' y 'ABC 123' -> 'ABC123'"""
+    return PLATE_SEPARATORS.sub('', (value or '').upper())
+
+
+def _resident_vehicles(**filters):
+    from .models import Vehicle
+
+    vehicles = Vehicle.objects.filter(is_active=True, **filters).select_related('owner').order_by(
+        'license_plate_normalized'
+    )
+    return [
+        {
+            'id': vehicle.id,
+            'license_plate': vehicle.license_plate,
+            'brand': vehicle.brand,
+            'model': vehicle.model,
+            'color': vehicle.color,
+            'vehicle_type': vehicle.vehicle_type,
+            'parking_space': vehicle.parking_space,
+            'owner': {'id': vehicle.owner_id, 'name': vehicle.owner.get_full_name()},
+        }
+        for vehicle in vehicles[:PREFIX_LOOKUP_LIMIT]
+    ]
+
+
+def _visitor_vehicles(**filters):
+    from apps.visitor_control.models import VisitVehicle
+
+    rows = VisitVehicle.objects.filter(visitor_log__is_active=True, **filters).order_by(
+        'license_plate_normalized', '-visitor_log__check_in_time'
+    ).values(
+        'license_plate', 'color', 'model', 'vehicle_type',
+        'visitor_log_id', 'visitor_log__full_name', 'visitor_log__check_in_time',
+        'visitor_log__property_to_visit_id',
+    )
+    return [
+        {
+            'license_plate': row['license_plate'],
+            'color': row['color'],
+            'model': row['model'],
+            'vehicle_type': row['vehicle_type'],
+            'visitor_log': {
+                'id': row['visitor_log_id'],
+                'full_name': row['visitor_log__full_name'],
+                'check_in_time': row['visitor_log__check_in_time'],
+                'property_to_visit': row['visitor_log__property_to_visit_id'],
+            },
+        }
+        for row in rows[:PREFIX_LOOKUP_LIMIT]
+    ]
+
+
+def _match_type(resident, visitor):
+    if resident:
+        return 'resident'
+    if visitor:
+        return 'visitor'
+    return None
+
+
+def lookup_plate(plate):
+    """Resolver una placa exacta; los resultados (también los negativos) quedan en el LRU"""
+    global _lookup_cache
+    normalized = normalize_plate(plate)
+
+    with _lookup_lock:
+        if _lookup_cache is not None and normalized in _lookup_cache:
+            return copy.deepcopy(_lookup_cache[normalized])
+
+    resident = _resident_vehicles(license_plate_normalized=normalized)
+    visitor = _visitor_vehicles(license_plate_normalized=normalized)
+    result = {
+        'plate': normalized,
+        'match': _match_type(resident, visitor),
+        'resident_vehicle': resident[0] if resident else None,
+        'visitor_vehicles': visitor,
+    }
+
+    with _lookup_lock:
+        if _lookup_cache is None:
+            _lookup_cache = TTLCache(
+                maxsize=settings.PLATE_LOOKUP_CACHE_SIZE, ttl=settings.PLATE_LOOKUP_CACHE_TTL
+            )
+        _lookup_cache[normalized] = result
+    return copy.deepcopy(result)
+
+
+def lookup_plate_prefix(prefix):
+    """Placas que empiezan por ``prefix`` (lectura parcial de la cámara); sin caché"""
+    normalized = normalize_plate(prefix)
+    resident = _resident_vehicles(license_plate_normalized__startswith=normalized)
+    visitor = _visitor_vehicles(license_plate_normalized__startswith=normalized)
+    return {
+        'prefix': normalized,
+        'match': _match_type(resident, visitor),
+        'resident_vehicles': resident,
+        'visitor_vehicles': visitor,
+    }
+
+
+def invalidate_plates(*plates):
+    """Olvidar las placas dadas del LRU del proceso"""
+    with _lookup_lock:
+        if _lookup_cache is None:
+            return
+        for plate in plates:
+            _lookup_cache.pop(normalize_plate(plate), None)
+
+
+def clear_plate_cache():
+    global _lookup_cache
+    with _lookup_lock:
+        _lookup_cache = None
@@ -0,0 +1,41 @@
+"""Listado de residentes para el formulario de vehículos.
+
+El número de casa sale de la misma regla que ``house_identifier``
+(``properties.services.house_property_field``) mediante una subconsulta
+anotada, y la lista se guarda en caché hasta que cambian usuarios, perfiles,
+propiedades u ocupaciones.
+"""
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Value, OuterRef
+from django.db.models.functions import Coalesce
+
+from apps.common.cache import cached_snapshot
+from apps.properties.services import house_property_field
+
+RESIDENTS_CACHE_KEY = 'vehicles:residents'
+NO_HOUSE = 'Sin casa'
+
+
+def compute_residents_for_vehicles():
+    """Residentes con el número de su casa en una sola consulta"""
+    rows = User.objects.filter(profile__user_type='resident').annotate(
+        house_number=Coalesce(house_property_field(OuterRef('pk'), 'house_number'), Value(NO_HOUSE))
+    ).order_by('first_name', 'last_name', 'id').values('id', 'first_name', 'last_name', 'house_number')
+
+    return [
+        {
+            'id': row['id'],
+            'full_name': f"{row['first_name']} {row['last_name']}".strip(),
+            'house_info': row['house_number']
+        }
+        for row in rows
+    ]
+
+
+def get_residents_for_vehicles():
+    return cached_snapshot(RESIDENTS_CACHE_KEY, compute_residents_for_vehicles)
+
+
+def invalidate_residents_for_vehicles():
+    cache.delete(RESIDENTS_CACHE_KEY)
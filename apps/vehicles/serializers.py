@@ -1,6 +1,10 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Vehicle
+from .models import Vehicle, ParkingSpace, normalize_parking_code
+from .plates import normalize_plate
+
+# ``parking_space`` se ignora al escribir: la unicidad por espacio la garantiza el registro de parqueos
+PARKING_SPACE_HELP = 'Solo lectura; se asigna con POST /api/vehicles/parking/<id>/assign/'
 
 class VehicleCreateSerializer(serializers.ModelSerializer):
     """Serializer para crear vehículos"""
@@ -13,6 +17,8 @@ class VehicleCreateSerializer(serializers.ModelSerializer):
             'license_plate', 'brand', 'model', 'year', 'color', 
             'vehicle_type', 'owner_id', 'parking_space', 'observations'
         ]
+        read_only_fields = ['parking_space']
+        extra_kwargs = {'parking_space': {'help_text': PARKING_SPACE_HELP}}
     
     def validate_owner_id(self, value):
         """Validar que el propietario existe y es residente"""
@@ -28,6 +34,8 @@ class VehicleCreateSerializer(serializers.ModelSerializer):
         """Validar formato de placa y unicidad"""
         if len(value) < 3:
             raise serializers.ValidationError("La placa debe tener al menos 3 caracteres")
+        if Vehicle.objects.filter(license_plate_normalized=normalize_plate(value)).exists():
+            raise serializers.ValidationError("Ya existe un vehículo registrado con esta placa")
         return value.upper()  # Convertir a mayúsculas
     
     def validate_year(self, value):
@@ -45,8 +53,42 @@ class VehicleCreateSerializer(serializers.ModelSerializer):
         vehicle = Vehicle.objects.create(owner=owner, **validated_data)
         return vehicle
 
+class BulkVehicleRowSerializer(VehicleCreateSerializer):
+    """Fila de registro masivo; propietario y unicidad de placa se verifican por lote"""
+    
+    class Meta(VehicleCreateSerializer.Meta):
+        extra_kwargs = {**VehicleCreateSerializer.Meta.extra_kwargs, 'license_plate': {'validators': []}}
+    
+    def validate_owner_id(self, value):
+        return value
+    
+    def validate_license_plate(self, value):
+        if len(value) < 3:
+            raise serializers.ValidationError("La placa debe tener al menos 3 caracteres")
+        return value.upper()
+
+class BulkVehicleCreateSerializer(serializers.Serializer):
+    """Serializer para registrar varios vehículos en una sola petición"""
+    
+    vehicles = serializers.ListField(child=serializers.DictField(), allow_empty=False, max_length=5000)
+
+class BulkTransferItemSerializer(serializers.Serializer):
+    """Elemento de una transferencia masiva de vehículos"""
+    
+    vehicle_id = serializers.IntegerField()
+    new_owner_id = serializers.IntegerField()
+
+class BulkTransferSerializer(serializers.Serializer):
+    """Serializer para cambiar el propietario de varios vehículos en una sola petición"""
+    
+    transfers = BulkTransferItemSerializer(many=True, allow_empty=False, max_length=5000)
+
 class VehicleSerializer(serializers.ModelSerializer):
-    """Serializer completo para mostrar vehículos"""
+    """Serializer completo para mostrar vehículos
+    
+    Usar con ``Vehicle.objects.with_owner_details()`` para no consultar el
+    perfil del propietario por cada fila.
+    """
     
     owner_name = serializers.ReadOnlyField()
     owner_house = serializers.ReadOnlyField()
@@ -82,6 +124,8 @@ class VehicleUpdateSerializer(serializers.ModelSerializer):
             'brand', 'model', 'year', 'color', 'vehicle_type',
             'parking_space', 'observations', 'is_active'
         ]
+        read_only_fields = ['parking_space']
+        extra_kwargs = {'parking_space': {'help_text': PARKING_SPACE_HELP}}
     
     def validate_year(self, value):
         """Validar que el año sea razonable"""
@@ -125,4 +169,28 @@ class ChangeVehicleOwnerSerializer(serializers.Serializer):
                 raise serializers.ValidationError("El nuevo propietario debe ser un residente")
             return value
         except User.DoesNotExist:
-            raise serializers.ValidationError("Usuario no encontrado")
\ No newline at end of file
+            raise serializers.ValidationError("Usuario no encontrado")
+
+class ParkingSpaceSerializer(serializers.ModelSerializer):
+    """Serializer para el registro de espacios de parqueo"""
+    
+    class Meta:
+        model = ParkingSpace
+        fields = ['id', 'code', 'block', 'property', 'is_active', 'created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at']
+        extra_kwargs = {'is_active': {'default': True}}
+    
+    def validate_code(self, value):
+        return normalize_parking_code(value)
+    
+    def validate(self, attrs):
+        """Un espacio de una propiedad hereda su bloque si no se indica"""
+        prop = attrs.get('property')
+        if prop and not attrs.get('block') and not getattr(self.instance, 'block', ''):
+            attrs['block'] = prop.block
+        return attrs
+
+class ParkingAssignSerializer(serializers.Serializer):
+    """Serializer para ocupar un espacio con un vehículo"""
+    
+    vehicle_id = serializers.IntegerField()
@@ -0,0 +1,104 @@
+"""Servicios de vehículos: registro y transferencia masiva, y parqueos.
+
+Las escrituras masivas van en una transacción con ``bulk_create``/``bulk_update``;
+como no disparan señales, aquí se invalidan las estadísticas y el LRU de
+placas tras el commit.
+"""
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from apps.properties.models import PropertyOccupancy
+from .models import Vehicle, ParkingAssignment, normalize_parking_code
+from .plates import normalize_plate, invalidate_plates
+from .stats import invalidate_vehicle_stats
+
+
+def bulk_register_vehicles(rows, batch_size=500):
+    """Crear vehículos a partir de filas ya validadas (``owner_id`` incluido)"""
+    vehicles = [
+        Vehicle(license_plate_normalized=normalize_plate(row['license_plate']), **row)
+        for row in rows
+    ]
+    plates = [vehicle.license_plate for vehicle in vehicles]
+    
+    with transaction.atomic():
+        Vehicle.objects.bulk_create(vehicles, batch_size=batch_size)
+        transaction.on_commit(invalidate_vehicle_stats)
+        transaction.on_commit(lambda: invalidate_plates(*plates))
+    
+    return vehicles
+
+
+def bulk_transfer_vehicles(vehicles, new_owner_ids, batch_size=500):
+    """Asignar a cada vehículo el propietario ``new_owner_ids[vehicle.id]``"""
+    now = timezone.now()
+    for vehicle in vehicles:
+        vehicle.owner_id = new_owner_ids[vehicle.id]
+        vehicle.updated_at = now
+    plates = [vehicle.license_plate for vehicle in vehicles]
+    
+    with transaction.atomic():
+        Vehicle.objects.bulk_update(vehicles, ['owner', 'updated_at'], batch_size=batch_size)
+        transaction.on_commit(invalidate_vehicle_stats)
+        transaction.on_commit(lambda: invalidate_plates(*plates))
+    
+    return vehicles
+
+
+class ParkingConflictError(Exception):
+    """El espacio ya está ocupado por otro vehículo o no corresponde al propietario"""
+
+
+def assign_parking_space(space, vehicle):
+    """Asignar ``space`` a ``vehicle``, liberando el espacio anterior del vehículo
+    
+    La unicidad de la asignación activa la garantiza el índice parcial de
+    ``ParkingAssignment``; si otra petición gana la carrera se levanta
+    ``ParkingConflictError``.
+    """
+    if space.property_id and not PropertyOccupancy.objects.filter(
+        property_id=space.property_id, user_id=vehicle.owner_id, is_active=True
+    ).exists():
+        raise ParkingConflictError('El espacio está asignado a una propiedad que no es del propietario del vehículo')
+    
+    now = timezone.now()
+    with transaction.atomic():
+        ParkingAssignment.objects.filter(vehicle=vehicle, is_active=True).exclude(space=space).update(
+            is_active=False, released_at=now
+        )
+        try:
+            with transaction.atomic():
+                assignment, _ = ParkingAssignment.objects.get_or_create(
+                    space=space, vehicle=vehicle, is_active=True
+                )
+        except IntegrityError:
+            raise ParkingConflictError(f'El espacio {space.code} ya está ocupado')
+        
+        # Se conserva el texto libre para los clientes que aún lo leen
+        Vehicle.objects.filter(pk=vehicle.pk).update(parking_space=space.code, updated_at=now)
+        plate = vehicle.license_plate
+        transaction.on_commit(lambda: invalidate_plates(plate))
+    
+    return assignment
+
+
+def release_parking_space(space):
+    """Liberar el espacio; retorna la asignación cerrada o None si estaba libre"""
+    now = timezone.now()
+    with transaction.atomic():
+        assignment = ParkingAssignment.objects.select_for_update().filter(
+            space=space, is_active=True
+        ).select_related('vehicle').first()
+        if assignment is None:
+            return None
+        
+        assignment.is_active = False
+        assignment.released_at = now
+        assignment.save(update_fields=['is_active', 'released_at'])
+        # El texto libre puede venir de antes del registro, en minúsculas o con espacios
+        if normalize_parking_code(assignment.vehicle.parking_space) == normalize_parking_code(space.code):
+            Vehicle.objects.filter(pk=assignment.vehicle_id).update(parking_space='', updated_at=now)
+        plate = assignment.vehicle.license_plate
+        transaction.on_commit(lambda: invalidate_plates(plate))
+    
+    return assignment
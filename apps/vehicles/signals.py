@@ -0,0 +1,90 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.properties.models import Property, PropertyResident
+from apps.properties.services import occupancy_changed
+from apps.users.models import UserProfile
+from apps.visitor_control.models import VisitorLog, VisitVehicle
+from .models import Vehicle, ParkingAssignment
+from .plates import invalidate_plates
+from .residents import invalidate_residents_for_vehicles
+from .stats import invalidate_vehicle_stats
+
+
+@receiver(post_save, sender=Vehicle)
+@receiver(post_delete, sender=Vehicle)
+@receiver(post_save, sender=VisitVehicle)
+@receiver(post_delete, sender=VisitVehicle)
+def invalidate_plate_on_vehicle_change(sender, instance, **kwargs):
+    # Al renombrar la placa, la anterior también queda recordada en el LRU
+    plates = {instance.license_plate, getattr(instance, '_loaded_plate', None)} - {None}
+    instance._loaded_plate = instance.license_plate
+    transaction.on_commit(lambda: invalidate_plates(*plates))
+
+
+@receiver(post_save, sender=Vehicle)
+def release_parking_on_deactivation(sender, instance, created=False, **kwargs):
+    # Un vehículo inactivo no retiene su espacio de parqueo
+    if created or instance.is_active:
+        return
+    ParkingAssignment.objects.filter(vehicle=instance, is_active=True).update(
+        is_active=False, released_at=timezone.now()
+    )
+
+
+@receiver(post_save, sender=Vehicle)
+@receiver(post_delete, sender=Vehicle)
+def invalidate_stats_on_vehicle_change(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_vehicle_stats)
+
+
+@receiver(post_save, sender=VisitorLog)
+def invalidate_plate_on_check_out(sender, instance, created=False, **kwargs):
+    # El vehículo de una visita nueva se registra después; solo interesan las salidas
+    if created:
+        return
+    plates = list(VisitVehicle.objects.filter(visitor_log_id=instance.id).values_list('license_plate', flat=True))
+    if plates:
+        transaction.on_commit(lambda: invalidate_plates(*plates))
+
+
+# Campos de ``User`` que aparecen en el listado de residentes
+RESIDENT_USER_FIELDS = {'first_name', 'last_name'}
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_residents_on_user_change(sender, instance, created=False, update_fields=None, **kwargs):
+    # Los guardados parciales de otros campos (p. ej. last_login) no cambian el listado
+    if kwargs.get('signal') is post_save and not created and update_fields is not None \
+            and not RESIDENT_USER_FIELDS & set(update_fields):
+        return
+    transaction.on_commit(invalidate_residents_for_vehicles)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_save, sender=Property)
+@receiver(post_delete, sender=Property)
+@receiver(post_save, sender=PropertyResident)
+@receiver(post_delete, sender=PropertyResident)
+def invalidate_residents_on_change(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_residents_for_vehicles)
+
+
+@receiver(post_save, sender=Property)
+@receiver(post_delete, sender=Property)
+@receiver(post_save, sender=PropertyResident)
+@receiver(post_delete, sender=PropertyResident)
+def invalidate_stats_on_property_change(sender, instance, **kwargs):
+    # El desglose por bloque depende del bloque de las casas que ocupa el propietario
+    transaction.on_commit(invalidate_vehicle_stats)
+
+
+@receiver(occupancy_changed)
+def invalidate_on_occupancy_change(sender, property_ids, **kwargs):
+    invalidate_residents_for_vehicles()
+    invalidate_vehicle_stats()
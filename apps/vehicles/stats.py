@@ -0,0 +1,69 @@
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db.models import Count, F, FilteredRelation, Q
+
+from apps.common.cache import cached_snapshot
+from .models import Vehicle
+
+VEHICLE_STATS_CACHE_KEY = 'vehicles:stats'
+NO_BLOCK = 'Sin bloque'
+
+
+def compute_vehicle_stats():
+    """Calcular estadísticas con dos agregados condicionales sobre ``vehicles``
+    
+    Totales y tipos salen de una sola fila; el desglose por bloque, de una
+    consulta agrupada unida a las ocupaciones activas del propietario. Un
+    vehículo cuyo propietario ocupa casas en varios bloques cuenta en cada uno.
+    """
+    types = [vehicle_type for vehicle_type, _ in Vehicle.VEHICLE_TYPES]
+    totals = Vehicle.objects.aggregate(
+        active=Count('id', filter=Q(is_active=True)),
+        inactive=Count('id', filter=Q(is_active=False)),
+        **{
+            f'type_{vehicle_type}': Count('id', filter=Q(is_active=True, vehicle_type=vehicle_type))
+            for vehicle_type in types
+        }
+    )
+    
+    rows = Vehicle.objects.filter(is_active=True).annotate(
+        occupancy=FilteredRelation('owner__occupancies', condition=Q(owner__occupancies__is_active=True))
+    ).order_by().values(block=F('occupancy__property__block')).annotate(**{
+        f'type_{vehicle_type}': Count('id', filter=Q(vehicle_type=vehicle_type), distinct=True)
+        for vehicle_type in types
+    })
+    by_block = defaultdict(lambda: defaultdict(int))
+    for row in rows:
+        # Bloque vacío y sin ocupación activa se agrupan juntos
+        counts = by_block[row['block'] or NO_BLOCK]
+        for vehicle_type in types:
+            counts[vehicle_type] += row[f'type_{vehicle_type}']
+    
+    return {
+        'total_vehicles': totals['active'],
+        'by_type': {
+            vehicle_type: {
+                'count': totals[f'type_{vehicle_type}'],
+                'display_name': display_name
+            }
+            for vehicle_type, display_name in Vehicle.VEHICLE_TYPES
+        },
+        'by_block': {
+            block: {
+                'count': sum(counts.values()),
+                'by_type': {vehicle_type: counts[vehicle_type] for vehicle_type, _ in Vehicle.VEHICLE_TYPES}
+            }
+            for block, counts in sorted(by_block.items())
+        },
+        'active_vehicles': totals['active'],
+        'inactive_vehicles': totals['inactive'],
+    }
+
+
+def get_vehicle_stats():
+    return cached_snapshot(VEHICLE_STATS_CACHE_KEY, compute_vehicle_stats)
+
+
+def invalidate_vehicle_stats():
+    cache.delete(VEHICLE_STATS_CACHE_KEY)
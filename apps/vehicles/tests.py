@@ -1,3 +1,287 @@
+from datetime import date
+from unittest import mock
+
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import IntegrityError, connection
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.users.models import UserProfile, ResidentProfile
+from .models import Vehicle, ParkingSpace, ParkingAssignment
+from apps.properties.models import Property
+from . import services
+from .stats import compute_vehicle_stats
+from .plates import lookup_plate, clear_plate_cache
+
+class VehicleQueryCountTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='testadmin')
+        self.client.force_authenticate(user=self.admin)
+        self.owners = []
+        for index in range(10):
+            user = User.objects.create_user(username=f'owner{index}', first_name=f'Owner{index}')
+            profile = UserProfile.objects.create(user=user, user_type='resident')
+            # La mitad sin datos de residente para cubrir 'Sin casa asignada'
+            if index % 2 == 0:
+                ResidentProfile.objects.create(
+                    user_profile=profile, resident_type='owner',
+                    birth_date=date(1990, 1, 1), house_identifier=f'Casa {index}'
+                )
+            self.owners.append(user)
+        self.created = 0
+
+    def _add_vehicles(self, count):
+        vehicles = []
+        for _ in range(count):
+            plate = f'TST{self.created:04d}'
+            vehicles.append(Vehicle(
+                license_plate=plate, license_plate_normalized=plate, brand='Toyota', model='Corolla',
+                year=2020, color='Blanco', vehicle_type='light',
+                owner=self.owners[self.created % len(self.owners)]
+            ))
+            self.created += 1
+        Vehicle.objects.bulk_create(vehicles)
+
+    def _query_count(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries), response
+
+    def test_vehicles_by_type_constant_queries(self):
+        """Los datos del propietario llegan en el mismo JOIN, sin consultas por fila"""
+        url = reverse('vehicles:vehicles_by_type', args=['light'])
+        self._add_vehicles(10)
+        small, response = self._query_count(url)
+        self.assertEqual(response.data['count'], 10)
+
+        self._add_vehicles(990)
+        large, response = self._query_count(url)
+        self.assertEqual(response.data['count'], 1000)
+        self.assertEqual(small, large)
+
+        vehicles = {vehicle['license_plate']: vehicle for vehicle in response.data['vehicles']}
+        self.assertEqual(vehicles['TST0000']['owner_house'], 'Casa 0')
+        self.assertEqual(vehicles['TST0001']['owner_details']['house'], 'Sin casa asignada')
+
+    def test_vehicle_list_and_resident_constant_queries(self):
+        self._add_vehicles(10)
+        list_small, _ = self._query_count(reverse('vehicles:vehicle_list_create'))
+        resident_url = reverse('vehicles:vehicles_by_resident', args=[self.owners[0].id])
+        resident_small, _ = self._query_count(resident_url)
+
+        self._add_vehicles(990)
+        list_large, _ = self._query_count(reverse('vehicles:vehicle_list_create'))
+        resident_large, response = self._query_count(resident_url)
+        self.assertEqual(response.data['vehicle_count'], 100)
+        self.assertEqual(list_small, list_large)
+        self.assertEqual(resident_small, resident_large)
+
+
+class ParkingSpaceTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='testadmin')
+        self.client.force_authenticate(user=self.admin)
+        self.owner = User.objects.create_user(username='owner')
+        UserProfile.objects.create(user=self.owner, user_type='resident')
+        self.space = ParkingSpace.objects.create(code='P-15')
+
+    def test_parking_space_is_ignored_on_write(self):
+        """Crear o editar un vehículo no toma un espacio fuera del registro, pero acepta el payload"""
+        data = {
+            'license_plate': 'ABC123', 'brand': 'Toyota', 'model': 'Corolla', 'year': 2020,
+            'color': 'Blanco', 'vehicle_type': 'light', 'owner_id': self.owner.id, 'parking_space': 'P-15'
+        }
+        response = self.client.post(reverse('vehicles:vehicle_list_create'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        vehicle = Vehicle.objects.get()
+        self.assertEqual(vehicle.parking_space, '')
+
+        response = self.client.patch(
+            reverse('vehicles:vehicle_detail', args=[vehicle.id]),
+            {'parking_space': 'P-15', 'color': 'Negro'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        vehicle.refresh_from_db()
+        self.assertEqual((vehicle.parking_space, vehicle.color), ('', 'Negro'))
+        self.assertFalse(ParkingAssignment.objects.exists())
+
+    def test_release_clears_legacy_free_text(self):
+        vehicle = Vehicle.objects.create(
+            license_plate='XYZ789', brand='Kia', model='Rio', year=2021, color='Rojo',
+            vehicle_type='light', owner=self.owner, parking_space=' p-15'
+        )
+        ParkingAssignment.objects.create(space=self.space, vehicle=vehicle)
+
+        services.release_parking_space(self.space)
+        vehicle.refresh_from_db()
+        self.assertEqual(vehicle.parking_space, '')
+
+
+class PlateLookupCacheTests(TestCase):
+    def setUp(self):
+        clear_plate_cache()
+        self.addCleanup(clear_plate_cache)
+        self.owner = User.objects.create_user(username='owner')
+
+    def test_renamed_plate_is_evicted(self):
+        """Cambiar la placa invalida también la anterior, ya recordada en el LRU"""
+        Vehicle.objects.create(
+            license_plate='ABC-123', brand='Kia', model='Rio', year=2021, color='Rojo',
+            vehicle_type='light', owner=self.owner
+        )
+        self.assertEqual(lookup_plate('ABC123')['match'], 'resident')
+        self.assertIsNone(lookup_plate('XYZ789')['match'])
+
+        vehicle = Vehicle.objects.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            vehicle.license_plate = 'XYZ-789'
+            vehicle.save()
+
+        self.assertIsNone(lookup_plate('ABC123')['match'])
+        self.assertEqual(lookup_plate('XYZ789')['match'], 'resident')
+
+
+    def test_lookup_returns_a_copy(self):
+        """Modificar el resultado no altera lo recordado en el LRU"""
+        Vehicle.objects.create(
+            license_plate='ABC-123', brand='Kia', model='Rio', year=2021, color='Rojo',
+            vehicle_type='light', owner=self.owner
+        )
+        result = lookup_plate('ABC123')
+        result['match'] = None
+        result['resident_vehicle']['owner']['name'] = 'Otro'
+        cached = lookup_plate('ABC123')
+        self.assertEqual(cached['match'], 'resident')
+        self.assertNotEqual(cached['resident_vehicle']['owner']['name'], 'Otro')
+
+    def test_normalized_plate_is_unique(self):
+        Vehicle.objects.create(
+            license_plate='ABC-123', brand='Kia', model='Rio', year=2021, color='Rojo',
+            vehicle_type='light', owner=self.owner
+        )
+        with self.assertRaises(IntegrityError):
+            Vehicle.objects.create(
+                license_plate='abc 123', brand='Kia', model='Rio', year=2021, color='Rojo',
+                vehicle_type='light', owner=self.owner
+            )
+
+class VehicleStatsTests(TestCase):
+    def _vehicle(self, plate, owner, vehicle_type='light', is_active=True):
+        return Vehicle.objects.create(
+            license_plate=plate, brand='Toyota', model='Corolla', year=2020, color='Blanco',
+            vehicle_type=vehicle_type, owner=owner, is_active=is_active
+        )
+
+    def test_stats_by_type_and_block(self):
+        """Los totales cuentan cada vehículo una vez; el bloque sale de las casas del propietario"""
+        owner_a = User.objects.create_user(username='owner_a')
+        owner_ab = User.objects.create_user(username='owner_ab')
+        homeless = User.objects.create_user(username='homeless')
+        Property.objects.create(house_number='1', block='A', area_m2=80, owner=owner_a)
+        Property.objects.create(house_number='2', block='A', area_m2=80, owner=owner_ab)
+        Property.objects.create(house_number='3', block='B', area_m2=80, owner=owner_ab)
+
+        self._vehicle('AAA111', owner_a)
+        self._vehicle('AAA222', owner_a, vehicle_type='motorcycle')
+        self._vehicle('BBB111', owner_ab)
+        self._vehicle('CCC111', homeless)
+        self._vehicle('DDD111', owner_a, is_active=False)
+
+        with CaptureQueriesContext(connection) as queries:
+            stats = compute_vehicle_stats()
+        self.assertEqual(len(queries), 2)
+
+        self.assertEqual(stats['total_vehicles'], 4)
+        self.assertEqual(stats['inactive_vehicles'], 1)
+        self.assertEqual(stats['by_type']['light']['count'], 3)
+        self.assertEqual(stats['by_type']['motorcycle']['count'], 1)
+        self.assertEqual(
+            {block: row['count'] for block, row in stats['by_block'].items()},
+            {'A': 3, 'B': 1, 'Sin bloque': 1}
+        )
+        self.assertEqual(stats['by_block']['A']['by_type']['motorcycle'], 1)
+
+
+class BulkVehicleTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='testadmin')
+        self.client.force_authenticate(user=self.admin)
+        self.owner = User.objects.create_user(username='owner')
+        UserProfile.objects.create(user=self.owner, user_type='resident')
+        self.new_owner = User.objects.create_user(username='new_owner')
+        UserProfile.objects.create(user=self.new_owner, user_type='resident')
+
+    def _row(self, plate, owner_id=None):
+        return {
+            'license_plate': plate, 'brand': 'Toyota', 'model': 'Corolla', 'year': 2020,
+            'color': 'Blanco', 'vehicle_type': 'light', 'owner_id': owner_id or self.owner.id
+        }
+
+    def _vehicle(self, plate):
+        return Vehicle.objects.create(
+            license_plate=plate, brand='Kia', model='Rio', year=2021, color='Rojo',
+            vehicle_type='light', owner=self.owner
+        )
+
+    def test_bulk_register_reports_invalid_rows(self):
+        self._vehicle('TAKEN1')
+        response = self.client.post(reverse('vehicles:bulk_register_vehicles'), {'vehicles': [
+            self._row('abc-123'),
+            self._row('ABC 123'),
+            self._row('taken-1'),
+            self._row('XYZ789', owner_id=self.admin.id),
+            self._row('NEW456'),
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2, 3])
+        self.assertEqual(
+            set(Vehicle.objects.values_list('license_plate_normalized', flat=True)),
+            {'TAKEN1', 'ABC123', 'NEW456'}
+        )
+
+    def test_bulk_register_concurrent_plate_is_a_conflict(self):
+        """Una placa registrada por otra petición tras la verificación no produce un 500"""
+        register = services.bulk_register_vehicles
+
+        def register_after_concurrent_insert(rows, **kwargs):
+            self._vehicle('RACE01')
+            return register(rows, **kwargs)
+
+        with mock.patch.object(services, 'bulk_register_vehicles', side_effect=register_after_concurrent_insert):
+            response = self.client.post(reverse('vehicles:bulk_register_vehicles'), {'vehicles': [
+                self._row('OK0001'), self._row('RACE01'),
+            ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('error', response.data)
+        self.assertFalse(Vehicle.objects.filter(license_plate='OK0001').exists())
+
+    def test_bulk_transfer(self):
+        first, second = self._vehicle('AAA111'), self._vehicle('BBB222')
+        response = self.client.post(reverse('vehicles:bulk_transfer_vehicles'), {'transfers': [
+            {'vehicle_id': first.id, 'new_owner_id': self.new_owner.id},
+            {'vehicle_id': first.id, 'new_owner_id': self.new_owner.id},
+            {'vehicle_id': second.id, 'new_owner_id': self.owner.id},
+            {'vehicle_id': second.id, 'new_owner_id': self.admin.id},
+            {'vehicle_id': 0, 'new_owner_id': self.new_owner.id},
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['transfers'][0]['owner_id'], self.new_owner.id)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2, 3, 4])
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.owner_id, second.owner_id), (self.new_owner.id, self.owner.id))
 
-# Create your tests here.
+        response = self.client.post(reverse('vehicles:bulk_transfer_vehicles'), {'transfers': [
+            {'vehicle_id': first.id, 'new_owner_id': self.new_owner.id},
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -15,10 +15,22 @@ urlpatterns = [
     path('type/<str:vehicle_type>/', views.vehicles_by_type_view, name='vehicles_by_type'),
     path('resident/<int:resident_id>/', views.vehicles_by_resident_view, name='vehicles_by_resident'),
     path('search/', views.search_vehicles_view, name='search_vehicles'),
+    path('plate-lookup/', views.plate_lookup_view, name='plate_lookup'),
     
     # Gestión de propietarios
     path('<int:vehicle_id>/change-owner/', views.change_vehicle_owner_view, name='change_vehicle_owner'),
     
+    # Operaciones masivas
+    path('bulk/', views.bulk_register_vehicles_view, name='bulk_register_vehicles'),
+    path('bulk/transfer/', views.bulk_transfer_vehicles_view, name='bulk_transfer_vehicles'),
+    
+    # Espacios de parqueo
+    path('parking/', views.ParkingSpaceListCreateView.as_view(), name='parking_space_list_create'),
+    path('parking/<int:pk>/', views.ParkingSpaceDetailView.as_view(), name='parking_space_detail'),
+    path('parking/<int:space_id>/assign/', views.assign_parking_space_view, name='assign_parking_space'),
+    path('parking/<int:space_id>/release/', views.release_parking_space_view, name='release_parking_space'),
+    path('parking/occupancy/<str:block>/', views.parking_occupancy_view, name='parking_occupancy'),
+    
     # Estadísticas
     path('stats/', views.vehicle_stats_view, name='vehicle_stats'),
 ]
\ No newline at end of file
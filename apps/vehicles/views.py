@@ -2,20 +2,36 @@ from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.pagination import PageNumberPagination
 from django.contrib.auth.models import User
-from django.db.models import Q
-from .models import Vehicle
+from django.db.models import Q, FilteredRelation
+from django.db import IntegrityError, transaction
+from .models import Vehicle, ParkingSpace
+from .plates import normalize_plate, lookup_plate, lookup_plate_prefix
+from .residents import get_residents_for_vehicles
+from .stats import get_vehicle_stats
 from .serializers import (
     VehicleCreateSerializer,
     VehicleSerializer,
     VehicleUpdateSerializer,
     ResidentForVehicleSerializer,
-    ChangeVehicleOwnerSerializer
+    ChangeVehicleOwnerSerializer,
+    BulkVehicleCreateSerializer,
+    BulkVehicleRowSerializer,
+    BulkTransferSerializer,
+    ParkingSpaceSerializer,
+    ParkingAssignSerializer
 )
+from . import services
+
+class VehiclePagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
 
 class VehicleListCreateView(generics.ListCreateAPIView):
     """Vista para listar todos los vehículos y crear nuevos"""
-    queryset = Vehicle.objects.all().select_related('owner')
+    queryset = Vehicle.objects.with_owner_details()
     permission_classes = [IsAuthenticated]
     
     def get_serializer_class(self):
@@ -30,7 +46,7 @@ class VehicleListCreateView(generics.ListCreateAPIView):
         vehicle = serializer.save()
         
         # Retornar el vehículo creado con datos completos
-        response_serializer = VehicleSerializer(vehicle)
+        response_serializer = VehicleSerializer(Vehicle.objects.with_owner_details().get(pk=vehicle.pk))
         
         return Response({
             'message': 'Vehículo registrado exitosamente',
@@ -39,7 +55,7 @@ class VehicleListCreateView(generics.ListCreateAPIView):
 
 class VehicleDetailView(generics.RetrieveUpdateDestroyAPIView):
     """Vista para ver, actualizar y eliminar un vehículo específico"""
-    queryset = Vehicle.objects.all().select_related('owner')
+    queryset = Vehicle.objects.with_owner_details()
     permission_classes = [IsAuthenticated]
     
     def get_serializer_class(self):
@@ -61,37 +77,22 @@ class VehicleDetailView(generics.RetrieveUpdateDestroyAPIView):
 @permission_classes([IsAuthenticated])
 def residents_for_vehicles_view(request):
     """Obtener lista de residentes disponibles para asignar vehículos"""
-    # Obtener residentes con sus casas
-    residents = User.objects.filter(
-        profile__user_type='resident'
-    ).select_related('profile__resident_info')
-    
-    residents_data = []
-    for resident in residents:
-        house_number = 'Sin casa'
-        
-        # Obtener solo el número de la casa si existe
-        if hasattr(resident.profile, 'resident_info'):
-            house_id = resident.profile.resident_info.house_identifier
-            if house_id:
-                # Extraer solo el número de casa del identificador completo
-                import re
-                # Buscar todos los números en el string
-                numbers = re.findall(r'\d+', house_id)
-                if numbers:
-                    # Tomar el primer número encontrado (que debería ser el número de casa)
-                    house_number = numbers[0]
-                else:
-                    house_number = house_id.strip()
+    residents = get_residents_for_vehicles()
+    
+    if 'page' in request.query_params:
+        paginator = VehiclePagination()
+        page = paginator.paginate_queryset(residents, request)
         
-        residents_data.append({
-            'full_name': resident.get_full_name(),
-            'house_info': house_number
+        return Response({
+            'count': paginator.page.paginator.count,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'residents': page
         })
     
     return Response({
-        'count': len(residents_data),
-        'residents': residents_data
+        'count': len(residents),
+        'residents': residents
     })
 
 @api_view(['GET'])
@@ -107,7 +108,7 @@ def vehicles_by_type_view(request, vehicle_type):
     
     vehicles = Vehicle.objects.filter(
         vehicle_type=vehicle_type, is_active=True
-    ).select_related('owner')
+    ).with_owner_details()
     
     serializer = VehicleSerializer(vehicles, many=True)
     
@@ -125,7 +126,7 @@ def vehicles_by_type_view(request, vehicle_type):
 def vehicles_by_resident_view(request, resident_id):
     """Obtener todos los vehículos de un residente específico"""
     try:
-        resident = User.objects.get(id=resident_id)
+        resident = User.objects.select_related('profile__resident_info').get(id=resident_id)
         if resident.profile.user_type != 'resident':
             return Response({
                 'error': 'El usuario debe ser de tipo residente'
@@ -137,7 +138,7 @@ def vehicles_by_resident_view(request, resident_id):
     
     vehicles = Vehicle.objects.filter(
         owner=resident, is_active=True
-    )
+    ).with_owner_details()
     
     serializer = VehicleSerializer(vehicles, many=True)
     
@@ -156,7 +157,7 @@ def vehicles_by_resident_view(request, resident_id):
 def change_vehicle_owner_view(request, vehicle_id):
     """Cambiar el propietario de un vehículo"""
     try:
-        vehicle = Vehicle.objects.get(id=vehicle_id)
+        vehicle = Vehicle.objects.select_related('owner').get(id=vehicle_id)
     except Vehicle.DoesNotExist:
         return Response({
             'error': 'Vehículo no encontrado'
@@ -173,13 +174,132 @@ def change_vehicle_owner_view(request, vehicle_id):
     vehicle.owner = new_owner
     vehicle.save()
     
-    response_serializer = VehicleSerializer(vehicle)
+    response_serializer = VehicleSerializer(Vehicle.objects.with_owner_details().get(pk=vehicle.pk))
     
     return Response({
         'message': f'Propietario del vehículo {vehicle.license_plate} cambiado de {old_owner_name} a {new_owner.get_full_name()}',
         'vehicle': response_serializer.data
     })
 
+def _owner_error(owner):
+    """Mensaje de error si ``owner`` no puede ser propietario, o None"""
+    if owner is None:
+        return 'Usuario no encontrado'
+    if not hasattr(owner, 'profile') or owner.profile.user_type != 'resident':
+        return 'El propietario debe ser un residente'
+    return None
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_register_vehicles_view(request):
+    """Registrar varios vehículos en una sola petición
+    
+    Las filas inválidas se reportan en ``errors`` con su índice y el resto se crea.
+    """
+    serializer = BulkVehicleCreateSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    rows = serializer.validated_data['vehicles']
+    
+    errors = []
+    validated = []
+    for index, row in enumerate(rows):
+        row_serializer = BulkVehicleRowSerializer(data=row)
+        if row_serializer.is_valid():
+            validated.append((index, row_serializer.validated_data))
+        else:
+            errors.append({'index': index, 'errors': row_serializer.errors})
+    
+    # Una consulta por verificación sobre todo el lote
+    owners = User.objects.filter(
+        id__in={row['owner_id'] for _, row in validated}
+    ).select_related('profile').in_bulk()
+    taken = set(Vehicle.objects.filter(
+        license_plate_normalized__in={normalize_plate(row['license_plate']) for _, row in validated}
+    ).values_list('license_plate_normalized', flat=True))
+    
+    valid = []
+    for index, row in validated:
+        plate = normalize_plate(row['license_plate'])
+        error = _owner_error(owners.get(row['owner_id']))
+        if error:
+            errors.append({'index': index, 'errors': {'owner_id': [error]}})
+            continue
+        if plate in taken:
+            errors.append({'index': index, 'errors': {'license_plate': ['Ya existe un vehículo registrado con esta placa']}})
+            continue
+        
+        taken.add(plate)
+        valid.append(row)
+    
+    errors.sort(key=lambda error: error['index'])
+    try:
+        vehicles = services.bulk_register_vehicles(valid) if valid else []
+    except IntegrityError:
+        # Otra petición registró alguna de las placas entre la verificación y la inserción
+        return Response({
+            'error': 'Otra petición registró alguno de estos vehículos; no se creó ninguno. Reintente el lote.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'message': f'{len(vehicles)} vehículos registrados exitosamente',
+        'count': len(vehicles),
+        'vehicles': [{'id': vehicle.id, 'license_plate': vehicle.license_plate} for vehicle in vehicles],
+        'errors': errors
+    }, status=status.HTTP_201_CREATED if vehicles else status.HTTP_400_BAD_REQUEST)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_transfer_vehicles_view(request):
+    """Cambiar el propietario de varios vehículos en una sola petición"""
+    serializer = BulkTransferSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    items = serializer.validated_data['transfers']
+    
+    with transaction.atomic():
+        # Bloquear los vehículos para que otra transferencia no se cruce con esta
+        vehicles = Vehicle.objects.select_for_update().filter(
+            id__in={item['vehicle_id'] for item in items}
+        ).in_bulk()
+        owners = User.objects.filter(
+            id__in={item['new_owner_id'] for item in items}
+        ).select_related('profile').in_bulk()
+        
+        errors = []
+        new_owner_ids = {}
+        for index, item in enumerate(items):
+            vehicle = vehicles.get(item['vehicle_id'])
+            error = None
+            if vehicle is None:
+                error = 'Vehículo no encontrado'
+            elif item['vehicle_id'] in new_owner_ids:
+                error = 'El vehículo aparece más de una vez en la petición'
+            elif vehicle.owner_id == item['new_owner_id']:
+                error = 'El vehículo ya pertenece a este propietario'
+            else:
+                error = _owner_error(owners.get(item['new_owner_id']))
+            
+            if error:
+                errors.append({'index': index, 'vehicle_id': item['vehicle_id'], 'error': error})
+                continue
+            
+            new_owner_ids[item['vehicle_id']] = item['new_owner_id']
+        
+        transferred = services.bulk_transfer_vehicles(
+            [vehicles[vehicle_id] for vehicle_id in new_owner_ids], new_owner_ids
+        ) if new_owner_ids else []
+    
+    return Response({
+        'message': f'{len(transferred)} vehículos transferidos exitosamente',
+        'count': len(transferred),
+        'transfers': [{
+            'vehicle_id': vehicle.id,
+            'license_plate': vehicle.license_plate,
+            'owner_id': vehicle.owner_id,
+            'owner_name': owners[vehicle.owner_id].get_full_name()
+        } for vehicle in transferred],
+        'errors': errors
+    }, status=status.HTTP_200_OK if transferred else status.HTTP_400_BAD_REQUEST)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def search_vehicles_view(request):
@@ -191,14 +311,18 @@ def search_vehicles_view(request):
             'error': 'Parámetro de búsqueda "q" es requerido'
         }, status=status.HTTP_400_BAD_REQUEST)
     
+    # La placa se compara normalizada: 'abc-123' encuentra 'ABC123'
+    plate_query = normalize_plate(query)
+    plate_filter = Q(license_plate_normalized__contains=plate_query) if plate_query else Q(pk__in=[])
+    
     vehicles = Vehicle.objects.filter(
-        Q(license_plate__icontains=query) |
+        plate_filter |
         Q(brand__icontains=query) |
         Q(model__icontains=query) |
         Q(owner__first_name__icontains=query) |
         Q(owner__last_name__icontains=query),
         is_active=True
-    ).select_related('owner')
+    ).with_owner_details()
     
     serializer = VehicleSerializer(vehicles, many=True)
     
@@ -208,25 +332,148 @@ def search_vehicles_view(request):
         'vehicles': serializer.data
     })
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def plate_lookup_view(request):
+    """Identificar una placa como vehículo de residente o de visita activa (garita / cámara)
+    
+    ``?plate=`` busca la placa exacta; con ``?prefix=true`` busca las placas
+    que empiezan por el valor dado.
+    """
+    plate = normalize_plate(request.GET.get('plate', ''))
+    
+    if not plate:
+        return Response({
+            'error': 'Parámetro "plate" es requerido'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if request.GET.get('prefix', '').lower() in ('1', 'true'):
+        return Response(lookup_plate_prefix(plate))
+    return Response(lookup_plate(plate))
+
+class ParkingSpaceListCreateView(generics.ListCreateAPIView):
+    """Vista para listar (``?block=``) y registrar espacios de parqueo"""
+    serializer_class = ParkingSpaceSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        queryset = ParkingSpace.objects.all()
+        block = self.request.query_params.get('block')
+        if block:
+            queryset = queryset.filter(block=block)
+        return queryset
+
+class ParkingSpaceDetailView(generics.RetrieveUpdateDestroyAPIView):
+    """Vista para ver, actualizar y eliminar un espacio de parqueo"""
+    queryset = ParkingSpace.objects.all()
+    serializer_class = ParkingSpaceSerializer
+    permission_classes = [IsAuthenticated]
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def assign_parking_space_view(request, space_id):
+    """Ocupar un espacio de parqueo con un vehículo activo"""
+    try:
+        space = ParkingSpace.objects.get(id=space_id, is_active=True)
+    except ParkingSpace.DoesNotExist:
+        return Response({
+            'error': 'Espacio de parqueo no encontrado'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    serializer = ParkingAssignSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    
+    try:
+        vehicle = Vehicle.objects.get(id=serializer.validated_data['vehicle_id'], is_active=True)
+    except Vehicle.DoesNotExist:
+        return Response({
+            'error': 'Vehículo no encontrado'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        assignment = services.assign_parking_space(space, vehicle)
+    except services.ParkingConflictError as exc:
+        return Response({
+            'error': str(exc)
+        }, status=status.HTTP_409_CONFLICT)
+    
+    return Response({
+        'message': f'Espacio {space.code} asignado al vehículo {vehicle.license_plate}',
+        'space_id': space.id,
+        'vehicle_id': vehicle.id,
+        'assigned_at': assignment.assigned_at
+    })
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def release_parking_space_view(request, space_id):
+    """Liberar un espacio de parqueo"""
+    try:
+        space = ParkingSpace.objects.get(id=space_id)
+    except ParkingSpace.DoesNotExist:
+        return Response({
+            'error': 'Espacio de parqueo no encontrado'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    assignment = services.release_parking_space(space)
+    if assignment is None:
+        return Response({
+            'error': f'El espacio {space.code} no está ocupado'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'message': f'Espacio {space.code} liberado exitosamente',
+        'space_id': space.id,
+        'vehicle_id': assignment.vehicle_id,
+        'released_at': assignment.released_at
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def parking_occupancy_view(request, block):
+    """Ocupación espacio -> vehículo de un bloque en una sola consulta"""
+    rows = ParkingSpace.objects.filter(block=block, is_active=True).annotate(
+        active_assignment=FilteredRelation('assignments', condition=Q(assignments__is_active=True))
+    ).order_by('code').values(
+        'id', 'code', 'property_id', 'property__house_number',
+        'active_assignment__assigned_at', 'active_assignment__vehicle_id',
+        'active_assignment__vehicle__license_plate', 'active_assignment__vehicle__brand',
+        'active_assignment__vehicle__model', 'active_assignment__vehicle__color',
+        'active_assignment__vehicle__owner_id', 'active_assignment__vehicle__owner__first_name',
+        'active_assignment__vehicle__owner__last_name',
+    )
+    
+    spaces = []
+    for row in rows:
+        vehicle = None
+        if row['active_assignment__vehicle_id']:
+            vehicle = {
+                'id': row['active_assignment__vehicle_id'],
+                'license_plate': row['active_assignment__vehicle__license_plate'],
+                'brand': row['active_assignment__vehicle__brand'],
+                'model': row['active_assignment__vehicle__model'],
+                'color': row['active_assignment__vehicle__color'],
+                'owner_id': row['active_assignment__vehicle__owner_id'],
+                'owner_name': f"{row['active_assignment__vehicle__owner__first_name']} {row['active_assignment__vehicle__owner__last_name']}".strip(),
+                'assigned_at': row['active_assignment__assigned_at'],
+            }
+        spaces.append({
+            'id': row['id'],
+            'code': row['code'],
+            'property_id': row['property_id'],
+            'house_number': row['property__house_number'],
+            'vehicle': vehicle
+        })
+    
+    return Response({
+        'block': block,
+        'count': len(spaces),
+        'occupied': sum(1 for space in spaces if space['vehicle']),
+        'spaces': spaces
+    })
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def vehicle_stats_view(request):
-    """Obtener estadísticas de vehículos"""
-    total_vehicles = Vehicle.objects.filter(is_active=True).count()
-    
-    stats = {
-        'total_vehicles': total_vehicles,
-        'by_type': {},
-        'active_vehicles': Vehicle.objects.filter(is_active=True).count(),
-        'inactive_vehicles': Vehicle.objects.filter(is_active=False).count(),
-    }
-    
-    # Contar por tipo
-    for vehicle_type, display_name in Vehicle.VEHICLE_TYPES:
-        count = Vehicle.objects.filter(vehicle_type=vehicle_type, is_active=True).count()
-        stats['by_type'][vehicle_type] = {
-            'count': count,
-            'display_name': display_name
-        }
-    
-    return Response(stats)
\ No newline at end of file
+    """Obtener estadísticas de vehículos, por tipo y por bloque"""
+    return Response(get_vehicle_stats())
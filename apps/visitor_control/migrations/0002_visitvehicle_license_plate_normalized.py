@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:40
+
+import re
+
+from django.db import migrations, models
+
+
+def backfill_normalized_plates(apps, schema_editor):
+    VisitVehicle = apps.get_model('visitor_control', 'VisitVehicle')
+    
+    vehicles = list(VisitVehicle.objects.only('id', 'license_plate'))
+    for vehicle in vehicles:
+        vehicle.license_plate_normalized = re.sub(r'[^0-9A-Z]', '', vehicle.license_plate.upper())
+    VisitVehicle.objects.bulk_update(vehicles, ['license_plate_normalized'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('visitor_control', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='visitvehicle',
+            name='license_plate_normalized',
+            field=models.CharField(default='', editable=False, max_length=20, verbose_name='Placa Normalizada'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_normalized_plates, migrations.RunPython.noop),
+        # El índice se crea después del backfill
+        migrations.AlterField(
+            model_name='visitvehicle',
+            name='license_plate_normalized',
+            field=models.CharField(db_index=True, editable=False, max_length=20, verbose_name='Placa Normalizada'),
+        ),
+    ]
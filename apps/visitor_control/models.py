@@ -4,6 +4,7 @@ from django.db import models
 from django.contrib.auth.models import User
 from apps.properties.models import Property # Para la casa a visitar
 from apps.common_areas.models import CommonArea # Para el área común a visitar
+from apps.vehicles.plates import normalize_plate
 
 # --- CHOICES ---
 class VisitReason(models.TextChoices):
@@ -104,6 +105,7 @@ class VisitVehicle(models.Model):
         verbose_name="Visita Asociada"
     )
     license_plate = models.CharField('Placa', max_length=20)
+    license_plate_normalized = models.CharField('Placa Normalizada', max_length=20, db_index=True, editable=False)
     color = models.CharField('Color', max_length=30, blank=True)
     model = models.CharField('Modelo', max_length=50, blank=True)
     vehicle_type = models.CharField(
@@ -117,6 +119,21 @@ class VisitVehicle(models.Model):
         verbose_name = 'Vehículo de Visita'
         verbose_name_plural = 'Vehículos de Visita'
         db_table = 'visit_vehicles'
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Placa tal como está en la base, para invalidarla también si cambia
+        if 'license_plate' in field_names:
+            instance._loaded_plate = instance.license_plate
+        return instance
+    
+    def save(self, *args, **kwargs):
+        self.license_plate_normalized = normalize_plate(self.license_plate)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'license_plate' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'license_plate_normalized'}
+        super().save(*args, **kwargs)
         
     def __str__(self):
         return f"{self.license_plate} ({self.visitor_log.full_name})"
\ No newline at end of file
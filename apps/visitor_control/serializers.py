@@ -5,6 +5,7 @@ from .models import VisitorLog, VisitVehicle, VisitReason, VehicleType
 from apps.properties.models import Property
 from apps.common_areas.models import CommonArea
 from apps.users.serializers import UserSerializer # Reutilizamos UserSerializer
+from apps.uploads.queue import enqueue_upload
 
 # --- Utilitarios para Dropdowns ---
 class PropertyDestinationSerializer(serializers.ModelSerializer):
@@ -95,6 +96,13 @@ class VisitorLogCreateSerializer(serializers.ModelSerializer):
         # Separar data del vehículo
         vehicle_data = validated_data.pop('vehicle', None)
         
+        # Las fotos del documento se suben en segundo plano desde la cola de subidas
+        documents = {
+            field: validated_data.pop(field)
+            for field in ('document_photo_front', 'document_photo_back')
+            if validated_data.get(field)
+        }
+        
         # Asignar usuario que registra (viene del request context)
         validated_data['registered_by'] = self.context['request'].user
         
@@ -104,6 +112,15 @@ class VisitorLogCreateSerializer(serializers.ModelSerializer):
         # Crear el vehículo si se proporcionó data
         if vehicle_data:
             VisitVehicle.objects.create(visitor_log=visitor_log, **vehicle_data)
+        
+        visitor_log.pending_uploads = [
+            {
+                'field': field,
+                'upload_id': enqueue_upload(visitor_log, field, uploaded, created_by=visitor_log.registered_by).id,
+                'status': 'pending'
+            }
+            for field, uploaded in documents.items()
+        ]
             
         return visitor_log
 
@@ -70,7 +70,8 @@ class VisitorLogListCreateView(generics.ListCreateAPIView):
         
         return Response({
             'message': 'Visitante registrado exitosamente',
-            'visitor_log': response_serializer.data
+            'visitor_log': response_serializer.data,
+            'pending_uploads': getattr(visitor_log, 'pending_uploads', [])
         }, status=status.HTTP_201_CREATED)
 
 class VisitorLogDetailUpdateView(generics.RetrieveUpdateAPIView):
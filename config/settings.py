@@ -15,6 +15,7 @@ import dj_database_url
 import cloudinary
 from decouple import config, Csv  
 import os
+import socket
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -57,6 +58,8 @@ INSTALLED_APPS = [
     'apps.visitor_control',
     'apps.access_control',
     'apps.security',
+    'apps.uploads',
+    'apps.idempotency',
 ]
 
 MIDDLEWARE = [
@@ -96,6 +99,27 @@ DATABASES = {
     "default": dj_database_url.config(default=config("DATABASE_URL"))
 }
 
+# Caché compartida entre workers: las estadísticas se invalidan por señales
+# tras el commit y todos los procesos deben ver la invalidación.
+# Redis si se configura REDIS_URL (requiere el paquete redis); si no, la tabla de caché de la base de datos
+# (crearla con ``python manage.py createcachetable``).
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -115,6 +139,21 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# El primer hasher es el predeterminado. El de invitación es más barato para
+# aprovisionamiento masivo y se reemplaza por el predeterminado en el primer login.
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'apps.users.hashers.InvitePBKDF2PasswordHasher',
+]
+
+# Aprovisionamiento masivo de usuarios (procesos de hasheo por lote, cerrados al terminar)
+BULK_USER_HASH_WORKERS = config('BULK_USER_HASH_WORKERS', default=min(4, os.cpu_count() or 1), cast=int)
+INVITE_PASSWORD_HASHER = config('INVITE_PASSWORD_HASHER', default='pbkdf2_sha256_invite')
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -163,7 +202,7 @@ CORS_ALLOW_ALL_ORIGINS = True  # Permite que la API sea consumida desde cualquie
 CORS_ALLOW_CREDENTIALS = True
 
 # Headers permitidos para mejor compatibilidad
-CORS_ALLOWED_HEADERS = [
+CORS_ALLOW_HEADERS = [
     'accept',
     'accept-encoding',
     'authorization',
@@ -173,8 +212,12 @@ CORS_ALLOWED_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'idempotency-key',
 ]
 
+# Indica al cliente que la respuesta es la guardada para su Idempotency-Key
+CORS_EXPOSE_HEADERS = ['idempotent-replayed']
+
 CORS_ALLOWED_METHODS = [
     'DELETE',
     'GET',
@@ -187,5 +230,37 @@ CORS_ALLOWED_METHODS = [
 # Supabase Storage
 SUPABASE_URL = config('SUPABASE_URL')
 SUPABASE_KEY = config('SUPABASE_KEY')
+# 'supabase' usa el cliente HTTP compartido; 'memory' guarda los archivos en memoria (pruebas)
+SUPABASE_STORAGE_BACKEND = config('SUPABASE_STORAGE_BACKEND', default='supabase')
+SUPABASE_STORAGE_TIMEOUT = config('SUPABASE_STORAGE_TIMEOUT', default=20, cast=int)
+SUPABASE_STORAGE_MAX_CONNECTIONS = config('SUPABASE_STORAGE_MAX_CONNECTIONS', default=20, cast=int)
+# Segundos que se recuerda si un objeto existe y su tamaño
+SUPABASE_STORAGE_METADATA_TTL = config('SUPABASE_STORAGE_METADATA_TTL', default=30, cast=int)
+
+# Fotos de rostro: lado máximo de la imagen principal y de las miniaturas
+FACE_PHOTO_MAX_SIZE = config('FACE_PHOTO_MAX_SIZE', default=1024, cast=int)
+FACE_PHOTO_THUMBNAIL_SIZES = config('FACE_PHOTO_THUMBNAIL_SIZES', default='320,96', cast=Csv(int))
+
+# Cola de subidas diferidas: spool local, hilos en el proceso web (0 = solo process_uploads) y reintentos
+UPLOAD_SPOOL_DIR = config('UPLOAD_SPOOL_DIR', default=str(BASE_DIR / 'spool' / 'uploads'))
+UPLOAD_WORKERS = config('UPLOAD_WORKERS', default=2, cast=int)
+UPLOAD_MAX_ATTEMPTS = config('UPLOAD_MAX_ATTEMPTS', default=6, cast=int)
+UPLOAD_RETRY_BASE_SECONDS = config('UPLOAD_RETRY_BASE_SECONDS', default=5, cast=int)
+UPLOAD_RETRY_MAX_SECONDS = config('UPLOAD_RETRY_MAX_SECONDS', default=600, cast=int)
+UPLOAD_LEASE_SECONDS = config('UPLOAD_LEASE_SECONDS', default=300, cast=int)
+# Cada cuántos segundos el proceso web reenvía reintentos vencidos (0 = solo process_uploads)
+UPLOAD_POLL_INTERVAL = config('UPLOAD_POLL_INTERVAL', default=15, cast=int)
+# Host dueño de los archivos del spool: solo ese host los procesa. Con un
+# UPLOAD_SPOOL_DIR compartido entre hosts, usar el mismo valor en todos
+UPLOAD_SPOOL_HOST = config('UPLOAD_SPOOL_HOST', default=socket.gethostname())
+# Días que ``cleanup_upload_spool`` conserva el archivo de una subida fallida
+UPLOAD_SPOOL_RETENTION_DAYS = config('UPLOAD_SPOOL_RETENTION_DAYS', default=7, cast=int)
+
+# LRU por proceso para la búsqueda exacta de placas (garita / cámara de acceso)
+PLATE_LOOKUP_CACHE_SIZE = config('PLATE_LOOKUP_CACHE_SIZE', default=2048, cast=int)
+PLATE_LOOKUP_CACHE_TTL = config('PLATE_LOOKUP_CACHE_TTL', default=5, cast=int)
+
+# Segundos que se conserva la respuesta de cada Idempotency-Key
+IDEMPOTENCY_KEY_TTL = config('IDEMPOTENCY_KEY_TTL', default=60 * 60 * 24, cast=int)
 
 DEFAULT_FILE_STORAGE = 'apps.users.storage.SupabaseStorage'
\ No newline at end of file
@@ -15,6 +15,7 @@ urlpatterns = [
     path('api/visitor-control/', include('apps.visitor_control.urls')),
     path('api/security/', include('apps.security.urls')),
     path('api/billing/', include('apps.billing.urls')),
+    path('api/uploads/', include('apps.uploads.urls')),
 ]
 
 # Servir archivos media en desarrollo
@@ -0,0 +1,8 @@
+# Gunicorn carga este archivo automáticamente al iniciar desde la raíz del proyecto
+
+
+def post_worker_init(worker):
+    # Cada worker reintenta las subidas pendientes aunque no reciba subidas nuevas
+    from apps.uploads.queue import start_poller
+
+    start_poller()